@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+bench_server.py
+
+Usage:
+    bench_server.py [--url http://127.0.0.1:5000] [--concurrency 16] [--requests 5000] [--conditional] [path ...]
+
+A small local load generator for server.py. Each worker thread keeps one
+keep-alive connection and cycles through the given paths. With --conditional,
+workers replay the ETag from their first response so the server can answer 304.
+Reports throughput, latency percentiles and a status-code breakdown.
+"""
+
+import argparse
+import http.client
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+DEFAULT_PATHS = [
+    "/games/example-tictactoe/index.html",
+    "/games/example-tictactoe/game.js",
+    "/games/example-breakout/game.js",
+    "/core/utils.js",
+    "/core/dsl_parser.js",
+    "/core/game_engine.js",
+]
+
+def worker(host, port, paths, count, conditional, accept_encoding):
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    etags = {}
+    latencies = []
+    statuses = Counter()
+    for i in range(count):
+        path = paths[i % len(paths)]
+        headers = {"Accept-Encoding": accept_encoding}
+        if conditional and path in etags:
+            headers["If-None-Match"] = etags[path]
+        start = time.perf_counter()
+        try:
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except (http.client.HTTPException, OSError):
+            statuses["error"] += 1
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=10)
+            continue
+        latencies.append(time.perf_counter() - start)
+        statuses[response.status] += 1
+        etag = response.getheader("ETag")
+        if etag:
+            etags[path] = etag
+    conn.close()
+    return latencies, statuses
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test server.py")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=5000, help="Total requests across all workers")
+    parser.add_argument("--conditional", action="store_true", help="Send If-None-Match after the first response")
+    parser.add_argument("--accept-encoding", default="gzip, br")
+    parser.add_argument("paths", nargs="*", default=DEFAULT_PATHS)
+    args = parser.parse_args()
+
+    url = urlparse(args.url)
+    per_worker = max(1, args.requests // args.concurrency)
+    barrier = threading.Barrier(args.concurrency)
+
+    def run(_):
+        barrier.wait()
+        return worker(url.hostname, url.port or 80, args.paths, per_worker, args.conditional, args.accept_encoding)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(run, range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(l for lat, _ in results for l in lat)
+    statuses = Counter()
+    for _, s in results:
+        statuses.update(s)
+    total = sum(statuses.values())
+    print(f"Requests: {total} in {elapsed:.2f}s ({total / elapsed:.0f} req/s, concurrency {args.concurrency})")
+    print(f"Latency p50={percentile(latencies, 0.5) * 1000:.2f}ms "
+          f"p90={percentile(latencies, 0.9) * 1000:.2f}ms "
+          f"p99={percentile(latencies, 0.99) * 1000:.2f}ms")
+    print("Statuses:", dict(statuses))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+bundler.py
+
+Usage:
+    bundler.py <game_name> [<game_name> ...]
+
+Concatenates and minifies the scripts a game's index.html loads (the core
+runtime plus the game's own scripts, in page order) into one fingerprinted
+bundle, and rewrites index.html to load that single file.
+
+server.py uses Bundler on the fly: bundles are cached in memory and rebuilt
+only when the ETag of one of their source files changes. Because the URL
+contains a content hash (/bundles/<game>.<fingerprint>.js), bundles can be
+cached by browsers forever.
+"""
+
+import gzip
+import hashlib
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+
+from validate_game import _ReferenceCollector, _is_external
+
+SCRIPT_TAG_RE = re.compile(r"""<script\b[^>]*\bsrc\s*=\s*["']([^"']+)["'][^>]*>\s*</script>\s*""", re.IGNORECASE)
+
+# Characters after which a "/" starts a regex literal rather than a division.
+_REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^")
+_REGEX_KEYWORDS = {"return", "typeof", "instanceof", "in", "of", "new", "delete", "void", "throw", "case", "do", "else", "yield", "await"}
+_LINE_BREAK_RE = re.compile(r"[^\S\n]*\n\s*")
+
+class Bundle:
+    __slots__ = ("game", "fingerprint", "content", "gzip_content", "sources", "signature")
+
+    def __init__(self, game, content, sources, signature):
+        self.game = game
+        self.content = content.encode("utf-8")
+        self.gzip_content = gzip.compress(self.content, compresslevel=9, mtime=0)
+        self.fingerprint = hashlib.sha256(self.content).hexdigest()[:16]
+        self.sources = sources
+        self.signature = signature
+
+    @property
+    def url(self):
+        return f"/bundles/{self.game}.{self.fingerprint}.js"
+
+class Bundler:
+    """
+    Builds and caches one bundle per game, using an AssetIndex (see static_index.py)
+    to resolve script URLs and detect source changes.
+    """
+
+    def __init__(self, assets, minify=True):
+        self.assets = assets
+        self.minify = minify
+        self._bundles = {}
+        self._script_urls = {}  # game -> (index.html etag, script URLs)
+        self._lock = threading.Lock()
+
+    def resolve(self, game, url):
+        """
+        Maps a script URL from games/<game>/index.html to an Asset, or None.
+        """
+        url = url.split("?", 1)[0].split("#", 1)[0]
+        if url.startswith("/core/"):
+            return self.assets.lookup("core", url[len("/core/"):])
+        if url.startswith("/games/"):
+            return self.assets.lookup("games", url[len("/games/"):])
+        if url.startswith("/") or _is_external(url):
+            return None
+        return self.assets.lookup("games", f"{game}/{url}")
+
+    def script_assets(self, game):
+        """
+        Returns [(url, Asset)] for the local scripts in the game's index.html, in page order.
+        Returns None if the game has no index.html or references a script that does not exist.
+        """
+        index = self.assets.lookup("games", f"{game}/index.html")
+        if index is None:
+            return None
+        cached = self._script_urls.get(game)
+        if cached is None or cached[0] != index.etag:
+            with open(index.path, "r", encoding="utf-8") as f:
+                collector = _ReferenceCollector()
+                collector.feed(f.read())
+            urls = [url for tag, url in collector.references if tag == "script" and not _is_external(url)]
+            cached = self._script_urls[game] = (index.etag, urls)
+        scripts = []
+        for url in cached[1]:
+            asset = self.resolve(game, url)
+            if asset is None:
+                return None
+            scripts.append((url, asset))
+        return scripts
+
+    def get(self, game):
+        """
+        Returns the current Bundle for game, rebuilding it only if a source changed.
+        """
+        scripts = self.script_assets(game)
+        if not scripts:
+            return None
+        signature = tuple((url, asset.etag) for url, asset in scripts)
+        bundle = self._bundles.get(game)
+        if bundle is not None and bundle.signature == signature:
+            return bundle
+        with self._lock:
+            bundle = self._bundles.get(game)
+            if bundle is None or bundle.signature != signature:
+                bundle = self._build(game, scripts, signature)
+                self._bundles[game] = bundle
+        return bundle
+
+    def invalidate(self, game=None):
+        """
+        Drops the cached bundle for game, or every bundle if game is None.
+        """
+        with self._lock:
+            if game is None:
+                self._bundles.clear()
+                self._script_urls.clear()
+            else:
+                self._bundles.pop(game, None)
+                self._script_urls.pop(game, None)
+
+    def rewrite_index(self, game, html):
+        """
+        Replaces the local <script src> tags in index.html with a single tag for the bundle.
+        Returns html unchanged if the game cannot be bundled.
+        """
+        bundle = self.get(game)
+        if bundle is None:
+            return html
+        bundled_urls = set(bundle.sources)
+        inserted = False
+
+        def replace(match):
+            nonlocal inserted
+            if match.group(1) not in bundled_urls:
+                return match.group(0)
+            if inserted:
+                return ""
+            inserted = True
+            return f'<script src="{bundle.url}"></script>\n'
+
+        return SCRIPT_TAG_RE.sub(replace, html)
+
+    def _build(self, game, scripts, signature):
+        parts = []
+        for _, asset in scripts:
+            with open(asset.path, "r", encoding="utf-8") as f:
+                parts.append(f.read())
+        raw = ";\n".join(parts) + "\n"
+        content = raw
+        if self.minify:
+            content = ";\n".join(minify_js(part) for part in parts) + "\n"
+            if not _syntax_ok(content):
+                print(f"[bundler] Minified bundle for {game} failed to parse; serving unminified")
+                content = raw
+        return Bundle(game, content, [url for url, _ in scripts], signature)
+
+def minify_js(source):
+    """
+    Conservative JS minifier: removes comments and indentation and drops blank lines,
+    leaving strings, template literals and regex literals untouched. Line breaks are
+    kept so automatic semicolon insertion behaves exactly as in the original.
+    """
+    # Alternating code and literal segments; only code segments are trimmed.
+    segments = []
+    out = []
+    i, n = 0, len(source)
+    prev_char = ""
+    prev_word = ""
+    gap = False
+    while i < n:
+        c = source[i]
+        if c in "'\"":
+            j = _skip_string(source, i)
+        elif c == "`":
+            j = _skip_template(source, i)
+        elif c == "/" and source.startswith("//", i):
+            j = source.find("\n", i)
+            i = n if j == -1 else j
+            continue
+        elif c == "/" and source.startswith("/*", i):
+            j = source.find("*/", i + 2)
+            j = n if j == -1 else j + 2
+            out.append("\n" if "\n" in source[i:j] else " ")
+            i = j
+            continue
+        elif c == "/" and (prev_char == "" or prev_char in _REGEX_PRECEDERS or prev_word in _REGEX_KEYWORDS):
+            j = _skip_regex(source, i)
+        else:
+            out.append(c)
+            if c.isspace():
+                gap = True
+            else:
+                if c.isalnum() or c in "_$":
+                    in_word = not gap and (prev_char.isalnum() or prev_char in "_$")
+                    prev_word = prev_word + c if in_word else c
+                else:
+                    prev_word = ""
+                prev_char, gap = c, False
+            i += 1
+            continue
+        segments.append(("".join(out), False))
+        segments.append((source[i:j], True))
+        out = []
+        prev_char, prev_word, gap = source[j - 1], "", False
+        i = j
+    segments.append(("".join(out), False))
+
+    parts = []
+    for index, (text, literal) in enumerate(segments):
+        if not literal:
+            # Strip whitespace around line breaks, which also drops blank lines.
+            text = _LINE_BREAK_RE.sub("\n", text)
+            if index == 0:
+                text = text.lstrip()
+            if index == len(segments) - 1:
+                text = text.rstrip()
+        parts.append(text)
+    return "".join(parts)
+
+def _skip_string(source, i):
+    quote = source[i]
+    j = i + 1
+    while j < len(source):
+        if source[j] == "\\":
+            j += 2
+            continue
+        if source[j] == quote or source[j] == "\n":
+            return j + 1
+        j += 1
+    return len(source)
+
+def _skip_template(source, i):
+    j = i + 1
+    while j < len(source):
+        ch = source[j]
+        if ch == "\\":
+            j += 2
+            continue
+        if ch == "`":
+            return j + 1
+        if ch == "$" and source.startswith("${", j):
+            j = _skip_braces(source, j + 2)
+            continue
+        j += 1
+    return len(source)
+
+def _skip_braces(source, j):
+    depth = 1
+    while j < len(source):
+        ch = source[j]
+        if ch in "'\"":
+            j = _skip_string(source, j)
+            continue
+        if ch == "`":
+            j = _skip_template(source, j)
+            continue
+        if ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return j + 1
+        j += 1
+    return len(source)
+
+def _skip_regex(source, i):
+    j = i + 1
+    in_class = False
+    while j < len(source):
+        ch = source[j]
+        if ch == "\\":
+            j += 2
+            continue
+        if ch == "\n":
+            return j
+        if ch == "[":
+            in_class = True
+        elif ch == "]":
+            in_class = False
+        elif ch == "/" and not in_class:
+            j += 1
+            while j < len(source) and (source[j].isalnum() or source[j] in "_$"):
+                j += 1
+            return j
+        j += 1
+    return len(source)
+
+def _syntax_ok(content):
+    """
+    Returns False only if a local JS parser is available and rejects content.
+    """
+    node = shutil.which("node")
+    if not node:
+        return True
+    with tempfile.NamedTemporaryFile("w", suffix=".js", encoding="utf-8") as f:
+        f.write(content)
+        f.flush()
+        return subprocess.run([node, "--check", f.name], capture_output=True).returncode == 0
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: bundler.py <game_name> [<game_name> ...]")
+        sys.exit(1)
+    from static_index import AssetIndex
+    bundler = Bundler(AssetIndex({"core": ["core"], "games": ["games", "generated"]}))
+    for game in sys.argv[1:]:
+        bundle = bundler.get(game)
+        if bundle is None:
+            print(f"[bundler] {game}: no bundleable scripts found")
+            continue
+        raw_size = sum(asset.size for _, asset in bundler.script_assets(game))
+        print(f"[bundler] {game}: {bundle.url} ({len(bundle.sources)} scripts, "
+              f"{raw_size} -> {len(bundle.content)} bytes, {len(bundle.gzip_content)} gzipped)")
+
+if __name__ == "__main__":
+    main()
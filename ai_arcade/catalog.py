@@ -0,0 +1,203 @@
+"""
+catalog.py
+
+A cached catalog of the games served under /games (games/ and generated/).
+
+Each entry holds the game's title, grid and players from the header of its
+.dsl file (the `Title:`, `Grid:`, `Players:` lines of tictactoe.dsl), falling
+back to the <title> of index.html, plus its entrypoint and asset sizes.
+
+The catalog is built from the in-memory AssetIndex rather than by walking the
+disk, and only re-reads a game's .dsl/index.html when one of its files
+changed. server.py updates it per file from the watcher, and rebuilds it after
+the index does a full rescan.
+"""
+
+import os
+import re
+import threading
+import uuid
+from html import unescape
+
+from static_index import COMPRESSED_SUFFIXES
+
+# Only the start of a file is read for headers and titles.
+HEADER_BYTES = 4096
+TITLE_RE = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+DSL_HEADER_RE = re.compile(r"^\s*([A-Za-z][\w ]*?)\s*:\s*(.*?)\s*$")
+
+def parse_dsl_header(text):
+    """
+    Parses the leading `Key: value` lines of a DSL file into a dict with lowercased keys.
+    Stops at the first line that is not a header (blank lines and # comments are skipped).
+    """
+    header = {}
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        match = DSL_HEADER_RE.match(stripped)
+        if not match:
+            break
+        header[match.group(1).lower()] = match.group(2)
+    return header
+
+def _read_head(path):
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return f.read(HEADER_BYTES)
+    except OSError:
+        return ""
+
+def build_entry(game, files):
+    """
+    Builds a catalog entry for game from {path within the game: Asset}.
+    Returns None if the game has no HTML entrypoint.
+    """
+    assets = {rel: asset for rel, asset in files.items() if not rel.endswith(COMPRESSED_SUFFIXES)}
+    if "index.html" in assets:
+        entry_rel = "index.html"
+    else:
+        html_files = sorted(rel for rel in assets if rel.endswith(".html"))
+        if not html_files:
+            return None
+        entry_rel = html_files[0]
+
+    header = {}
+    dsl_files = sorted(rel for rel in assets if rel.endswith(".dsl"))
+    if dsl_files:
+        header = parse_dsl_header(_read_head(assets[dsl_files[0]].path))
+
+    title = header.get("title")
+    if not title:
+        match = TITLE_RE.search(_read_head(assets[entry_rel].path))
+        title = unescape(match.group(1).strip()) if match else game
+
+    players = header.get("players")
+    entrypoint_path = os.path.normpath(assets[entry_rel].path)
+    return {
+        "name": game,
+        "title": title,
+        "grid": header.get("grid"),
+        "players": [p.strip() for p in players.split(",") if p.strip()] if players else [],
+        "source": entrypoint_path.split(os.sep)[0],
+        "entrypoint": f"/games/{game}/{entry_rel}",
+        "assets": {rel: asset.size for rel, asset in sorted(assets.items())},
+        "total_size": sum(asset.size for asset in assets.values()),
+        "updated": max(asset.mtime for asset in assets.values()).isoformat(),
+    }
+
+class Catalog:
+    """
+    Catalog of games under one AssetIndex mount, with sorted, paginated listing.
+    """
+
+    def __init__(self, assets, mount="games"):
+        self.assets = assets
+        self.mount = mount
+        self.version = 0
+        # Versions restart at 0 with the process; the nonce keeps ETags from an
+        # earlier process from matching a different catalog.
+        self.nonce = uuid.uuid4().hex[:8]
+        self._files = {}        # game -> {path within game: Asset}
+        self._signatures = {}   # game -> signature the entry was built from
+        self._entries = {}      # game -> entry dict
+        self._sorted = None     # cached list of entries in listing order
+        self._generation = None
+        self._lock = threading.Lock()
+        self.rebuild()
+
+    def rebuild(self):
+        """
+        Regroups every indexed file by game; entries whose files are unchanged are reused.
+        """
+        files = {}
+        generation = self.assets.generation
+        for relpath, asset in self.assets.items(self.mount):
+            game, _, rest = relpath.partition("/")
+            if rest:
+                files.setdefault(game, {})[rest] = asset
+        with self._lock:
+            self._files = files
+            for game in list(self._entries):
+                if game not in files:
+                    self._drop(game)
+            for game in files:
+                self._refresh_entry(game)
+            self._generation = generation
+            self._changed()
+
+    def update_file(self, relpath):
+        """
+        Updates the catalog for one changed file (a path relative to the mount).
+        """
+        game, _, rest = relpath.partition("/")
+        if not rest:
+            return
+        asset = self.assets.lookup(self.mount, relpath)
+        with self._lock:
+            game_files = self._files.setdefault(game, {})
+            if asset is None:
+                game_files.pop(rest, None)
+            else:
+                game_files[rest] = asset
+            if not game_files:
+                del self._files[game]
+                self._drop(game)
+            else:
+                self._refresh_entry(game)
+            self._changed()
+
+    def _refresh_entry(self, game):
+        files = self._files[game]
+        signature = frozenset((rel, asset.etag) for rel, asset in files.items())
+        if self._signatures.get(game) == signature:
+            return
+        self._signatures[game] = signature
+        entry = build_entry(game, files)
+        if entry is None:
+            self._entries.pop(game, None)
+        else:
+            self._entries[game] = entry
+
+    def _drop(self, game):
+        self._entries.pop(game, None)
+        self._signatures.pop(game, None)
+
+    def _changed(self):
+        self._sorted = None
+        self.version += 1
+
+    def etag(self, query=""):
+        return f"catalog-{self.nonce}-{self.version}-{query}"
+
+    def _ensure_current(self):
+        if self._generation != self.assets.generation:
+            self.rebuild()
+
+    def get(self, game):
+        self._ensure_current()
+        return self._entries.get(game)
+
+    def page(self, page=1, per_page=50, query=None):
+        """
+        Returns (entries on this page without per-asset sizes, total matching entries).
+        """
+        self._ensure_current()
+        with self._lock:
+            if self._sorted is None:
+                self._sorted = sorted(self._entries.values(), key=lambda e: (e["title"].lower(), e["name"]))
+            entries = self._sorted
+        if query:
+            query = query.lower()
+            entries = [e for e in entries if query in e["name"].lower() or query in e["title"].lower()]
+        start = (page - 1) * per_page
+        summaries = []
+        for entry in entries[start:start + per_page]:
+            summary = {key: value for key, value in entry.items() if key != "assets"}
+            summary["asset_count"] = len(entry["assets"])
+            summaries.append(summary)
+        return summaries, len(entries)
+
+    def __len__(self):
+        return len(self._entries)
@@ -14,7 +14,9 @@ This agent:
   - Processes tool events as they come in. When a write_file event is received, the file is written immediately.
   - Updates the prompt to indicate which files still need to be generated.
   - Continues until the list of expected files is empty.
-  
+  - Validates the generated game offline (see validate_game.py) and, for each broken file,
+    sends a targeted repair prompt containing only that file and its errors.
+
 Note: The toolbox only supports primitive types (strings) so we use comma-delimited strings
 for any list data.
 """
@@ -23,12 +25,22 @@ import os
 import sys
 from openai import OpenAI
 from ai_agent_toolbox import Toolbox, XMLParser, XMLPromptFormatter
+from validate_game import validate_game
+
+# How many validate -> repair rounds to attempt before giving up.
+MAX_REPAIR_ROUNDS = 3
+
+# One client (and connection pool) per base URL, reused across calls and, in
+# common/agent_daemon.py, across jobs.
+_clients = {}
 
 def llm_call(prompt: str, system_prompt: str = "", base_url: str = "", model: str = "o3-mini") -> str:
     """
     Calls the model with the given prompt and returns the response.
     """
-    client = OpenAI(api_key=os.environ["OPENAI_API_KEY"], base_url=base_url)
+    client = _clients.get(base_url)
+    if client is None:
+        client = _clients.setdefault(base_url, OpenAI(api_key=os.environ["OPENAI_API_KEY"], base_url=base_url))
 
     messages = []
     if system_prompt:
@@ -66,11 +78,14 @@ def main():
     if len(sys.argv) < 3:
         print("Usage: generate_game.py <game_name> <description>")
         sys.exit(1)
-    game_name = sys.argv[1]
-    description = sys.argv[2]
+    generate_game(sys.argv[1], sys.argv[2])
 
+def generate_game(game_name, description, root="."):
+    """
+    Designs, writes and repairs <root>/generated/<game_name> from the project under root.
+    """
     # Load all project files (excluding generated/) and build a summary including full file contents.
-    project_files = load_project(".")
+    project_files = load_project(root)
     project_summary = ""
     for relpath, content in project_files.items():
         project_summary += f"File: {relpath}\n{content}\n\n"
@@ -100,7 +115,7 @@ def main():
     # Tool: write_file
     def write_file(path, content):
         nonlocal pending_files
-        base_dir = os.path.join("generated", game_name)
+        base_dir = os.path.join(root, "generated", game_name)
         full_path = os.path.join(base_dir, path)
         os.makedirs(os.path.dirname(full_path), exist_ok=True)
         with open(full_path, 'w', encoding='utf-8') as f:
@@ -203,7 +218,54 @@ def main():
             print("[main] All expected files have been generated.")
             break
 
+    repair_game(game_name, game_design, toolbox, parser, formatter, root)
     print("[main] Game generation complete.")
 
+def repair_game(game_name, game_design, toolbox, parser, formatter, root="."):
+    """
+    Validates generated/<game_name> and asks the LLM to rewrite only the broken files,
+    feeding back the concrete errors. Stops when the game validates or after MAX_REPAIR_ROUNDS.
+    """
+    game_dir = os.path.join(root, "generated", game_name)
+    for repair_round in range(MAX_REPAIR_ROUNDS):
+        problems = validate_game(game_dir, root)
+        if not problems:
+            print(f"[repair] {game_dir} passed validation.")
+            return True
+        for relpath, errors in problems.items():
+            print(f"[repair] Round {repair_round + 1}: repairing {relpath} ({len(errors)} error(s))")
+            full_path = os.path.join(game_dir, relpath)
+            if os.path.exists(full_path):
+                with open(full_path, "r", encoding="utf-8") as f:
+                    current_content = f.read()
+            else:
+                current_content = "(file does not exist yet)"
+            other_files = sorted(
+                os.path.relpath(os.path.join(dirpath, name), game_dir)
+                for dirpath, _, filenames in os.walk(game_dir) for name in filenames
+            )
+            system = (
+                f"You are a game repair AI agent. The game '{game_name}' was generated with this design:\n\n"
+                f"{game_design}\n\n"
+                f"Files in the game folder (served at /games/{game_name}/): {', '.join(other_files)}\n"
+                "Core scripts are served at /core/game_engine.js, /core/utils.js and /core/dsl_parser.js.\n"
+                "Fix ONLY the file below. Call write_file exactly once with its complete corrected content."
+            )
+            system += "\n\n" + formatter.usage_prompt(toolbox)
+            error_list = "\n".join(f"- {error}" for error in errors)
+            prompt = (
+                f"File: {relpath}\n{current_content}\n\n"
+                f"Validation errors:\n{error_list}\n\n"
+                f"Rewrite {relpath} with write_file (path '{relpath}') so that these errors are fixed."
+            )
+            response = llm_call(system_prompt=system, prompt=prompt, base_url=os.getenv("OPENAI_BASE_URL", "https://nano-gpt.com/api/v1"))
+            for event in parser.parse(response):
+                if event.is_tool_call and event.tool.name == "write_file":
+                    toolbox.use(event)
+    problems = validate_game(game_dir, root)
+    for relpath, errors in problems.items():
+        print(f"[repair] Still broken after {MAX_REPAIR_ROUNDS} rounds: {relpath}: {errors}")
+    return not problems
+
 if __name__ == "__main__":
     main()
@@ -1,38 +1,331 @@
-from flask import Flask, send_from_directory, redirect, abort
+import argparse
+import gzip
+import math
 import os
+from html import escape
+from urllib.parse import urlencode
+
+from flask import Flask, Response, abort, jsonify, redirect, request, send_file, stream_with_context
+
+from bundler import Bundler
+from catalog import Catalog
+from static_index import ENCODINGS, AssetIndex
+from watcher import ReloadBroadcaster, start_watcher
 
 app = Flask(__name__)
+# Let a front-end proxy (nginx/lighttpd) stream files itself when requested.
+app.config["USE_X_SENDFILE"] = os.getenv("USE_X_SENDFILE", "") == "1"
+
+# Cache lifetime (seconds) for game assets; HTML pages are always revalidated.
+ASSET_MAX_AGE = int(os.getenv("ASSET_MAX_AGE", "300"))
+
+# Files worth precompressing, and the minimum size that makes it pay off.
+COMPRESSIBLE_EXTENSIONS = (".js", ".css", ".html", ".json", ".svg", ".dsl", ".txt")
+MIN_COMPRESS_SIZE = 1024
+
+# Serve each game's scripts as one minified, fingerprinted bundle (see bundler.py).
+BUNDLE_SCRIPTS = os.getenv("BUNDLE_SCRIPTS", "") == "1"
+BUNDLE_MAX_AGE = 31536000
+
+# /core/<path> is served from core/, /games/<path> from games/ then generated/.
+ASSETS = AssetIndex({
+    "core": ["core"],
+    "games": ["games", "generated"],
+})
+BUNDLER = Bundler(ASSETS)
+CATALOG = Catalog(ASSETS)
+
+# Catalog pagination defaults
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 500
+
+# Watch mode: keep caches current from file events and live-reload open game tabs.
+WATCH = os.getenv("WATCH", "") == "1"
+RELOADS = ReloadBroadcaster()
+LIVE_RELOAD_SNIPPET = """<script>
+(function() {
+    var game = location.pathname.split('/')[2];
+    var events = new EventSource('/events');
+    events.addEventListener('reload', function(e) {
+        var data = JSON.parse(e.data);
+        if (data.game === '*' || data.game === game) location.reload();
+    });
+})();
+</script>
+"""
+
+def send_asset(mount, filename):
+    """
+    Serves a file from the asset index with ETag/Last-Modified, Cache-Control and
+    precompressed variants. Conditional and range requests are answered by send_file.
+    """
+    asset = ASSETS.lookup(mount, filename)
+    if asset is None:
+        abort(404)
+
+    encoding, variant = asset.pick_variant(lambda enc: request.accept_encodings.quality(enc) > 0)
+    is_html = asset.mimetype == "text/html"
+    response = send_file(
+        variant.path,
+        mimetype=asset.mimetype,
+        etag=variant.etag,
+        last_modified=variant.mtime,
+        max_age=0 if is_html else ASSET_MAX_AGE,
+        conditional=True,
+    )
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    if asset.variants:
+        response.vary.add("Accept-Encoding")
+    if is_html:
+        response.cache_control.no_cache = True
+    return response
 
 # Serve files from the core directory
 @app.route('/core/<path:filename>')
 def serve_core(filename):
-    return send_from_directory('core', filename)
+    return send_asset("core", filename)
 
+# Serve files from 'games', falling back to 'generated'
 @app.route('/games/<path:filename>')
 def serve_file(filename):
-    # Construct the full paths for both directories
-    games_path = os.path.join('games', filename)
-    generated_path = os.path.join('generated', filename)
-
-    # Check if the file exists in the 'games' directory first
-    print("games", games_path, generated_path)
-    if os.path.exists(games_path):
-        return send_from_directory('games', filename)
-    # If not found in 'games', check the 'generated' directory
-    elif os.path.exists(generated_path):
-        return send_from_directory('generated', filename)
-    # If the file isn't found in either, return a 404 error
-    else:
+    game, _, rest = filename.partition("/")
+    if (BUNDLE_SCRIPTS or WATCH) and rest == "index.html":
+        return send_game_index(game)
+    return send_asset("games", filename)
+
+def send_game_index(game):
+    """
+    Serves games/<game>/index.html with its local scripts replaced by the game's bundle
+    (when bundling) and the live-reload client injected (when watching).
+    """
+    asset = ASSETS.lookup("games", f"{game}/index.html")
+    if asset is None:
         abort(404)
+    bundle = BUNDLER.get(game) if BUNDLE_SCRIPTS else None
+    if bundle is None and not WATCH:
+        return send_asset("games", f"{game}/index.html")
+    with open(asset.path, "r", encoding="utf-8") as f:
+        html = f.read()
+    etag = asset.etag
+    if bundle is not None:
+        html = BUNDLER.rewrite_index(game, html)
+        etag += f"-{bundle.fingerprint}"
+    if WATCH:
+        html = html.replace("</body>", LIVE_RELOAD_SNIPPET + "</body>", 1) if "</body>" in html else html + LIVE_RELOAD_SNIPPET
+        etag += "-live"
+    response = app.response_class(html, mimetype="text/html")
+    response.set_etag(etag)
+    response.last_modified = asset.mtime
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
-if __name__ == '__main__':
-    app.run(debug=True)
+# Fingerprinted bundles never change, so they are cached for a year
+@app.route('/bundles/<game>.<fingerprint>.js')
+def serve_bundle(game, fingerprint):
+    bundle = BUNDLER.get(game)
+    if bundle is None:
+        abort(404)
+    if bundle.fingerprint != fingerprint:
+        return redirect(bundle.url)
+    use_gzip = request.accept_encodings.quality("gzip") > 0
+    response = app.response_class(bundle.gzip_content if use_gzip else bundle.content, mimetype="text/javascript")
+    if use_gzip:
+        response.headers["Content-Encoding"] = "gzip"
+    response.vary.add("Accept-Encoding")
+    response.set_etag(bundle.fingerprint + ("-gzip" if use_gzip else ""))
+    response.headers["Cache-Control"] = f"public, max-age={BUNDLE_MAX_AGE}, immutable"
+    return response.make_conditional(request)
 
-# Default route – redirect to the example Tic Tac Toe game
+# Server-Sent Events stream of reload notifications (watch mode)
+@app.route('/events')
+def events():
+    if not WATCH:
+        abort(404)
+    response = Response(stream_with_context(RELOADS.stream()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+def on_files_changed(paths):
+    """
+    Watcher callback: updates only the index entries and bundles the changed files
+    belong to, then tells open tabs of the affected games to reload.
+    """
+    games = set()
+    for path in paths:
+        for mount, relpath in ASSETS.update_path(path):
+            # A core change affects every game.
+            games.add(relpath.split("/", 1)[0] if mount == "games" else "*")
+            if mount == "games":
+                CATALOG.update_file(relpath)
+    for game in sorted(games):
+        BUNDLER.invalidate(None if game == "*" else game)
+        RELOADS.publish("reload", {"game": game})
+    if games:
+        print(f"[watch] {len(paths)} file(s) changed; reloading {', '.join(sorted(games))}")
+
+def catalog_page_args():
+    """
+    Reads page, per_page and q from the query string.
+    """
+    page = max(1, request.args.get("page", 1, type=int))
+    per_page = min(MAX_PER_PAGE, max(1, request.args.get("per_page", DEFAULT_PER_PAGE, type=int)))
+    return page, per_page, request.args.get("q", "").strip() or None
+
+def conditional_catalog_response(response):
+    # The catalog version changes whenever any game changes.
+    response.set_etag(CATALOG.etag(request.query_string.decode()))
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+# JSON catalog of every game in games/ and generated/
+@app.route('/api/games')
+def list_games():
+    page, per_page, query = catalog_page_args()
+    games, total = CATALOG.page(page, per_page, query)
+    return conditional_catalog_response(jsonify({
+        "page": page,
+        "per_page": per_page,
+        "total": total,
+        "pages": math.ceil(total / per_page),
+        "games": games,
+    }))
+
+@app.route('/api/games/<name>')
+def game_details(name):
+    entry = CATALOG.get(name)
+    if entry is None:
+        abort(404)
+    return conditional_catalog_response(jsonify(entry))
+
+# Default route – paginated index of all games
 @app.route('/')
 def index():
-    return redirect('/games/example-tictactoe/index.html')
+    page, per_page, query = catalog_page_args()
+    games, total = CATALOG.page(page, per_page, query)
+    pages = max(1, math.ceil(total / per_page))
+
+    def page_link(number, label):
+        params = {"page": number, "per_page": per_page}
+        if query:
+            params["q"] = query
+        return f'<a href="/?{escape(urlencode(params))}">{label}</a>'
+
+    rows = "\n".join(
+        f'<li><a href="{escape(game["entrypoint"])}">{escape(game["title"])}</a>'
+        f' <small>{escape(game["name"])} &middot; {escape(game["source"])}'
+        f'{" &middot; " + escape(game["grid"]) if game["grid"] else ""}'
+        f'{" &middot; " + escape(", ".join(game["players"])) if game["players"] else ""}'
+        f' &middot; {game["total_size"]} bytes</small></li>'
+        for game in games
+    )
+    nav = []
+    if page > 1:
+        nav.append(page_link(page - 1, "&larr; Previous"))
+    nav.append(f"Page {page} of {pages} ({total} games)")
+    if page < pages:
+        nav.append(page_link(page + 1, "Next &rarr;"))
+    html = (
+        "<!DOCTYPE html>\n<html lang=\"en\">\n<head>\n<meta charset=\"UTF-8\">\n<title>AI Arcade</title>\n</head>\n<body>\n"
+        "<h1>AI Arcade</h1>\n"
+        f'<form action="/"><input name="q" value="{escape(query or "")}" placeholder="Search games"></form>\n'
+        f"<ul>\n{rows}\n</ul>\n<p>{' | '.join(nav)}</p>\n</body>\n</html>\n"
+    )
+    return conditional_catalog_response(app.response_class(html, mimetype="text/html"))
+
+def precompress(roots=("core", "games", "generated")):
+    """
+    Writes .gz (and .br, if the brotli package is installed) next to every
+    compressible asset whose compressed copy is missing or stale.
+    """
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+        print("[precompress] brotli not installed; writing gzip variants only")
+
+    compressors = {
+        "gzip": lambda data: gzip.compress(data, compresslevel=9, mtime=0),
+        "br": (lambda data: brotli.compress(data, quality=11)) if brotli else None,
+    }
+    written = 0
+    for root in roots:
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                if not filename.endswith(COMPRESSIBLE_EXTENSIONS):
+                    continue
+                path = os.path.join(dirpath, filename)
+                stat_result = os.stat(path)
+                if stat_result.st_size < MIN_COMPRESS_SIZE:
+                    continue
+                with open(path, "rb") as f:
+                    data = f.read()
+                for encoding, suffix in ENCODINGS:
+                    compress = compressors[encoding]
+                    target = path + suffix
+                    if compress is None:
+                        continue
+                    if os.path.exists(target) and os.stat(target).st_mtime >= stat_result.st_mtime:
+                        continue
+                    compressed = compress(data)
+                    if len(compressed) >= len(data):
+                        continue
+                    with open(target, "wb") as f:
+                        f.write(compressed)
+                    written += 1
+    ASSETS.refresh()
+    print(f"[precompress] Wrote {written} compressed variant(s)")
+
+def build_bundles():
+    """
+    Build step: bundles every game up front so the first page load is not slowed down.
+    """
+    games = sorted({name for root in ("games", "generated") if os.path.isdir(root) for name in os.listdir(root)})
+    for game in games:
+        bundle = BUNDLER.get(game)
+        if bundle is not None:
+            print(f"[bundle] {game}: {bundle.url} ({len(bundle.content)} bytes)")
+
+def serve(host, port, threads, debug):
+    """
+    Runs the app. Uses waitress (a threaded production WSGI server) when installed,
+    otherwise Flask's threaded development server. For sendfile-based transfer run
+    under gunicorn instead, e.g. `gunicorn -w 4 --threads 8 server:app`.
+    """
+    if WATCH:
+        ASSETS.disable_rescans()
+        start_watcher(["core", "games", "generated"], on_files_changed)
+    if debug or WATCH:
+        # SSE clients each hold a connection open, so use a thread per request.
+        app.run(host=host, port=port, debug=debug, threaded=True, use_reloader=debug and not WATCH)
+        return
+    try:
+        from waitress import serve as waitress_serve
+    except ImportError:
+        print("[server] waitress not installed; using Flask's threaded server")
+        app.run(host=host, port=port, threaded=True)
+        return
+    print(f"[server] Serving on http://{host}:{port} with {threads} threads "
+          f"({len(ASSETS)} assets indexed, {len(CATALOG)} games in catalog)")
+    waitress_serve(app, host=host, port=port, threads=threads)
 
 if __name__ == '__main__':
-    # Run in debug mode for development
-    app.run(debug=True)
+    parser = argparse.ArgumentParser(description="Serve the AI arcade")
+    parser.add_argument("command", nargs="?", default="serve", choices=["serve", "precompress", "bundle"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=8, help="Worker threads (waitress)")
+    parser.add_argument("--debug", action="store_true", help="Run Flask's debug server")
+    parser.add_argument("--bundle", action="store_true", help="Serve each game's scripts as one bundle")
+    parser.add_argument("--watch", action="store_true", help="Watch for changes and live-reload open games")
+    args = parser.parse_args()
+    BUNDLE_SCRIPTS = BUNDLE_SCRIPTS or args.bundle
+    WATCH = WATCH or args.watch
+
+    if args.command == "precompress":
+        precompress()
+    elif args.command == "bundle":
+        build_bundles()
+    else:
+        serve(args.host, args.port, args.threads, args.debug)
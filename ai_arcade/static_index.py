@@ -0,0 +1,197 @@
+"""
+static_index.py
+
+In-memory path resolution index for the static files served by server.py.
+
+Instead of calling os.path.exists on every request, the server looks files up in
+an index built by walking each mount's directories once. Each entry keeps the
+stat data needed for ETag / Last-Modified headers and any precompressed
+variants (<file>.br, <file>.gz) found next to it.
+
+The index is rescanned when it is older than `refresh_interval` seconds, and
+(at most once per `miss_rescan_interval`) when a lookup misses, so newly
+generated games show up without restarting the server. When a file watcher is
+running (see watcher.py) it calls `update_path` for each changed file instead,
+and periodic rescans can be switched off with `disable_rescans`.
+"""
+
+import mimetypes
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+# Precompressed variants, in order of preference: (Content-Encoding, file suffix).
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+COMPRESSED_SUFFIXES = tuple(suffix for _, suffix in ENCODINGS)
+
+class Asset:
+    """
+    A file on disk plus the metadata needed to serve it conditionally.
+    """
+    __slots__ = ("path", "size", "mtime", "etag", "mimetype", "variants")
+
+    def __init__(self, path, stat_result):
+        self.path = path
+        self.size = stat_result.st_size
+        self.mtime = datetime.fromtimestamp(stat_result.st_mtime, tz=timezone.utc)
+        self.etag = f"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"
+        self.mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.variants = {}  # Content-Encoding -> Asset
+
+    def pick_variant(self, accepts):
+        """
+        Returns (encoding, asset) for the best precompressed variant the client accepts,
+        or (None, self) if none applies. `accepts` is a callable encoding -> bool.
+        """
+        for encoding, _ in ENCODINGS:
+            variant = self.variants.get(encoding)
+            if variant is not None and variant.mtime >= self.mtime and accepts(encoding):
+                return encoding, variant
+        return None, self
+
+class AssetIndex:
+    """
+    Maps (mount, relative path) to Asset. A mount is served from one or more root
+    directories; earlier roots win, matching server.py's games/ then generated/ lookup.
+    """
+
+    def __init__(self, mounts, refresh_interval=30.0, miss_rescan_interval=1.0):
+        self.mounts = mounts  # mount name -> list of root directories
+        self.refresh_interval = refresh_interval
+        self.miss_rescan_interval = miss_rescan_interval
+        self._entries = {}
+        self._last_scan = 0.0
+        self.generation = 0  # bumped on every full rescan
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self):
+        """
+        Rebuilds the whole index from disk.
+        """
+        entries = {}
+        for mount, roots in self.mounts.items():
+            table = {}
+            # Walk roots in reverse so earlier roots overwrite later ones.
+            for root in reversed(roots):
+                table.update(_scan_root(root))
+            entries[mount] = table
+        with self._lock:
+            self._entries = entries
+            self._last_scan = time.monotonic()
+            self.generation += 1
+
+    def disable_rescans(self):
+        """
+        Stops time- and miss-based rescans; used when a watcher keeps the index current.
+        """
+        self.refresh_interval = float("inf")
+        self.miss_rescan_interval = float("inf")
+
+    def update_path(self, path):
+        """
+        Re-stats a single changed (or deleted) file and updates its entry in every mount
+        whose roots contain it. Returns the list of (mount, relative path) entries touched.
+        """
+        path = os.path.normpath(path)
+        touched = []
+        for mount, roots in self.mounts.items():
+            for root in roots:
+                relpath = os.path.relpath(path, os.path.normpath(root))
+                if relpath == ".." or relpath.startswith(".." + os.sep):
+                    continue
+                relpath = relpath.replace(os.sep, "/")
+                self._restat(mount, relpath)
+                if relpath.endswith(COMPRESSED_SUFFIXES):
+                    # A changed .br/.gz file changes the variants of the file it compresses.
+                    relpath = os.path.splitext(relpath)[0]
+                    self._restat(mount, relpath)
+                touched.append((mount, relpath))
+                break
+        return touched
+
+    def _restat(self, mount, relpath):
+        asset = None
+        for root in self.mounts[mount]:
+            path = os.path.join(root, relpath)
+            try:
+                asset = Asset(path, os.stat(path))
+            except OSError:
+                continue
+            for encoding, suffix in ENCODINGS:
+                try:
+                    asset.variants[encoding] = Asset(path + suffix, os.stat(path + suffix))
+                except OSError:
+                    pass
+            break
+        with self._lock:
+            table = self._entries.setdefault(mount, {})
+            if asset is None:
+                table.pop(relpath, None)
+            else:
+                table[relpath] = asset
+
+    def lookup(self, mount, relpath):
+        """
+        Returns the Asset for relpath under mount, or None if it does not exist.
+        """
+        relpath = _normalize(relpath)
+        if relpath is None:
+            return None
+        now = time.monotonic()
+        if now - self._last_scan > self.refresh_interval:
+            self.refresh()
+        asset = self._entries.get(mount, {}).get(relpath)
+        if asset is None and now - self._last_scan > self.miss_rescan_interval:
+            self.refresh()
+            asset = self._entries.get(mount, {}).get(relpath)
+        return asset
+
+    def items(self, mount):
+        """
+        Returns a snapshot list of (relative path, Asset) for mount.
+        """
+        with self._lock:
+            return list(self._entries.get(mount, {}).items())
+
+    def __len__(self):
+        return sum(len(table) for table in self._entries.values())
+
+def _normalize(relpath):
+    """
+    Normalizes a request path; returns None for paths escaping the mount.
+    """
+    relpath = os.path.normpath(relpath.replace("\\", "/")).replace(os.sep, "/")
+    if relpath.startswith("../") or relpath in ("..", ".") or os.path.isabs(relpath):
+        return None
+    return relpath
+
+def _scan_root(root):
+    """
+    Walks root and returns {relative path: Asset}, attaching .br/.gz files as
+    variants of the file they compress.
+    """
+    table = {}
+    compressed = []
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            try:
+                stat_result = os.stat(path)
+            except OSError:
+                continue
+            relpath = os.path.relpath(path, root).replace(os.sep, "/")
+            asset = Asset(path, stat_result)
+            if filename.endswith(COMPRESSED_SUFFIXES):
+                compressed.append((relpath, asset))
+            table[relpath] = asset
+    for relpath, asset in compressed:
+        base, suffix = os.path.splitext(relpath)
+        original = table.get(base)
+        if original is None:
+            continue
+        for encoding, encoding_suffix in ENCODINGS:
+            if suffix == encoding_suffix:
+                original.variants[encoding] = asset
+    return table
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+validate_game.py
+
+Usage:
+    validate_game.py <game_dir> [<game_dir> ...]
+
+Offline checks for a generated game before anyone loads it through server.py:
+  - Syntax-checks every .js file with a local JS parser (`node --check`, or the
+    `esprima` package when node is not installed).
+  - Confirms index.html exists, that every local file it references resolves the
+    same way server.py would resolve it, and that it loads the core scripts.
+
+The result maps each broken file (relative to the game directory) to a list of
+concrete error strings, so generate_game.py can repair only those files.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+from html.parser import HTMLParser
+
+# Core scripts every generated game page is expected to load.
+REQUIRED_CORE_SCRIPTS = ["/core/game_engine.js", "/core/utils.js"]
+
+# Directories server.py serves /games/<path> from, in lookup order.
+GAME_ROOTS = ["games", "generated"]
+
+class _ReferenceCollector(HTMLParser):
+    """
+    Collects (tag, url) pairs for every local resource an HTML page references.
+    """
+    def __init__(self):
+        super().__init__()
+        self.references = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in ("script", "img", "audio", "video", "source") and attrs.get("src"):
+            self.references.append((tag, attrs["src"]))
+        elif tag == "link" and attrs.get("href"):
+            self.references.append((tag, attrs["href"]))
+
+def _is_external(url):
+    return url.startswith(("http://", "https://", "//", "data:", "blob:"))
+
+def resolve_reference(url, game_dir, root="."):
+    """
+    Maps a URL referenced from index.html to a path on disk, mirroring the routes
+    in server.py. Returns None if the file does not exist.
+    """
+    url = url.split("?", 1)[0].split("#", 1)[0]
+    if url.startswith("/core/"):
+        candidates = [os.path.join(root, "core", url[len("/core/"):])]
+    elif url.startswith("/games/"):
+        rel = url[len("/games/"):]
+        candidates = [os.path.join(root, base, rel) for base in GAME_ROOTS]
+    elif url.startswith("/"):
+        candidates = [os.path.join(root, url.lstrip("/"))]
+    else:
+        candidates = [os.path.join(game_dir, url)]
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+def check_js_syntax(path):
+    """
+    Returns a list of syntax errors for the JS file at path (empty if it parses).
+    """
+    node = shutil.which("node")
+    if node:
+        result = subprocess.run([node, "--check", path], capture_output=True, text=True)
+        if result.returncode == 0:
+            return []
+        # node prints "file:line", the offending source line, a caret and the error.
+        lines = [line for line in result.stderr.splitlines() if line.strip()]
+        detail = [line for line in lines if not line.startswith("    at ") and "Node.js" not in line]
+        return ["\n".join(detail[:4]) or "node --check failed"]
+
+    try:
+        import esprima
+    except ImportError:
+        print(f"[validate] No JS parser available (install node or esprima); skipping {path}")
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        source = f.read()
+    try:
+        esprima.parseScript(source, tolerant=False)
+    except esprima.Error as e:
+        return [f"{path}: {e}"]
+    return []
+
+def check_index_html(game_dir, root="."):
+    """
+    Returns a list of problems with game_dir/index.html.
+    """
+    index_path = os.path.join(game_dir, "index.html")
+    if not os.path.isfile(index_path):
+        return ["index.html is missing"]
+
+    with open(index_path, "r", encoding="utf-8") as f:
+        collector = _ReferenceCollector()
+        collector.feed(f.read())
+
+    errors = []
+    scripts = [url for tag, url in collector.references if tag == "script"]
+    for core_script in REQUIRED_CORE_SCRIPTS:
+        if core_script not in scripts:
+            errors.append(f'index.html does not load the core script "{core_script}"')
+    for tag, url in collector.references:
+        if _is_external(url):
+            continue
+        if resolve_reference(url, game_dir, root) is None:
+            errors.append(f'index.html references "{url}" (<{tag}>) but no such file exists')
+    return errors
+
+def validate_game(game_dir, root="."):
+    """
+    Validates a generated game directory.
+    Returns a dict mapping relative file paths to lists of errors; empty if the game is valid.
+    """
+    problems = {}
+    index_errors = check_index_html(game_dir, root)
+    if index_errors:
+        problems["index.html"] = index_errors
+
+    for dirpath, _, filenames in os.walk(game_dir):
+        for filename in filenames:
+            if not filename.endswith(".js"):
+                continue
+            path = os.path.join(dirpath, filename)
+            errors = check_js_syntax(path)
+            if errors:
+                problems[os.path.relpath(path, game_dir)] = errors
+    return problems
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: validate_game.py <game_dir> [<game_dir> ...]")
+        sys.exit(1)
+    failed = False
+    for game_dir in sys.argv[1:]:
+        problems = validate_game(game_dir)
+        if not problems:
+            print(f"[validate] {game_dir}: OK")
+            continue
+        failed = True
+        for relpath, errors in problems.items():
+            for error in errors:
+                print(f"[validate] {game_dir}/{relpath}: {error}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+watcher.py
+
+File watching for server.py. `start_watcher` uses inotify/FSEvents through the
+optional `watchdog` package when it is installed and falls back to polling
+otherwise. Either way the callback receives batches of changed file paths
+(created, modified or deleted), so callers can invalidate caches incrementally.
+
+`ReloadBroadcaster` fans change notifications out to Server-Sent Events clients.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+class PollingWatcher(threading.Thread):
+    """
+    Polls the given roots every `interval` seconds and calls callback(paths)
+    with the files that were added, modified or removed since the last poll.
+    """
+
+    def __init__(self, roots, callback, interval=0.5):
+        super().__init__(daemon=True, name="PollingWatcher")
+        self.roots = roots
+        self.callback = callback
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for root in self.roots:
+            for dirpath, _, filenames in os.walk(root):
+                for filename in filenames:
+                    path = os.path.join(dirpath, filename)
+                    try:
+                        stat_result = os.stat(path)
+                    except OSError:
+                        continue
+                    snapshot[path] = (stat_result.st_mtime_ns, stat_result.st_size)
+        return snapshot
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            snapshot = self._scan()
+            changed = [path for path, stamp in snapshot.items() if self._snapshot.get(path) != stamp]
+            changed.extend(path for path in self._snapshot if path not in snapshot)
+            self._snapshot = snapshot
+            if changed:
+                self.callback(changed)
+
+    def stop(self):
+        self._stop_event.set()
+
+class WatchdogWatcher:
+    """
+    inotify/FSEvents-backed watcher. Events are collected for `debounce` seconds so
+    that a burst of writes (e.g. generate_game.py writing several files) is reported
+    as one batch.
+    """
+
+    def __init__(self, roots, callback, debounce=0.2):
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+
+        self.callback = callback
+        self.debounce = debounce
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._timer = None
+        watcher = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory:
+                    return
+                paths = [event.src_path] + ([event.dest_path] if getattr(event, "dest_path", None) else [])
+                watcher._queue(paths)
+
+        self._observer = Observer()
+        for root in roots:
+            os.makedirs(root, exist_ok=True)
+            self._observer.schedule(Handler(), root, recursive=True)
+
+    def _queue(self, paths):
+        with self._lock:
+            self._pending.update(paths)
+            if self._timer is None:
+                self._timer = threading.Timer(self.debounce, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _flush(self):
+        with self._lock:
+            paths, self._pending, self._timer = sorted(self._pending), set(), None
+        if paths:
+            self.callback(paths)
+
+    def start(self):
+        self._observer.start()
+
+    def stop(self):
+        self._observer.stop()
+
+def start_watcher(roots, callback, interval=0.5):
+    """
+    Starts and returns the best available watcher for roots.
+    """
+    try:
+        watcher = WatchdogWatcher(roots, callback)
+        print("[watcher] Using watchdog (native file events)")
+    except ImportError:
+        watcher = PollingWatcher(roots, callback, interval)
+        print(f"[watcher] watchdog not installed; polling every {interval}s")
+    watcher.start()
+    return watcher
+
+class ReloadBroadcaster:
+    """
+    Keeps one queue per connected SSE client and publishes events to all of them.
+    """
+
+    def __init__(self, heartbeat=15.0):
+        self.heartbeat = heartbeat
+        self._clients = set()
+        self._lock = threading.Lock()
+
+    def publish(self, event, data):
+        message = f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            client.put(message)
+
+    def stream(self):
+        """
+        Generator of SSE frames for one client; sends a comment line as a heartbeat
+        so proxies keep the connection open.
+        """
+        client = queue.Queue()
+        with self._lock:
+            self._clients.add(client)
+        try:
+            yield "retry: 1000\n\n"
+            while True:
+                try:
+                    yield client.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    yield f": ping {int(time.time())}\n\n"
+        finally:
+            with self._lock:
+                self._clients.discard(client)
+
+    def __len__(self):
+        return len(self._clients)
@@ -0,0 +1,158 @@
+"""
+Roundtable runs over a durable job queue (see common/job_queue.py).
+
+A run of process_story_with_agents is split into one job per persona step.
+Each job carries the story as it stands; the worker that completes step N
+enqueues step N+1 in the same transaction, so a run survives worker crashes
+and its steps complete in order, each exactly once. Running a step is
+at-least-once: if a lease expires (a worker dies or stalls), another worker
+runs the step's LLM call again, and only the first completion counts. Steps
+of different runs proceed in parallel on however many workers drain the
+queue, on one machine or (with a shared backend registered in
+job_queue.BACKENDS) on several.
+
+Usage:
+  python roundtable_worker.py submit -i story_flat.md -c "Make it funnier" -m 2
+  python roundtable_worker.py work --processes 4 [--drain]
+  python roundtable_worker.py status <run_id> [-o story_output.md]
+"""
+
+import argparse
+import logging
+import multiprocessing as mp
+import sys
+import uuid
+from pathlib import Path
+
+repo_root = Path(__file__).parent.parent
+sys.path.append(str(repo_root))
+from common.job_queue import Worker, open_queue
+from common.structured_log import bind, setup_logging, shutdown_logging
+from story_roundtable import PROCESSING_STEPS, run_persona_step
+
+log = logging.getLogger("roundtable_worker")
+
+QUEUE_NAME = "roundtable_steps"
+DEFAULT_QUEUE_URL = "sqlite:///roundtable_queue.db"
+
+def submit_run(queue, story, command, max_iterations=5, model_name='gemini-2.0-flash-thinking-exp-01-21',
+               temperature=None):
+    """
+    Enqueues the first step of a run; returns the run id.
+    """
+    run_id = uuid.uuid4().hex[:12]
+    queue.put(QUEUE_NAME, {
+        "run_id": run_id,
+        "story": story,
+        "command": command,
+        "iteration": 0,
+        "step": 0,
+        "max_iterations": max_iterations,
+        "model": model_name,
+        "temperature": temperature,
+    }, group_id=run_id)
+    return run_id
+
+def next_step(payload):
+    """
+    The payload position after this step, or None when the run is finished.
+    """
+    step, iteration = payload["step"] + 1, payload["iteration"]
+    if step == len(PROCESSING_STEPS):
+        step, iteration = 0, iteration + 1
+    if iteration == payload["max_iterations"]:
+        return None
+    return step, iteration
+
+async def handle_step(payload, job):
+    with bind(run_id=payload["run_id"]):
+        log.info("iteration %d/%d, step %d/%d (attempt %d)", payload['iteration'] + 1, payload['max_iterations'],
+                 payload['step'] + 1, len(PROCESSING_STEPS), job['attempts'])
+        story = await run_persona_step(payload["story"], payload["step"], payload["command"], payload["iteration"],
+                                       payload["model"], payload["temperature"])
+    position = next_step(payload)
+    result = {"story": story, "final": position is None}
+    if position is None:
+        return result
+    step, iteration = position
+    return result, [(QUEUE_NAME, dict(payload, story=story, step=step, iteration=iteration), payload["run_id"])]
+
+def run_status(queue, run_id):
+    """
+    (status, steps done, total steps, latest story) for a run.
+    """
+    jobs = queue.group(run_id)
+    if not jobs:
+        return None
+    total = jobs[0]["payload"]["max_iterations"] * len(PROCESSING_STEPS)
+    done = [job for job in jobs if job["status"] == "done"]
+    latest = done[-1]["result"]["story"] if done else jobs[0]["payload"]["story"]
+    if any(job["status"] == "failed" for job in jobs):
+        status = "failed"
+    elif done and done[-1]["result"]["final"]:
+        status = "done"
+    else:
+        status = "running" if done or jobs[-1]["status"] == "leased" else "queued"
+    return status, len(done), total, latest
+
+def work(queue_url, lease_seconds, drain, log_level=None, log_file=None):
+    setup_logging(log_level, log_file)
+    worker = Worker(open_queue(queue_url), QUEUE_NAME, handle_step, lease_seconds=lease_seconds)
+    try:
+        with bind(worker=worker.worker_id):
+            worker.run(drain=drain)
+            log.info("finished: %d steps done, %d failed attempts", worker.processed, worker.failed)
+    finally:
+        # Worker processes exit without running atexit hooks.
+        shutdown_logging()
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the story roundtable on queue workers')
+    parser.add_argument('--queue', default=DEFAULT_QUEUE_URL, help='Queue URL (default: %(default)s)')
+    parser.add_argument('--log-level', type=str, default=None, help='Default: $LOG_LEVEL or INFO')
+    parser.add_argument('--log-file', type=str, default=None,
+                        help='JSONL log file shared by all worker processes (default: $LOG_FILE)')
+    commands = parser.add_subparsers(dest='action', required=True)
+
+    submit = commands.add_parser('submit', help='Queue a roundtable run')
+    submit.add_argument('-i', '--input', type=Path, required=True, help='Input story file (MD format)')
+    submit.add_argument('-c', '--command', type=str, required=True, help='Refinement instructions for the AI agents')
+    submit.add_argument('-m', '--max_iterations', type=int, default=5, help='Maximum number of refinement passes')
+    submit.add_argument('--model', type=str, default='gemini-2.0-flash-thinking-exp-01-21')
+    submit.add_argument('--temperature', type=float, default=None)
+
+    worker = commands.add_parser('work', help='Process queued steps')
+    worker.add_argument('--processes', type=int, default=1, help='Worker processes to start on this machine')
+    worker.add_argument('--lease', type=float, default=120.0, help='Lease length in seconds; renewed while a step runs')
+    worker.add_argument('--drain', action='store_true', help='Exit once the queue is empty')
+
+    status = commands.add_parser('status', help='Show a run and optionally save its story')
+    status.add_argument('run_id')
+    status.add_argument('-o', '--output', type=Path, default=None)
+
+    args = parser.parse_args()
+    if args.action == 'submit':
+        if args.max_iterations < 1:
+            raise ValueError("Max iterations must be at least 1")
+        run_id = submit_run(open_queue(args.queue), args.input.read_text(), args.command, args.max_iterations,
+                            args.model, args.temperature)
+        print(run_id)
+    elif args.action == 'work':
+        processes = [mp.Process(target=work, args=(args.queue, args.lease, args.drain, args.log_level, args.log_file))
+                     for _ in range(args.processes)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+    else:
+        info = run_status(open_queue(args.queue), args.run_id)
+        if info is None:
+            raise SystemExit(f"Unknown run {args.run_id}")
+        state, done, total, story = info
+        print(f"{args.run_id}: {state}, {done}/{total} steps done")
+        if args.output:
+            args.output.write_text(story)
+            print(f"Story saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -4,15 +4,18 @@ from pathlib import Path
 import argparse
 import asyncio
 import contextvars
+import difflib
+import logging
 import re
 from datetime import datetime
 from pathlib import Path
-from ai_agent_toolbox import Toolbox, XMLParser
-from ai_agent_toolbox import XMLPromptFormatter
 
 repo_root = Path(__file__).parent.parent
 sys.path.append(str(repo_root))
 from common.inference_engine import llm_call
+from common.structured_log import bind, log_context, new_run_id, setup_logging
+
+log = logging.getLogger("story_refinement")
 
 # Shared components from storygen
 BASE_EXPECTATIONS = """
@@ -43,15 +46,103 @@ USER_INPUT
 # Context-based state management
 current_story_context = contextvars.ContextVar('current_story', default='')
 refinement_notes_context = contextvars.ContextVar('refinement_notes', default=[])
+edit_ops_context = contextvars.ContextVar('edit_ops', default=[])
+
+# Tool-call markup that must never end up in the story text.
+TOOL_XML_RE = re.compile(r"<use_tool>.*?(?:</use_tool>|$)", re.DOTALL)
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.*)$")
+
+def split_paragraphs(story: str) -> list:
+    return [p.strip() for p in re.split(r"\n\s*\n", story) if p.strip()]
+
+def number_paragraphs(paragraphs: list) -> str:
+    return "\n\n".join(f"[P{i+1}] {p}" for i, p in enumerate(paragraphs))
+
+def strip_tool_xml(response: str) -> str:
+    return TOOL_XML_RE.sub("", response).strip()
+
+def _section_range(paragraphs: list, heading: str):
+    """
+    Paragraph indexes (start, end) of the markdown section whose heading matches, up to
+    the next heading of the same or a higher level.
+    """
+    wanted = heading.strip().lstrip("#").strip().lower()
+    for start, paragraph in enumerate(paragraphs):
+        match = HEADING_RE.match(paragraph.splitlines()[0])
+        if match and match.group(2).strip().lower() == wanted:
+            level = len(match.group(1))
+            end = start + 1
+            while end < len(paragraphs):
+                other = HEADING_RE.match(paragraphs[end].splitlines()[0])
+                if other and len(other.group(1)) <= level:
+                    break
+                end += 1
+            return start, end
+    return None
 
-def create_toolbox():
+def apply_edits(paragraphs: list, ops: list) -> tuple[list, list]:
+    """
+    Applies edit operations, all addressed by the paragraph numbers shown to the model
+    (1-based, before any edit):
+        ("replace", n, text)   ("insert", after_n, text)   ("delete", n, None)   ("section", heading, text)
+    Returns (new paragraphs, errors for operations that could not be applied).
+    """
+    slots = [[p] for p in paragraphs]
+    inserts = {}
+    touched = set()
+    errors = []
+    for op, target, text in ops:
+        if op == "section":
+            found = _section_range(paragraphs, target)
+            if found is None:
+                errors.append(f"section '{target}' not found")
+                continue
+            start, end = found
+            if touched & set(range(start, end)):
+                errors.append(f"section '{target}' overlaps an earlier edit")
+                continue
+            slots[start] = split_paragraphs(text)
+            for index in range(start + 1, end):
+                slots[index] = []
+            touched.update(range(start, end))
+            continue
+        try:
+            index = int(str(target).strip().lstrip("Pp[").rstrip("]"))
+        except ValueError:
+            errors.append(f"{op}: bad paragraph number {target!r}")
+            continue
+        if op == "insert" and 0 <= index <= len(paragraphs):
+            inserts.setdefault(index, []).extend(split_paragraphs(text))
+        elif op in ("replace", "delete") and 1 <= index <= len(paragraphs):
+            if index - 1 in touched:
+                errors.append(f"{op}: paragraph {index} already edited")
+                continue
+            touched.add(index - 1)
+            slots[index - 1] = split_paragraphs(text) if op == "replace" else []
+        else:
+            errors.append(f"{op}: paragraph {index} out of range")
+    result = list(inserts.get(0, []))
+    for index, slot in enumerate(slots, start=1):
+        result.extend(slot)
+        result.extend(inserts.get(index, []))
+    return result, errors
+
+def _record_op(op, target, text=None):
+    ops = edit_ops_context.get().copy()
+    ops.append((op, target, text))
+    edit_ops_context.set(ops)
+    return f"{op} {target} recorded"
+
+def create_toolbox(mode: str = "full"):
+    from ai_agent_toolbox import Toolbox
     toolbox = Toolbox()
     
     def add_notes(note: str):
         notes = refinement_notes_context.get().copy()
         notes.append(note)
         refinement_notes_context.set(notes)
-        print("NOTE", note)
+        log.info("note added (%d chars)", len(note))
+        log.debug("note", extra={"payload": note})
         return note  # Return actual note content instead of confirmation
 
     toolbox.add_tool(
@@ -65,18 +156,57 @@ def create_toolbox():
         },
         description="Adds notes to the refinement log. Use this to provide analysis of changes and suggest further improvements in each iteration."
     )
+
+    if mode == "edit":
+        paragraph_arg = {"type": "string", "description": "Paragraph number from the draft, e.g. 3 for [P3]."}
+        text_arg = {"type": "string", "description": "New text (one or more paragraphs)."}
+        toolbox.add_tool(
+            name="replace_paragraph",
+            fn=lambda paragraph, text: _record_op("replace", paragraph, text),
+            args={"paragraph": paragraph_arg, "text": text_arg},
+            description="Replaces one numbered paragraph of the draft."
+        )
+        toolbox.add_tool(
+            name="insert_paragraph",
+            fn=lambda after, text: _record_op("insert", after, text),
+            args={"after": {"type": "string", "description": "Insert after this paragraph number (0 = at the start)."},
+                  "text": text_arg},
+            description="Inserts new paragraphs after a numbered paragraph."
+        )
+        toolbox.add_tool(
+            name="delete_paragraph",
+            fn=lambda paragraph: _record_op("delete", paragraph),
+            args={"paragraph": paragraph_arg},
+            description="Deletes one numbered paragraph."
+        )
+        toolbox.add_tool(
+            name="replace_section",
+            fn=lambda heading, text: _record_op("section", heading, text),
+            args={"heading": {"type": "string", "description": "Markdown heading text of the section."},
+                  "text": {"type": "string", "description": "New section content, including its heading."}},
+            description="Replaces a whole markdown section, from its heading up to the next heading of the same level."
+        )
     return toolbox
 
 async def polish_story(notes: str, story: str, model_name: str, user_input: str, current_iteration: int,
-                      max_iterations: int, previous_notes: list = None) -> tuple[str, str]:
-    # Debug logging for input tracking
-    print(f"\n[DEBUG] Starting iteration {current_iteration+1}")
-    print(f"[DEBUG] Notes length: {len(notes)}, Story length: {len(story)}")
+                      max_iterations: int, previous_notes: list = None, temperature: float = 0.7,
+                      mode: str = "full") -> tuple[str, str]:
+    with bind(iteration=current_iteration + 1, temperature=temperature):
+        return await _polish_story(notes, story, model_name, user_input, current_iteration, max_iterations,
+                                   previous_notes, temperature, mode)
+
+async def _polish_story(notes, story, model_name, user_input, current_iteration, max_iterations, previous_notes,
+                        temperature, mode):
+    log.debug("starting iteration: notes %d chars, story %d chars", len(notes), len(story))
     
+    from ai_agent_toolbox import XMLParser, XMLPromptFormatter
     parser = XMLParser(tag="use_tool") 
     formatter = XMLPromptFormatter(tag="use_tool") 
-    toolbox = create_toolbox() # Create toolbox for each iteration to reset notes
+    paragraphs = split_paragraphs(story) if story != "Nothing yet" else []
+    edit_mode = mode == "edit" and bool(paragraphs)  # There is nothing to edit before the first draft
+    toolbox = create_toolbox("edit" if edit_mode else "full") # Create toolbox for each iteration to reset notes
     refinement_notes_context.set([])  # Reset notes for this iteration
+    edit_ops_context.set([])
     current_story_context.set(story)  # Set story in context
     
     tool_prompt = formatter.usage_prompt(toolbox)
@@ -91,13 +221,21 @@ async def polish_story(notes: str, story: str, model_name: str, user_input: str,
         "\n\n[WORKING DRAFT] Modify THIS story version:",
         f"{story}"
     ]
+    if edit_mode:
+        prompt[-2:] = [
+            "\n\n[WORKING DRAFT] Numbered paragraphs of the current version:",
+            number_paragraphs(paragraphs),
+            "\n\n[EDITING] Do not repeat the story. Change it only through replace_paragraph, "
+            "insert_paragraph, delete_paragraph and replace_section, addressing paragraphs by the numbers above. "
+            "Only if the draft needs a complete rewrite, reply with the full new story instead.",
+        ]
 
     if previous_notes:
         prompt.append("\n\n[REFINEMENT HISTORY]")
         prompt.extend(f"- Iter {i+1}: {n[:200]}..." for i, n in enumerate(previous_notes))
 
     full_prompt = "\n".join(prompt)
-    print(f"[PROMPT STRUCTURE]\nInstruction: {user_input}\nChars: {len(prompt)}")
+    log.debug("prompt for instruction %r", user_input, extra={"payload": full_prompt})
     
     response = await llm_call(
         system=system_prompt,
@@ -105,60 +243,146 @@ async def polish_story(notes: str, story: str, model_name: str, user_input: str,
             "role": "user",
             "content": full_prompt + "\n\n" + tool_prompt
         }],
-        model_name=model_name
+        model_name=model_name,
+        temperature=temperature
     )
 
-    print(f"[DEBUG] Response length: {len(response)} chars")
-    print("RESPONSE", response)
+    log.debug("response", extra={"payload": response})
 
-    story_content = response.strip() # story is the full response now, tool call will be parsed out
-    notes_added = []
     for event in parser.parse(response):
         if event.is_tool_call:
-            notes_added.append(toolbox.use(event))  # Preserve complete notes as single entries
+            toolbox.use(event)  # Notes and edit operations are collected in their context vars
+    notes_added = refinement_notes_context.get()  # Preserve complete notes as single entries
     iteration_notes = " ".join(notes_added) if notes_added else ""
+
+    ops = edit_ops_context.get()
+    rewrite = strip_tool_xml(response)  # the full response minus tool calls
+    if edit_mode and ops:
+        new_paragraphs, errors = apply_edits(paragraphs, ops)
+        for error in errors:
+            log.warning("edit skipped: %s", error)
+        log.info("applied %d/%d edit operations", len(ops) - len(errors), len(ops))
+        story_content = "\n\n".join(new_paragraphs)
+    elif edit_mode and len(rewrite) < 0.5 * len(story):
+        # Neither edits nor a full rewrite: keep the draft.
+        log.info("no edit operations; draft unchanged")
+        story_content = story
+    else:
+        story_content = rewrite
     
-    print(f"[DEBUG] Iteration complete. New story length: {len(story_content)}")
+    log.info("iteration complete, story is %d chars", len(story_content))
 
     return story_content, iteration_notes
 
-def refine_story(input_path: Path, output_path: Path, instruction: str, max_iterations: int = 3):
+# Salient words: long enough to carry meaning, used to check notes coverage.
+WORD_RE = re.compile(r"[A-Za-z][A-Za-z'-]{4,}")
+LEFTOVER_RE = re.compile(r"<\/?use_tool|\[(?:WORKING DRAFT|INSTRUCTIONS|REFINEMENT HISTORY)\]")
+# Words of each draft compared for the change score; a word-level diff of 2000 words takes ~30ms.
+CHANGE_WORDS = 2000
+
+def score_draft(draft: str, previous: str, notes: str) -> tuple[float, dict]:
+    """
+    Cheap local score for picking the best of several drafts (higher is better), from:
+      - length: close to the previous draft (or the notes, on the first pass)
+      - structure: several paragraphs, no leftover prompt/tool markup
+      - coverage: share of the notes' salient words that appear in the draft
+      - change: some edits against the previous draft, but not a rewrite from scratch
+    """
+    reference = previous if previous and previous != "Nothing yet" else notes
+    ratio = len(draft) / max(len(reference), 1)
+    length = max(0.0, 1.0 - abs(ratio - 1.0))
+    paragraphs = [p for p in re.split(r"\n\s*\n", draft) if p.strip()]
+    structure = min(len(paragraphs), 10) / 10 - (0.5 if LEFTOVER_RE.search(draft) else 0.0)
+    note_words = {w.lower() for w in WORD_RE.findall(notes)}
+    draft_words = {w.lower() for w in WORD_RE.findall(draft)}
+    coverage = len(note_words & draft_words) / len(note_words) if note_words else 1.0
+    if previous and previous != "Nothing yet":
+        # Word-level diff, so reordering counts as change; a prefix keeps it cheap on long stories.
+        changed = 1.0 - difflib.SequenceMatcher(None, previous.split()[:CHANGE_WORDS], draft.split()[:CHANGE_WORDS],
+                                                autojunk=False).ratio()
+        change = 1.0 - min(abs(changed - 0.2) / 0.2, 1.0)
+    else:
+        change = 1.0
+    parts = {"length": length, "structure": structure, "coverage": coverage, "change": change}
+    return sum(parts.values()), parts
+
+async def polish_best_of(notes: str, story: str, model_name: str, user_input: str, current_iteration: int,
+                         max_iterations: int, previous_notes: list = None,
+                         temperatures: list = (0.3, 0.7, 1.0), mode: str = "full") -> tuple[str, str]:
+    """
+    Runs polish_story once per temperature concurrently and keeps the draft with the best score_draft().
+    """
+    results = await asyncio.gather(*(
+        polish_story(notes, story, model_name, user_input, current_iteration, max_iterations,
+                     previous_notes=previous_notes, temperature=temperature, mode=mode)
+        for temperature in temperatures
+    ), return_exceptions=True)
+    scored = []
+    for temperature, result in zip(temperatures, results):
+        if isinstance(result, BaseException):
+            log.warning("draft at temperature %s failed: %s", temperature, result)
+            continue
+        score, parts = score_draft(result[0], story, notes)
+        log.info("draft at temperature %s: score %.2f %s", temperature, score,
+                 " ".join(f"{name}={value:.2f}" for name, value in parts.items()))
+        scored.append((score, result))
+    if not scored:
+        raise RuntimeError("All drafts failed")
+    return max(scored, key=lambda item: item[0])[1]
+
+async def refine_story_async(input_path: Path, output_path: Path, instruction: str, max_iterations: int = 3,
+                             model_name: str = None, temperatures: list = None, mode: str = "full"):
     with open(input_path, encoding='utf-8') as f:
         original_story = f.read()
-    story = "Nothing yet"
+    with bind(run_id=log_context.get().get("run_id") or new_run_id()):
+        story = "Nothing yet"
 
-    change_log = []  # Track refinement notes between iterations
+        change_log = []  # Track refinement notes between iterations
 
-    print(f"\n[INITIAL INPUT] Story length: {len(story)} chars")
+        log.info("refining %d chars of input over %d iterations", len(original_story), max_iterations)
 
-    for i in range(max_iterations):
-        print(f"Refinement iteration {i+1}/{max_iterations}")
-        refined_story, note = asyncio.run(
-            polish_story(  # Toolbox now properly captures full notes
+        for i in range(max_iterations):
+            log.info("refinement iteration %d/%d", i + 1, max_iterations)
+            step_args = (
                 original_story,  # Pass accumulated notes
                 story,
-                args.model, # Pass model here
+                model_name, # Pass model here
                 instruction,
                 i,
                 max_iterations,
-                previous_notes=change_log if i > 0 else None,
             )
-        )
-        story = refined_story  # Update story for next iteration
-        change_log.append(note)
-
-        # Save intermediate with notes
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        Path("working").mkdir(parents=True, exist_ok=True)
-        intermediate_file = f"working/{output_path.stem}_iter{i+1}_{timestamp}.md"  # Unified note format
-        with open(intermediate_file, "w") as f:
-            f.write(f"<!-- ITERATION {i+1} NOTES:\n{note}\n-->\n\n{story}")
-
-    with open(output_path, "w") as f:
-        f.write(story+f"\n\n<!-- FINAL REFINEMENT LOG:\n" + "\n".join(
-            [f"Iteration {i+1}: {note}" for i, note in enumerate(change_log)]
-        ) + "\n-->")
-    print(f"Final refined story saved to {output_path}")
+            previous_notes = change_log if i > 0 else None
+            if temperatures and len(temperatures) > 1:
+                refined_story, note = await polish_best_of(*step_args, previous_notes=previous_notes,
+                                                           temperatures=temperatures, mode=mode)
+            else:
+                refined_story, note = await polish_story(  # Toolbox now properly captures full notes
+                    *step_args,
+                    previous_notes=previous_notes,
+                    temperature=temperatures[0] if temperatures else 0.7,
+                    mode=mode,
+                )
+            story = refined_story  # Update story for next iteration
+            change_log.append(note)
+
+            # Save intermediate with notes
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            Path("working").mkdir(parents=True, exist_ok=True)
+            intermediate_file = f"working/{output_path.stem}_iter{i+1}_{timestamp}.md"  # Unified note format
+            with open(intermediate_file, "w") as f:
+                f.write(f"<!-- ITERATION {i+1} NOTES:\n{note}\n-->\n\n{story}")
+
+        with open(output_path, "w") as f:
+            f.write(story+f"\n\n<!-- FINAL REFINEMENT LOG:\n" + "\n".join(
+                [f"Iteration {i+1}: {note}" for i, note in enumerate(change_log)]
+            ) + "\n-->")
+        log.info("Final refined story saved to %s", output_path)
+
+def refine_story(input_path: Path, output_path: Path, instruction: str, max_iterations: int = 3,
+                 model_name: str = None, temperatures: list = None, mode: str = "full"):
+    # One event loop for every iteration (and every concurrent draft).
+    asyncio.run(refine_story_async(input_path, output_path, instruction, max_iterations, model_name, temperatures,
+                                   mode))
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Standalone story refinement pipeline')
@@ -173,12 +397,31 @@ if __name__ == "__main__":
                         help='Number of refinement passes (default: 3)')
     parser.add_argument('--model', type=str, default='gemini-2.0-flash-thinking-exp-01-21',
                         help='LLM model to use for inference')
+    parser.add_argument('--drafts', type=int, default=1,
+                        help='Concurrent drafts per iteration; the best one by a local score is kept (default: 1)')
+    parser.add_argument('--mode', choices=['full', 'edit'], default='full',
+                        help='full: the model rewrites the whole story each pass; edit: it sends paragraph/section '
+                             'edit operations that are applied locally (falls back to a full rewrite)')
+    parser.add_argument('--temperatures', type=str, default=None,
+                        help='Comma-separated draft temperatures (default: spread between 0.3 and 1.1)')
+    parser.add_argument('--log-level', type=str, default=None,
+                        help='DEBUG shows prompt/response previews (default: $LOG_LEVEL or INFO)')
+    parser.add_argument('--log-file', type=str, default=None,
+                        help='Also write JSONL logs with run/iteration/temperature fields here (default: $LOG_FILE)')
 
     args = parser.parse_args()
+    setup_logging(args.log_level, args.log_file)
 
     if not args.input.exists():
         raise FileNotFoundError(f"Input file {args.input} not found")
     if args.max_iterations < 1:
         raise ValueError("Max iterations must be at least 1")
 
-    refine_story(args.input, args.output, args.command, args.max_iterations)
+    if args.temperatures:
+        temperatures = [float(t) for t in args.temperatures.split(",")]
+    elif args.drafts > 1:
+        temperatures = [round(0.3 + 0.8 * k / (args.drafts - 1), 2) for k in range(args.drafts)]
+    else:
+        temperatures = None
+
+    refine_story(args.input, args.output, args.command, args.max_iterations, args.model, temperatures, args.mode)
@@ -1,5 +1,4 @@
 import re
-from ai_agent_toolbox import Toolbox, XMLParser, XMLPromptFormatter
 from pathlib import Path
 import sys
 import json
@@ -7,10 +6,14 @@ import asyncio
 import argparse
 from datetime import datetime
 import contextvars
+import logging
 
 repo_root = Path(__file__).parent.parent
 sys.path.append(str(repo_root))
 from common.inference_engine import llm_call
+from common.structured_log import bind, log_context, new_run_id, setup_logging
+
+log = logging.getLogger("story_roundtable")
 
 # Shared prompt components
 BASE_EXPECTATIONS = """
@@ -29,6 +32,7 @@ Identify the section you will focus on and explain your reasoning. Prioritize se
 current_story_context = contextvars.ContextVar('current_story', default='')
 
 def parse_sections(content: str) -> list[dict]:
+    from ai_agent_toolbox import XMLParser
     sections = {}
     parser = XMLParser("story")
     events = parser.parse(content)
@@ -43,18 +47,14 @@ def parse_sections(content: str) -> list[dict]:
     return sections
 
 def create_toolbox():
+    from ai_agent_toolbox import Toolbox
     toolbox = Toolbox() # Initialize toolbox here so current_story is accessible in tool function
 
     def replace_section(section_id: str, new_content: str):        
         current_story = current_story_context.get()
         sections = parse_sections(current_story)
-        print("================")
-        print("REPLACING SECTION")
-        print("================")
-        print(section_id)
-        print(new_content)
-        print("================")
-        print("_____", sections)
+        log.info("replacing section %s (%d sections)", section_id, len(sections))
+        log.debug("new section content", extra={"payload": new_content})
 
         sections[section_id] = new_content
         updated_story = ""
@@ -181,64 +181,76 @@ USER_INPUT
 """
 }
 
-async def process_story_with_agents(story: str, user_input: str, max_iterations: int = 5, model_name: str = 'gemini-2.0-flash-thinking-exp-01-21', temperature: float = None) -> str:
-    parser = XMLParser("use_tool")
-    formatter = XMLPromptFormatter(tag="use_tool")
-    toolbox = create_toolbox()
-    global current_story
-
-    processing_steps = [
-        # Revised processing order - core narrative elements first, clarity checks more frequent
-        (STORY_CRAFTER, "structure"),  # Initial structural analysis
-        (WORLD_BUILDER, "setting"),    # Establish world fundamentals
-        (STORY_CRAFTER, "pacing"),     # Secondary pacing pass after world details
-        (CLARITY_EDITOR, "prose"),     # Initial clarity sweep
-        (TWIST_MASTER, "twist"),       # Plot enhancements
-        (CLARITY_EDITOR, "flow"),      # Final clarity check after twists
-        (HUMOR_SPECIALIST, "dialogue") # Humor as final layer
-    ]
-
+PROCESSING_STEPS = [
+    # Revised processing order - core narrative elements first, clarity checks more frequent
+    (STORY_CRAFTER, "structure"),  # Initial structural analysis
+    (WORLD_BUILDER, "setting"),    # Establish world fundamentals
+    (STORY_CRAFTER, "pacing"),     # Secondary pacing pass after world details
+    (CLARITY_EDITOR, "prose"),     # Initial clarity sweep
+    (TWIST_MASTER, "twist"),       # Plot enhancements
+    (CLARITY_EDITOR, "flow"),      # Final clarity check after twists
+    (HUMOR_SPECIALIST, "dialogue") # Humor as final layer
+]
+
+def create_step_tools():
+    from ai_agent_toolbox import XMLParser, XMLPromptFormatter
+    return XMLParser("use_tool"), XMLPromptFormatter(tag="use_tool"), create_toolbox()
+
+async def run_persona_step(story: str, step: int, user_input: str, iteration: int = 0,
+                           model_name: str = 'gemini-2.0-flash-thinking-exp-01-21', temperature: float = None,
+                           tools=None) -> str:
+    """
+    One persona's pass (PROCESSING_STEPS[step]) over the story; returns the updated story.
+    tools is (parser, formatter, toolbox) from create_step_tools(), created if omitted.
+    """
+    parser, formatter, toolbox = tools or create_step_tools()
+    persona, section = PROCESSING_STEPS[step]
+    with bind(persona=persona['name'], iteration=iteration, step=step):
+        return await _run_persona_step(story, persona, section, user_input, iteration, model_name, temperature,
+                                       parser, formatter, toolbox)
+
+async def _run_persona_step(story, persona, section, user_input, iteration, model_name, temperature,
+                            parser, formatter, toolbox):
     current_story_context.set(story)
-    for i in range(max_iterations):
-        for persona, section in processing_steps:
-            messages = [{
-                "role": "user",
-                "content": (
-                    f"Review and improve this story section focusing on {section}, drawing upon your expertise as {persona['role']}. "
-                    f"Consider how to make the story more accessible and engaging for a reader new to this world. "
-                    f"Current story state:\n\n{current_story_context.get()}\n" +
-                    formatter.usage_prompt(toolbox)
-                )
-            }]
-            #print(messages[0]["content"],"__________")
-            print(f"Agent: {persona['name']}, Focusing on: {section}")
-            system = persona["system"].replace("USER_INPUT", user_input)
-
-            #print("SYSTEM", system)
-            print("____")
-            #print("USER", messages[0]["content"])
-            response = await llm_call(
-                system=system,
-                messages=messages,
-                model_name=model_name,
-                temperature=temperature
-            )
-            print(f"Response from {persona['name']}:\n{response}")
-
-            for event in parser.parse(response):
-                if event.is_tool_call:
-                    toolbox.use(event)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            Path("working").mkdir(parents=True, exist_ok=True)
-            filename = f"working/{persona['name'].replace(' ', '_')}_iter{i}_{timestamp}.md"
-            print("CURRENT STORY")
-            print(current_story_context.get())
-            print("/CURRENT STORY")
-            with open(filename, "w") as f:
-                f.write(current_story_context.get())
-
+    messages = [{
+        "role": "user",
+        "content": (
+            f"Review and improve this story section focusing on {section}, drawing upon your expertise as {persona['role']}. "
+            f"Consider how to make the story more accessible and engaging for a reader new to this world. "
+            f"Current story state:\n\n{current_story_context.get()}\n" +
+            formatter.usage_prompt(toolbox)
+        )
+    }]
+    log.info("%s focusing on %s", persona['name'], section)
+    system = persona["system"].replace("USER_INPUT", user_input)
+    log.debug("prompt", extra={"payload": messages[0]["content"]})
+    response = await llm_call(
+        system=system,
+        messages=messages,
+        model_name=model_name,
+        temperature=temperature
+    )
+    log.debug("response from %s", persona['name'], extra={"payload": response})
+
+    for event in parser.parse(response):
+        if event.is_tool_call:
+            toolbox.use(event)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    Path("working").mkdir(parents=True, exist_ok=True)
+    filename = f"working/{persona['name'].replace(' ', '_')}_iter{iteration}_{timestamp}.md"
+    log.info("step done, story is %d chars; saved to %s", len(current_story_context.get()), filename)
+    with open(filename, "w") as f:
+        f.write(current_story_context.get())
     return current_story_context.get()
 
+async def process_story_with_agents(story: str, user_input: str, max_iterations: int = 5, model_name: str = 'gemini-2.0-flash-thinking-exp-01-21', temperature: float = None) -> str:
+    tools = create_step_tools()
+    with bind(run_id=log_context.get().get("run_id") or new_run_id()):
+        for i in range(max_iterations):
+            for step in range(len(PROCESSING_STEPS)):
+                story = await run_persona_step(story, step, user_input, i, model_name, temperature, tools)
+    return story
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='AI-powered story refinement roundtable')
     parser.add_argument('-i', '--input', type=Path, required=True,
@@ -253,8 +265,13 @@ if __name__ == "__main__":
                         help='LLM model to use for inference')
     parser.add_argument('--temperature', type=float, default=None,
                         help='Temperature parameter for LLM generation (0.0-1.0)')
+    parser.add_argument('--log-level', type=str, default=None,
+                        help='DEBUG shows prompt/response previews (default: $LOG_LEVEL or INFO)')
+    parser.add_argument('--log-file', type=str, default=None,
+                        help='Also write JSONL logs with run/persona/iteration fields here (default: $LOG_FILE)')
 
     args = parser.parse_args()
+    setup_logging(args.log_level, args.log_file)
 
     if not args.input.exists():
         raise FileNotFoundError(f"Input file {args.input} not found")
@@ -269,4 +286,4 @@ if __name__ == "__main__":
     with open(args.output, "w") as f:
         f.write(final_story)
 
-    print(f"Story generation complete. Output saved to {args.output}")
+    log.info("Story generation complete. Output saved to %s", args.output)
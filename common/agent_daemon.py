@@ -0,0 +1,572 @@
+#!/usr/bin/env python3
+"""
+Long-running agent daemon with an HTTP job API.
+
+Hosts the story roundtable, story refinement and game generation pipelines in
+one process, so jobs skip interpreter startup and imports and reuse warm state:
+
+  - pipeline modules (with their prompts and compiled regexes) are imported once
+  - InferenceEngine reuses one provider client per event loop (connection pools stay open)
+  - llm_call answers repeated identical temperature-0 requests from an LRU response cache
+  - generate_game reuses its OpenAI client per base URL
+
+Jobs run as tasks on one background event loop (generate_game, which is
+synchronous, runs in a worker thread). Everything a job prints or logs is
+routed to that job's event log (prints through a contextvar, log records
+through the job_id bound in common/structured_log.py) and streamed over SSE.
+
+Scheduling is fair across users: each free slot goes to the next user in
+round-robin order who has a queued job, and no user runs more than
+`--per-user` jobs at once, so one user's burst cannot starve the others.
+
+API:
+  POST /jobs               {"pipeline": "roundtable"|"refinement"|"game", "user": "...", "params": {...}}
+  GET  /jobs[?user=...]    list jobs
+  GET  /jobs/<id>          status and result
+  GET  /jobs/<id>/events   SSE: "status", "log" ({"line": ...}) and a final "done" event
+  GET  /health             job counts, loaded pipelines, response cache stats
+
+Pipeline params:
+  roundtable   story (or input path), command; optional max_iterations, model, temperature, output
+  refinement   story (or input path), command; optional max_iterations, model, temperatures, mode, output
+  game         name, description
+
+Files: `input` is resolved under --input-dir (input paths are refused unless it
+is set), `output` under --jobs-dir; paths that resolve outside them are
+rejected. Games are written to ai_arcade/generated/<name>, and names may not
+contain path separators or "..". With --token (or $AGENT_DAEMON_TOKEN), every
+request must send "Authorization: Bearer <token>".
+
+Usage:
+  python common/agent_daemon.py --port 8700 --slots 4 --per-user 1 --input-dir stories
+  curl -X POST localhost:8700/jobs -d '{"pipeline": "roundtable", "user": "ana", "params": {"input": "story.md", "command": "Make it funnier"}}'
+  curl -N localhost:8700/jobs/<id>/events
+"""
+
+import argparse
+import asyncio
+import contextvars
+import hmac
+import importlib
+import io
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(REPO_ROOT))
+sys.path.append(str(REPO_ROOT / "ai_storytelling_roundtable"))
+sys.path.append(str(REPO_ROOT / "ai_arcade"))
+
+from common import inference_engine
+from common.structured_log import ConsoleFormatter, bind, setup_logging
+
+HEARTBEAT_SECONDS = 15.0
+GAME_ROOT = REPO_ROOT / "ai_arcade"
+GAME_NAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+
+current_job = contextvars.ContextVar("current_job", default=None)
+
+class Job:
+    """
+    One submitted pipeline run and its event log. Events are appended on the
+    daemon's event loop and read by HTTP handler threads, so they are guarded by
+    a Condition that SSE readers wait on.
+    """
+
+    def __init__(self, pipeline, user, params):
+        self.id = uuid.uuid4().hex[:12]
+        self.pipeline = pipeline
+        self.user = user
+        self.params = params
+        self.status = "queued"
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.error = None
+        self.events = []
+        self.changed = threading.Condition()
+        self._partial = ""
+
+    @property
+    def done(self):
+        return self.status in ("done", "failed")
+
+    def emit(self, event, data):
+        with self.changed:
+            self.events.append((event, data))
+            self.changed.notify_all()
+
+    def set_status(self, status):
+        self.status = status
+        self.emit("status", {"status": status})
+
+    def write(self, text):
+        """
+        Receives the job's stdout and log lines; every complete line becomes a "log" event.
+        """
+        with self.changed:
+            self._partial += text
+            *lines, self._partial = self._partial.split("\n")
+            for line in lines:
+                self.emit("log", {"line": line})
+
+    def flush_output(self):
+        if self._partial:
+            self.emit("log", {"line": self._partial})
+            self._partial = ""
+
+    def to_dict(self, full=True):
+        info = {
+            "id": self.id,
+            "pipeline": self.pipeline,
+            "user": self.user,
+            "status": self.status,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "log_lines": sum(1 for event, _ in self.events if event == "log"),
+        }
+        if full:
+            info["params"] = self.params
+            info["result"] = self.result
+            info["error"] = self.error
+        return info
+
+class JobOutputRouter(io.TextIOBase):
+    """
+    Stand-in for sys.stdout: text printed while a job is the current one goes to
+    that job's log (and optionally to the real stream, prefixed with the job id).
+    """
+
+    def __init__(self, stream, echo=False):
+        self.stream = stream
+        self.echo = echo
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        job = current_job.get()
+        if job is None:
+            return self.stream.write(text)
+        job.write(text)
+        if self.echo:
+            self.stream.write("".join(f"[{job.id}] {line}\n" for line in text.splitlines() if line))
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+class JobLogHandler(logging.Handler):
+    """
+    Runs on the logging listener thread; sends records bound to a job_id to that job's log.
+    """
+
+    def __init__(self, daemon):
+        super().__init__()
+        self.daemon = daemon
+        self.setFormatter(ConsoleFormatter())
+
+    def emit(self, record):
+        job = self.daemon.get(getattr(record, "context", {}).get("job_id"))
+        if job is not None:
+            job.write(self.format(record) + "\n")
+
+class FairScheduler:
+    """
+    Fair across users: each free slot goes to the user with a queued job who has
+    the fewest jobs running, ties going to whoever was served least recently;
+    users at the per-user limit wait. Runs on the daemon's event loop.
+    """
+
+    def __init__(self, slots=2, per_user=1):
+        self.slots = slots
+        self.per_user = per_user
+        self.queues = {}
+        self.running = Counter()
+        self.last_served = {}
+        self.served = 0
+        self.active = 0
+        self._wakeup = asyncio.Event()
+
+    def submit(self, job):
+        self.queues.setdefault(job.user, deque()).append(job)
+        self._wakeup.set()
+
+    def queued(self):
+        return sum(len(queue) for queue in self.queues.values())
+
+    def _next(self):
+        if self.active >= self.slots:
+            return None
+        eligible = [user for user in self.queues if not self.per_user or self.running[user] < self.per_user]
+        if not eligible:
+            return None
+        user = min(eligible, key=lambda user: (self.running[user], self.last_served.get(user, -1)))
+        queue = self.queues[user]
+        job = queue.popleft()
+        if not queue:
+            del self.queues[user]
+        self.served += 1
+        self.last_served[user] = self.served
+        return job
+
+    def _finished(self, job):
+        self.active -= 1
+        self.running[job.user] -= 1
+        self._wakeup.set()
+
+    async def run(self, execute):
+        while True:
+            job = self._next()
+            if job is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            self.active += 1
+            self.running[job.user] += 1
+            task = asyncio.create_task(execute(job))
+            task.add_done_callback(lambda _, job=job: self._finished(job))
+
+def resolve_under(base, path):
+    """
+    Resolves path relative to base; raises ValueError if the result lies outside base.
+    """
+    base = Path(base).resolve()
+    resolved = (base / path).resolve()
+    if resolved != base and base not in resolved.parents:
+        raise ValueError(f"{path} is outside {base}")
+    return resolved
+
+def check_game_name(name):
+    if ".." in name or not GAME_NAME_RE.match(name):
+        raise ValueError(f"invalid game name {name!r}: use letters, digits, '.', '_' and '-' only")
+    return name
+
+def _story_input(daemon, params):
+    if "story" in params:
+        return params["story"]
+    return daemon.input_path(params["input"]).read_text(encoding="utf-8")
+
+async def run_roundtable(daemon, job, params):
+    story_roundtable = daemon.pipeline_module("roundtable")
+    story = await story_roundtable.process_story_with_agents(
+        _story_input(daemon, params), params["command"], int(params.get("max_iterations", 5)),
+        params.get("model", "gemini-2.0-flash-thinking-exp-01-21"), params.get("temperature"),
+    )
+    output = daemon.output_path(job, params)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(story, encoding="utf-8")
+    return {"output": str(output), "story": story}
+
+async def run_refinement(daemon, job, params):
+    story_refinement = daemon.pipeline_module("refinement")
+    daemon.jobs_dir.mkdir(parents=True, exist_ok=True)
+    if "story" in params:
+        input_path = daemon.jobs_dir / f"{job.id}.input.md"
+        input_path.write_text(params["story"], encoding="utf-8")
+    else:
+        input_path = daemon.input_path(params["input"])
+    output = daemon.output_path(job, params)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    await story_refinement.refine_story_async(
+        input_path, output, params["command"], int(params.get("max_iterations", 3)),
+        params.get("model", "gemini-2.0-flash-thinking-exp-01-21"), params.get("temperatures"),
+        params.get("mode", "full"),
+    )
+    return {"output": str(output), "story": output.read_text(encoding="utf-8")}
+
+async def run_game(daemon, job, params):
+    generate_game = daemon.pipeline_module("game")
+    name = check_game_name(params["name"])
+    # Synchronous (blocking OpenAI calls); to_thread copies the context, so its prints still reach the job.
+    await asyncio.to_thread(generate_game.generate_game, name, params["description"], str(GAME_ROOT))
+    return {"output": os.path.join(GAME_ROOT, "generated", name)}
+
+# name -> (module, runner, required params; a list inside means "one of")
+PIPELINES = {
+    "roundtable": ("story_roundtable", run_roundtable, [["story", "input"], "command"]),
+    "refinement": ("story_refinement", run_refinement, [["story", "input"], "command"]),
+    "game": ("generate_game", run_game, ["name", "description"]),
+}
+
+def missing_params(pipeline, params):
+    missing = []
+    for required in PIPELINES[pipeline][2]:
+        options = required if isinstance(required, list) else [required]
+        if not any(params.get(option) for option in options):
+            missing.append(" or ".join(options))
+    return missing
+
+class AgentDaemon:
+    """
+    Owns the job table, the scheduler and the background event loop that runs jobs.
+    """
+
+    def __init__(self, slots=2, per_user=1, jobs_dir="daemon_jobs", response_cache=512, echo=False, keep_jobs=500,
+                 input_dir=None, token=None):
+        self.slots = slots
+        self.per_user = per_user
+        self.jobs_dir = Path(jobs_dir)
+        self.input_dir = Path(input_dir) if input_dir else None
+        self.token = token
+        self.response_cache_size = response_cache
+        self.echo = echo
+        self.keep_jobs = keep_jobs
+        self.jobs = {}
+        self.jobs_lock = threading.Lock()
+        self.modules = {}
+        self.loop = None
+        self.scheduler = None
+        self.response_cache = None
+
+    def input_path(self, path):
+        if self.input_dir is None:
+            raise ValueError("input paths are disabled; send the story inline or start the daemon with --input-dir")
+        return resolve_under(self.input_dir, path)
+
+    def output_path(self, job, params):
+        return resolve_under(self.jobs_dir, params.get("output") or f"{job.id}.md")
+
+    def check_params(self, pipeline, params):
+        """
+        Raises ValueError if params name files outside the daemon's directories.
+        """
+        if "root" in params:
+            raise ValueError("root is not accepted; games are written under ai_arcade/generated")
+        if params.get("input") and "story" not in params:
+            self.input_path(params["input"])
+        if params.get("output"):
+            resolve_under(self.jobs_dir, params["output"])
+        if pipeline == "game":
+            check_game_name(str(params["name"]))
+
+    def pipeline_module(self, pipeline):
+        if pipeline not in self.modules:
+            self.modules[pipeline] = importlib.import_module(PIPELINES[pipeline][0])
+        return self.modules[pipeline]
+
+    def preload(self):
+        for pipeline in PIPELINES:
+            try:
+                self.pipeline_module(pipeline)
+            except ImportError as e:
+                print(f"[daemon] {pipeline} pipeline unavailable until its dependencies are installed: {e}")
+
+    def start(self):
+        """
+        Imports the pipelines, enables shared clients and the response cache, routes
+        stdout per job and starts the event loop thread.
+        """
+        self.preload()
+        inference_engine.use_shared_clients()
+        self.response_cache = inference_engine.use_response_cache(self.response_cache_size)
+        setup_logging(console=self.echo, handlers=[JobLogHandler(self)])
+        sys.stdout = JobOutputRouter(sys.stdout, self.echo)
+        ready = threading.Event()
+
+        def run_loop():
+            self.loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.loop)
+            self.scheduler = FairScheduler(self.slots, self.per_user)
+            self.loop.call_soon(ready.set)
+            self.loop.run_until_complete(self.scheduler.run(self._execute))
+
+        threading.Thread(target=run_loop, name="agent-daemon-loop", daemon=True).start()
+        ready.wait()
+
+    def submit(self, pipeline, user, params):
+        job = Job(pipeline, user, params)
+        with self.jobs_lock:
+            self.jobs[job.id] = job
+            self._prune()
+        self.loop.call_soon_threadsafe(self.scheduler.submit, job)
+        return job
+
+    def _prune(self):
+        finished = [job for job in self.jobs.values() if job.done]
+        for job in finished[:max(0, len(self.jobs) - self.keep_jobs)]:
+            del self.jobs[job.id]
+
+    def get(self, job_id):
+        with self.jobs_lock:
+            return self.jobs.get(job_id)
+
+    def list(self, user=None):
+        with self.jobs_lock:
+            return [job for job in self.jobs.values() if user is None or job.user == user]
+
+    async def _execute(self, job):
+        current_job.set(job)
+        job.started = time.time()
+        job.set_status("running")
+        try:
+            with bind(job_id=job.id, user=job.user):
+                job.result = await PIPELINES[job.pipeline][1](self, job, job.params)
+            status = "done"
+        except Exception as e:
+            print(traceback.format_exc())
+            job.error = f"{type(e).__name__}: {e}"
+            status = "failed"
+        job.flush_output()
+        job.finished = time.time()
+        job.set_status(status)
+        job.emit("done", {"status": status, "error": job.error,
+                          "output": (job.result or {}).get("output")})
+        sys.__stdout__.write(f"[daemon] job {job.id} ({job.pipeline}, {job.user}) {status} "
+                             f"in {job.finished - job.started:.1f}s\n")
+
+    def health(self):
+        jobs = self.list()
+        return {
+            "jobs": dict(Counter(job.status for job in jobs)),
+            "queued": self.scheduler.queued(),
+            "running": self.scheduler.active,
+            "slots": self.slots,
+            "pipelines": sorted(self.modules),
+            "response_cache": self.response_cache.stats() if self.response_cache else None,
+        }
+
+class DaemonHandler(BaseHTTPRequestHandler):
+    daemon = None
+
+    def _authorized(self):
+        if not self.daemon.token:
+            return True
+        expected = f"Bearer {self.daemon.token}"
+        if hmac.compare_digest(self.headers.get("Authorization", "").encode(), expected.encode()):
+            return True
+        self._send_json(401, {"error": "missing or wrong bearer token"})
+        return False
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        if parts == ["health"]:
+            return self._send_json(200, self.daemon.health())
+        if parts == ["jobs"]:
+            user = parse_qs(url.query).get("user", [None])[0]
+            return self._send_json(200, [job.to_dict(full=False) for job in self.daemon.list(user)])
+        if len(parts) in (2, 3) and parts[0] == "jobs":
+            job = self.daemon.get(parts[1])
+            if job is None:
+                return self._send_json(404, {"error": "unknown job"})
+            if len(parts) == 2:
+                return self._send_json(200, job.to_dict())
+            if parts[2] == "events":
+                return self._stream_events(job)
+        self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        if urlparse(self.path).path.rstrip("/") != "/jobs":
+            return self._send_json(404, {"error": "not found"})
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        except json.JSONDecodeError:
+            return self._send_json(400, {"error": "body must be JSON"})
+        pipeline = body.get("pipeline")
+        params = body.get("params") or {}
+        if pipeline not in PIPELINES:
+            return self._send_json(400, {"error": f"pipeline must be one of {sorted(PIPELINES)}"})
+        if not isinstance(params, dict):
+            return self._send_json(400, {"error": "params must be an object"})
+        missing = missing_params(pipeline, params)
+        if missing:
+            return self._send_json(400, {"error": f"missing params: {', '.join(missing)}"})
+        try:
+            self.daemon.check_params(pipeline, params)
+        except ValueError as e:
+            return self._send_json(400, {"error": str(e)})
+        user = str(body.get("user") or self.headers.get("X-User") or self.client_address[0])
+        job = self.daemon.submit(pipeline, user, params)
+        self._send_json(202, job.to_dict())
+
+    def _stream_events(self, job):
+        """
+        Replays the job's events, then streams new ones until it finishes; honours
+        Last-Event-ID so a reconnecting EventSource resumes where it left off.
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        sent = int(self.headers.get("Last-Event-ID", -1)) + 1
+        try:
+            self.wfile.write(b"retry: 1000\n\n")
+            while True:
+                with job.changed:
+                    job.changed.wait_for(lambda: len(job.events) > sent or job.done, timeout=HEARTBEAT_SECONDS)
+                    batch = job.events[sent:]
+                    finished = job.done
+                frames = [f"id: {sent + i}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+                          for i, (event, data) in enumerate(batch)]
+                sent += len(batch)
+                self.wfile.write("".join(frames).encode("utf-8") if frames else f": ping {int(time.time())}\n\n".encode())
+                self.wfile.flush()
+                if finished and sent == len(job.events):
+                    return
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+    def log_message(self, format, *args):
+        sys.__stderr__.write(f"[http] {self.address_string()} {format % args}\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the agent pipelines behind a local HTTP job API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8700)
+    parser.add_argument("--slots", type=int, default=2, help="Jobs running at once")
+    parser.add_argument("--per-user", type=int, default=1, help="Jobs running at once per user (0 = no limit)")
+    parser.add_argument("--jobs-dir", default="daemon_jobs", help="Where job inputs and outputs are written")
+    parser.add_argument("--input-dir", default=None,
+                        help="Directory `input` paths are read from (default: input paths are refused)")
+    parser.add_argument("--token", default=os.getenv("AGENT_DAEMON_TOKEN"),
+                        help="Require 'Authorization: Bearer <token>' on every request (default: $AGENT_DAEMON_TOKEN)")
+    parser.add_argument("--response-cache", type=int, default=512, help="LLM response cache entries (0 = off)")
+    parser.add_argument("--echo", action="store_true", help="Also print job output to the daemon's stdout")
+    args = parser.parse_args()
+
+    if not args.token and args.host not in ("127.0.0.1", "localhost", "::1"):
+        sys.__stderr__.write(f"[daemon] warning: listening on {args.host} without --token; anyone who can reach "
+                             "the port can run jobs\n")
+    daemon = AgentDaemon(args.slots, args.per_user, args.jobs_dir, args.response_cache, args.echo,
+                         input_dir=args.input_dir, token=args.token)
+    daemon.start()
+    DaemonHandler.daemon = daemon
+    server = ThreadingHTTPServer((args.host, args.port), DaemonHandler)
+    server.daemon_threads = True
+    sys.__stdout__.write(f"[daemon] listening on http://{args.host}:{args.port} "
+                         f"({args.slots} slots, {args.per_user or 'unlimited'} per user)\n")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
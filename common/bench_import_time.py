@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Import-time check for modules on the CLI startup path.
+
+Imports each module in a fresh interpreter with `python -X importtime`, takes
+the cumulative time the interpreter reports for that module, and compares the
+median over a few runs against a budget. Exits non-zero if any module is over
+budget or pulls in a module that should only load when it is used (provider
+clients, the tool-call parser). common/test_import_time.py runs the same check
+under pytest.
+
+Usage:
+  python common/bench_import_time.py [--runs 5] [--scale 2.0]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (module, path to put on sys.path, budget in ms)
+MODULES = [
+    ("common.inference_engine", REPO_ROOT, 150),
+    ("story_roundtable", os.path.join(REPO_ROOT, "ai_storytelling_roundtable"), 200),
+    ("story_refinement", os.path.join(REPO_ROOT, "ai_storytelling_roundtable"), 200),
+]
+# Modules that must not be loaded just by importing the modules above.
+LAZY_MODULES = ["anthropic", "httpx", "ai_agent_toolbox"]
+
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+def import_time(module, path):
+    """
+    Returns (cumulative microseconds for `module`, set of modules it loaded) from one fresh interpreter.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [path, os.environ.get("PYTHONPATH")])))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, env=env, cwd=path)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    cumulative, loaded = None, set()
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        name = match.group(4)
+        loaded.add(name)
+        if name == module and not match.group(3):
+            cumulative = int(match.group(2))
+    return cumulative, loaded
+
+def main():
+    parser = argparse.ArgumentParser(description="Check import times against a budget")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget, e.g. on slow machines")
+    args = parser.parse_args()
+
+    failed = False
+    for module, path, budget_ms in MODULES:
+        times, loaded = [], set()
+        for _ in range(args.runs):
+            cumulative, modules = import_time(module, path)
+            times.append(cumulative / 1000)
+            loaded |= modules
+        median = statistics.median(times)
+        budget = budget_ms * args.scale
+        eager = sorted(name for name in LAZY_MODULES if name in loaded)
+        ok = median <= budget and not eager
+        failed = failed or not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {module:<26} {median:7.1f} ms (budget {budget:.0f} ms)"
+              + (f", eagerly imports {', '.join(eager)}" if eager else ""))
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
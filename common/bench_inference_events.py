@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Events/sec benchmark for InferenceEngine.infer_stream.
+
+Streams a canned response through a provider that yields small deltas with no
+network, so the numbers measure only the engine's own per-token overhead: event
+allocation, async generator hops and the consumer's accumulation. Runs on a
+single event loop, so the rate is per core.
+
+Usage:
+  python common/bench_inference_events.py --tokens 200000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.inference_engine import InferenceEngine
+
+class FakeProviderEngine(InferenceEngine):
+    """
+    InferenceEngine whose provider yields `tokens` deltas of `token_chars` characters.
+    """
+
+    def __init__(self, tokens, token_chars=4):
+        super().__init__(provider="fake")
+        self.tokens = tokens
+        self.delta = "x" * token_chars
+
+    async def _stream_provider(self, messages, system):
+        delta = self.delta
+        for _ in range(self.tokens):
+            yield delta
+
+async def consume(engine, **coalesce):
+    events = 0
+    parts = []
+    async for event in engine.infer_stream([{"role": "user", "content": "bench"}], **coalesce):
+        events += 1
+        if event.type == "aiCompletion":
+            parts.append(event.text)
+    return events, len("".join(parts))
+
+def bench(label, tokens, token_chars, **coalesce):
+    engine = FakeProviderEngine(tokens, token_chars)
+    start = time.perf_counter()
+    events, chars = asyncio.run(consume(engine, **coalesce))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {elapsed:7.3f}s  {tokens / elapsed:>12,.0f} tokens/s  "
+          f"{events / elapsed:>12,.0f} events/s  ({events:,} events, {chars:,} chars)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark InferenceEngine event throughput")
+    parser.add_argument("--tokens", type=int, default=200_000)
+    parser.add_argument("--token-chars", type=int, default=4)
+    args = parser.parse_args()
+
+    bench("per-token", args.tokens, args.token_chars)
+    bench("coalesce 256 chars", args.tokens, args.token_chars, coalesce_chars=256)
+    bench("coalesce 2048 chars", args.tokens, args.token_chars, coalesce_chars=2048)
+    bench("coalesce 50ms", args.tokens, args.token_chars, coalesce_interval=0.05)
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,99 @@
 import json
 import os
 import asyncio
+import hashlib
+import threading
 import time
-import httpx
-import anthropic
+import weakref
+from collections import OrderedDict
 from typing import Any, Dict, List, Optional, AsyncGenerator
 
-from decimal import Decimal
+# Provider client libraries (anthropic, httpx) are imported inside the provider
+# functions, so importing this module only pays for the provider actually used.
 
 NANO_GPT_API_KEY=os.getenv("NANO_GPT_API_KEY", None)
 
+# Long-running processes (see agent_daemon.py) turn these on to keep provider
+# clients and responses warm across jobs; one-shot CLIs leave them off.
+_shared_clients = None
+_response_cache = None
+
+def use_shared_clients(enabled: bool = True):
+    """
+    Reuses one provider client (and its connection pool) per event loop instead of
+    creating one per request.
+    """
+    global _shared_clients
+    _shared_clients = weakref.WeakKeyDictionary() if enabled else None
+
+def _get_client(name: str, factory):
+    """
+    Returns (client, owned). Owned clients were created for this request only and
+    should be closed by the caller; shared ones stay open for the life of the loop.
+    """
+    if _shared_clients is None:
+        return factory(), True
+    clients = _shared_clients.setdefault(asyncio.get_running_loop(), {})
+    if name not in clients:
+        clients[name] = factory()
+    return clients[name], False
+
+class ResponseCache:
+    """
+    LRU cache of llm_call responses keyed by (system, messages, model, temperature).
+    Identical requests get identical responses while an entry is cached, so only
+    greedy (temperature 0) calls use it: sampling callers (retries, best-of-N
+    drafts) must get a fresh response each time.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(system, messages, model_name, temperature) -> str:
+        payload = json.dumps([system, messages, model_name, temperature], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, response: str):
+        with self._lock:
+            self.entries[key] = response
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+def use_response_cache(max_entries: int = 512):
+    """
+    Enables (or with max_entries=0 disables) the llm_call response cache; returns it.
+    """
+    global _response_cache
+    _response_cache = ResponseCache(max_entries) if max_entries else None
+    return _response_cache
+
 class InferenceEvent:
     """
     Container for streaming events. 
     event_type could be "aiCompletion", "toolUse", "usage_delta", "done", etc.
+    Slotted, since one is created per streamed chunk.
     """
-    def __init__(self, event_type: str, text: str = "", usage: Any = None, data: Any = {}):
+    __slots__ = ("type", "text", "usage", "data")
+
+    def __init__(self, event_type: str, text: str = "", usage: Any = None, data: Any = None):
         self.type = event_type
         self.text = text
         self.usage = usage
@@ -45,36 +123,56 @@ class InferenceEngine:
     async def infer_stream(
         self,
         messages: List[Dict[str, Any]],
-        system: Optional[str] = None
+        system: Optional[str] = None,
+        coalesce_chars: int = 0,
+        coalesce_interval: float = 0.0,
     ) -> AsyncGenerator[InferenceEvent, None]:
         """
         Async generator that yields InferenceEvent objects in real time.
         Also emits events to your JS and main app streams as needed.
-        """
 
-        # 3) Actually stream from the chosen provider
-        async for event in self._stream_provider(messages, system):
-            if event.type == "token_delta":
-                yield InferenceEvent("aiCompletion", text=event.text)
+        Providers yield plain text deltas; each becomes one "aiCompletion" event.
+        With coalesce_chars and/or coalesce_interval set, deltas are batched and an
+        event is yielded once the batch reaches coalesce_chars characters or
+        coalesce_interval seconds have passed since the last event (checked as
+        deltas arrive), which cuts per-token overhead for consumers that do not
+        need every token as it arrives.
+        """
+        if not coalesce_chars and not coalesce_interval:
+            async for delta in self._stream_provider(messages, system):
+                yield InferenceEvent("aiCompletion", text=delta)
+            yield InferenceEvent("done")
+            return
 
+        pending = []
+        pending_chars = 0
+        last_flush = time.monotonic()
+        async for delta in self._stream_provider(messages, system):
+            pending.append(delta)
+            pending_chars += len(delta)
+            if coalesce_chars and pending_chars >= coalesce_chars or \
+                    coalesce_interval and time.monotonic() - last_flush >= coalesce_interval:
+                yield InferenceEvent("aiCompletion", text="".join(pending))
+                pending.clear()
+                pending_chars = 0
+                last_flush = time.monotonic()
+        if pending:
+            yield InferenceEvent("aiCompletion", text="".join(pending))
         yield InferenceEvent("done")
 
     async def _stream_provider(
         self,
         messages: List[Dict[str, Any]],
         system: Optional[str],
-    ) -> AsyncGenerator[InferenceEvent, None]:
+    ) -> AsyncGenerator[str, None]:
         """
-        Routes to the correct provider method. Yields InferenceEvent objects.
+        Routes to the provider registered in PROVIDERS. Yields text deltas.
         """
-        if self.provider == "anthropic":
-            async for event in self._stream_anthropic(messages, system):
-                yield event
-        elif self.provider == "nanogpt":
-            async for event in self._stream_nanogpt(messages, system):
-                yield event
-        else:
+        stream = PROVIDERS.get(self.provider)
+        if stream is None:
             raise ProviderNotImplementedError(f"Provider {self.provider} is not implemented.")
+        async for delta in stream(self, messages, system):
+            yield delta
 
     async def _stream_anthropic(
         self,
@@ -82,15 +180,16 @@ class InferenceEngine:
         system,
         user=None,
         session=None
-    ) -> AsyncGenerator[InferenceEvent, None]:
+    ) -> AsyncGenerator[str, None]:
         """
         Streams tokens from Anthropic using the anthropic library.
         """
+        import anthropic
         from os import getenv
         ENV = getenv("ENV", "dev")
 
         model = self.model_name
-        client = anthropic.AsyncAnthropic()
+        client, _ = _get_client("anthropic", anthropic.AsyncAnthropic)
 
         if not system:
             system = ""
@@ -103,7 +202,7 @@ class InferenceEngine:
         ) as stream:
             async for event in stream:
                 if event.type == "content_block_delta" and event.delta.type == "text_delta":
-                    yield InferenceEvent("token_delta", text=event.delta.text)
+                    yield event.delta.text
                 if event.type in ["message_delta", "message_start"]:
                     usage_data = getattr(event, "usage", None)
                     if event.type == "message_start":
@@ -113,12 +212,12 @@ class InferenceEngine:
         self,
         messages: List[Dict[str, Any]],
         system: Optional[str]
-    ) -> AsyncGenerator[InferenceEvent, None]:
+    ) -> AsyncGenerator[str, None]:
         """
         Streams tokens from a hypothetical NanoGPT endpoint. 
         Mirrors your existing `stream_nano_gpt` logic.
         """
-        import json
+        import httpx
 
         api_key = os.getenv('NANOGPT_API_KEY')
         base_url = os.getenv('NANOGPT_BASE_URL', "https://nano-gpt.com/api/v1")
@@ -144,14 +243,19 @@ class InferenceEngine:
         data = {
             "model": model,
             "messages": combined_messages,
+            "max_tokens": self.max_tokens,
             "stream": True
         }
+        # None leaves the provider's default temperature in place.
+        if self.temperature is not None:
+            data["temperature"] = self.temperature
         headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
         }
 
-        async with httpx.AsyncClient(timeout=None) as client:
+        client, owned = _get_client("httpx", lambda: httpx.AsyncClient(timeout=None))
+        try:
             async with client.stream("POST", nano_gpt_endpoint, headers=headers, json=data) as response:
                 if response.status_code != 200:
                     err_text = await response.aread()
@@ -163,7 +267,7 @@ class InferenceEngine:
                             yield event
                         return
 
-                    yield InferenceEvent("token_delta", text=f"Error: {err_text}")
+                    yield f"Error: {err_text}"
                     return
 
                 buffer = ""
@@ -181,10 +285,29 @@ class InferenceEngine:
                                 data_obj = json.loads(payload)
                                 delta_chunk = data_obj["choices"][0]["delta"].get("content", "")
                                 if delta_chunk:
-                                    yield InferenceEvent("token_delta", text=delta_chunk)
+                                    yield delta_chunk
                             except (json.JSONDecodeError, KeyError):
                                 pass
+        finally:
+            if owned:
+                await client.aclose()
+
+# Provider name -> async generator function (engine, messages, system) yielding text deltas.
+PROVIDERS = {
+    "anthropic": InferenceEngine._stream_anthropic,
+    "nanogpt": InferenceEngine._stream_nanogpt,
+}
+
+def register_provider(name, stream):
+    """
+    Adds a provider usable as InferenceEngine(provider=name). `stream` is an async
+    generator function taking (engine, messages, system) and yielding text deltas;
+    it should import its client library inside, like the built-in providers.
+    """
+    PROVIDERS[name] = stream
 
+# Characters per aiCompletion event in llm_call, which only needs the full text.
+LLM_CALL_COALESCE_CHARS = 2048
 
 async def llm_call(system, messages, model_name=None, temperature=0.7):
     engine = InferenceEngine(
@@ -193,17 +316,29 @@ async def llm_call(system, messages, model_name=None, temperature=0.7):
         temperature=temperature,
         max_tokens=4096,
     )
+    # None means the provider's default temperature, which samples too.
+    cache = _response_cache if temperature == 0 else None
+    if cache is not None:
+        cache_key = ResponseCache.key(system, messages, model_name, temperature)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
     if model_name == "gemini-2.0-flash-thinking-exp-01-21":
         messages[0]['content'] = system+"\n"+messages[0]["content"]
-    response_text = ""
+    # Nothing here needs individual tokens, so let the stream batch them.
+    parts = []
     async for event in engine.infer_stream(
         messages=messages,
-        system=system
+        system=system,
+        coalesce_chars=LLM_CALL_COALESCE_CHARS,
     ):
         if event.type == "aiCompletion":
-            response_text += event.text
+            parts.append(event.text)
         elif event.type == "done":
             break
-    return response_text
+    response = "".join(parts)
+    if cache is not None and not response.startswith("Error: "):
+        cache.put(cache_key, response)
+    return response
 
 
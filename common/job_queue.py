@@ -0,0 +1,352 @@
+"""
+Durable work queue with leases, heartbeats and retries.
+
+Jobs are JSON payloads on a named queue. A worker leases one job at a time; the
+lease expires unless the worker heartbeats, so a job held by a crashed or
+partitioned worker is handed to another one. A failed job is retried with
+exponential backoff until max_attempts, then marked failed.
+
+Completing a job can enqueue follow-up jobs in the same transaction, so a chain
+of steps (see ai_storytelling_roundtable/roundtable_worker.py) never loses a
+step or enqueues it twice when a worker dies between the two. A worker whose
+lease was taken over cannot complete the job: its token no longer matches.
+Handlers therefore run at least once, but each job completes exactly once.
+
+Backends are looked up by URL scheme in BACKENDS:
+
+  - SQLiteQueue ("sqlite:///path/to/queue.db" or a plain path): WAL-mode
+    SQLite, safe for any number of worker processes on one machine. SQLite
+    locking is unreliable on network filesystems, so for workers on several
+    nodes register a backend for a shared store (e.g. a Redis-like server)
+    with register_backend() that implements the QueueBackend methods.
+
+Usage:
+  queue = open_queue("sqlite:///jobs.db")
+  queue.put("resize", {"path": "a.png"})
+  Worker(queue, "resize", handle_resize).run()
+"""
+
+import abc
+import asyncio
+import inspect
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    queue TEXT NOT NULL,
+    group_id TEXT,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    run_after REAL NOT NULL DEFAULT 0,
+    lease_token TEXT,
+    lease_expires REAL,
+    worker TEXT,
+    result TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (queue, status, run_after);
+CREATE INDEX IF NOT EXISTS jobs_group ON jobs (group_id);
+"""
+
+class QueueBackend(abc.ABC):
+    """
+    Interface every backend implements; a subclass missing any of these methods
+    cannot be instantiated. Jobs are returned as dicts with id, queue, group_id,
+    payload, status, attempts, max_attempts, lease_token, result, error.
+    """
+
+    @abc.abstractmethod
+    def put(self, queue, payload, group_id=None, max_attempts=3, delay=0.0):
+        """Enqueues a job; returns its id."""
+
+    @abc.abstractmethod
+    def lease(self, queue, worker, lease_seconds):
+        """Leases the oldest ready job (or one whose lease expired); returns it or None."""
+
+    @abc.abstractmethod
+    def heartbeat(self, job_id, lease_token, lease_seconds):
+        """Extends a lease; returns False if the lease was lost."""
+
+    @abc.abstractmethod
+    def complete(self, job_id, lease_token, result=None, followups=()):
+        """
+        Marks a job done and enqueues followups ((queue, payload, group_id) tuples)
+        atomically; returns False (and enqueues nothing) if the lease was lost.
+        """
+
+    @abc.abstractmethod
+    def fail(self, job_id, lease_token, error, retry_delay=5.0):
+        """Requeues a job with backoff, or marks it failed after max_attempts; returns the new status."""
+
+    @abc.abstractmethod
+    def get(self, job_id):
+        """The job with this id, or None."""
+
+    @abc.abstractmethod
+    def group(self, group_id):
+        """All jobs of a group, oldest first."""
+
+    @abc.abstractmethod
+    def counts(self, queue=None):
+        """{status: number of jobs}."""
+
+class SQLiteQueue(QueueBackend):
+    """
+    Queue in one SQLite file. Each thread gets its own connection, so a worker's
+    heartbeat thread and its main loop do not share one.
+    """
+
+    def __init__(self, path="jobs.db", busy_timeout=30.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    class _Transaction:
+        def __init__(self, conn):
+            self.conn = conn
+
+        def __enter__(self):
+            # IMMEDIATE takes the write lock up front, so two workers cannot lease the same job.
+            self.conn.execute("BEGIN IMMEDIATE")
+            return self.conn
+
+        def __exit__(self, exc_type, exc, tb):
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+    def _transaction(self):
+        return self._Transaction(self._conn())
+
+    @staticmethod
+    def _job(row):
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def _insert(self, conn, queue, payload, group_id, max_attempts, delay):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        conn.execute(
+            "INSERT INTO jobs (id, queue, group_id, payload, max_attempts, run_after, created, updated) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, queue, group_id, json.dumps(payload), max_attempts, now + delay, now, now),
+        )
+        return job_id
+
+    def put(self, queue, payload, group_id=None, max_attempts=3, delay=0.0):
+        with self._transaction() as conn:
+            return self._insert(conn, queue, payload, group_id, max_attempts, delay)
+
+    def lease(self, queue, worker, lease_seconds):
+        now = time.time()
+        with self._transaction() as conn:
+            # Expired leases that used their last attempt are failures, not work.
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'lease expired', lease_token = NULL, updated = ? "
+                "WHERE queue = ? AND status = 'leased' AND lease_expires < ? AND attempts >= max_attempts",
+                (now, queue, now),
+            )
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE queue = ? AND ((status = 'queued' AND run_after <= ?) "
+                "OR (status = 'leased' AND lease_expires < ?)) ORDER BY run_after, created LIMIT 1",
+                (queue, now, now),
+            ).fetchone()
+            if row is None:
+                return None
+            token = uuid.uuid4().hex
+            conn.execute(
+                "UPDATE jobs SET status = 'leased', attempts = attempts + 1, lease_token = ?, lease_expires = ?, "
+                "worker = ?, updated = ? WHERE id = ?",
+                (token, now + lease_seconds, worker, now, row["id"]),
+            )
+            return self._job(conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone())
+
+    def heartbeat(self, job_id, lease_token, lease_seconds):
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated = ? WHERE id = ? AND lease_token = ? AND status = 'leased'",
+                (now + lease_seconds, now, job_id, lease_token),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id, lease_token, result=None, followups=()):
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, lease_token = NULL, updated = ? "
+                "WHERE id = ? AND lease_token = ? AND status = 'leased'",
+                (json.dumps(result), now, job_id, lease_token),
+            )
+            if cursor.rowcount != 1:
+                return False
+            for queue, payload, group_id in followups:
+                self._insert(conn, queue, payload, group_id, 3, 0.0)
+            return True
+
+    def fail(self, job_id, lease_token, error, retry_delay=5.0):
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND lease_token = ? AND status = 'leased'",
+                (job_id, lease_token),
+            ).fetchone()
+            if row is None:
+                return None
+            if row["attempts"] >= row["max_attempts"]:
+                status, run_after = "failed", now
+            else:
+                status, run_after = "queued", now + retry_delay * 2 ** (row["attempts"] - 1)
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, run_after = ?, lease_token = NULL, updated = ? WHERE id = ?",
+                (status, error, run_after, now, job_id),
+            )
+            return status
+
+    def get(self, job_id):
+        return self._job(self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def group(self, group_id):
+        rows = self._conn().execute("SELECT * FROM jobs WHERE group_id = ? ORDER BY created", (group_id,))
+        return [self._job(row) for row in rows]
+
+    def counts(self, queue=None):
+        if queue is None:
+            rows = self._conn().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status")
+        else:
+            rows = self._conn().execute("SELECT status, COUNT(*) FROM jobs WHERE queue = ? GROUP BY status", (queue,))
+        return {status: count for status, count in rows}
+
+# URL scheme -> factory taking the part after "scheme://".
+BACKENDS = {
+    # sqlite:///relative.db -> "relative.db", sqlite:////abs/path.db -> "/abs/path.db"
+    "sqlite": lambda location: SQLiteQueue(location[1:] if location.startswith("/") else location),
+}
+
+def register_backend(scheme, factory):
+    """
+    Makes open_queue("<scheme>://...") use factory(rest of the URL), which must
+    return a QueueBackend.
+    """
+    BACKENDS[scheme] = factory
+
+def open_queue(url):
+    """
+    "sqlite:///relative.db", "sqlite:////abs/path.db", a plain file path, or any
+    registered "<scheme>://..." URL.
+    """
+    if "://" not in url:
+        return SQLiteQueue(url)
+    scheme, location = url.split("://", 1)
+    if scheme not in BACKENDS:
+        raise ValueError(f"No queue backend registered for {scheme}://")
+    return BACKENDS[scheme](location)
+
+class Worker:
+    """
+    Leases jobs from one queue and runs handler(payload, job) on each. The handler
+    may be sync or async and returns either a JSON-able result or
+    (result, followups) to enqueue more jobs atomically with the completion.
+    A background thread heartbeats the lease every lease_seconds / 3.
+    """
+
+    def __init__(self, backend, queue, handler, lease_seconds=60.0, poll_interval=1.0, retry_delay=5.0,
+                 worker_id=None):
+        self.backend = backend
+        self.queue = queue
+        self.handler = handler
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.processed = 0
+        self.failed = 0
+        self._loop = None
+
+    def _heartbeat(self, job, stop, lost):
+        while not stop.wait(self.lease_seconds / 3):
+            if not self.backend.heartbeat(job["id"], job["lease_token"], self.lease_seconds):
+                lost.set()
+                return
+
+    def _call(self, job):
+        if inspect.iscoroutinefunction(self.handler):
+            if self._loop is None:
+                # One loop per worker, so async clients can be reused across jobs.
+                self._loop = asyncio.new_event_loop()
+            return self._loop.run_until_complete(self.handler(job["payload"], job))
+        return self.handler(job["payload"], job)
+
+    def run_once(self):
+        """
+        Leases and runs one job; returns False if the queue had nothing ready.
+        """
+        job = self.backend.lease(self.queue, self.worker_id, self.lease_seconds)
+        if job is None:
+            return False
+        stop, lost = threading.Event(), threading.Event()
+        beat = threading.Thread(target=self._heartbeat, args=(job, stop, lost), daemon=True)
+        beat.start()
+        try:
+            outcome = self._call(job)
+        except Exception as e:
+            stop.set()
+            beat.join()
+            status = self.backend.fail(job["id"], job["lease_token"], f"{type(e).__name__}: {e}", self.retry_delay)
+            self.failed += 1
+            log.exception("worker %s: job %s attempt %d failed (%s): %s",
+                          self.worker_id, job["id"], job["attempts"], status, e)
+            return True
+        stop.set()
+        beat.join()
+        result, followups = outcome if isinstance(outcome, tuple) else (outcome, ())
+        if lost.is_set() or not self.backend.complete(job["id"], job["lease_token"], result, followups):
+            log.warning("worker %s lost the lease on job %s; its result was discarded", self.worker_id, job["id"])
+        else:
+            self.processed += 1
+        return True
+
+    def run(self, drain=False, max_jobs=None):
+        """
+        Processes jobs until stopped, or with drain=True until nothing is ready or leased.
+        """
+        try:
+            while max_jobs is None or self.processed + self.failed < max_jobs:
+                if self.run_once():
+                    continue
+                counts = self.backend.counts(self.queue)
+                if drain and not counts.get("leased") and not counts.get("queued"):
+                    return
+                time.sleep(self.poll_interval)
+        finally:
+            if self._loop is not None:
+                self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+                self._loop.close()
+                self._loop = None
@@ -0,0 +1,209 @@
+"""
+Structured, non-blocking logging for the agent pipelines.
+
+Instead of printing whole stories and responses on every step, modules log a
+short message and attach large text as a payload:
+
+    log = logging.getLogger("story_roundtable")
+    with bind(run_id=new_run_id(), persona="Marcus", iteration=2):
+        log.debug("persona response", extra={"payload": response})
+
+  - levels: the standard logging levels; disabled levels cost nothing
+  - payloads: kept whole up to max_payload_chars; larger ones are truncated
+    (head and tail), and only a `sample_rate` fraction of them keep any text,
+    the rest are reduced to their length
+  - non-blocking: records are truncated in the calling thread and put on a
+    bounded queue (dropped and counted if it is full); a QueueListener thread
+    does the formatting and I/O
+  - JSONL: with a log file, every record is one JSON object carrying the
+    fields bound with bind() (run_id, persona, iteration, ...), so one run can
+    be followed across concurrent drafts, tasks and threads
+  - console: one short human-readable line per record; payloads only at DEBUG
+
+Call setup_logging() once per process (the CLIs do it from their flags; the
+defaults come from LOG_LEVEL and LOG_FILE).
+"""
+
+import atexit
+import contextlib
+import copy
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+
+log_context = contextvars.ContextVar("log_context", default={})
+
+# Libraries that log every request at INFO.
+QUIET_LOGGERS = ("httpx", "httpcore")
+
+_listener = None
+_queue_handler = None
+
+def new_run_id():
+    return uuid.uuid4().hex[:12]
+
+@contextlib.contextmanager
+def bind(**fields):
+    """
+    Adds correlation fields to every record logged in this context (and in tasks
+    or to_thread calls started from it).
+    """
+    token = log_context.set({**log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        log_context.reset(token)
+
+class ContextFilter(logging.Filter):
+    """
+    Copies the bound fields onto the record and shrinks its payload, in the
+    calling thread, so the queue never holds full stories.
+    """
+
+    def __init__(self, max_payload_chars=2000, sample_rate=1.0):
+        super().__init__()
+        self.max_payload_chars = max_payload_chars
+        self.sample_rate = sample_rate
+
+    def filter(self, record):
+        record.context = log_context.get()
+        payload = getattr(record, "payload", None)
+        if payload is not None:
+            payload = payload if isinstance(payload, str) else json.dumps(payload, default=str)
+            record.payload_chars = len(payload)
+            if len(payload) > self.max_payload_chars:
+                if self.sample_rate >= 1.0 or random.random() < self.sample_rate:
+                    half = self.max_payload_chars // 2
+                    omitted = len(payload) - 2 * half
+                    payload = f"{payload[:half]}\n...[{omitted} chars omitted]...\n{payload[-half:]}"
+                else:
+                    payload = None
+            record.payload = payload
+        return True
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks the caller: records arriving while the queue
+    is full are dropped and counted.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Like QueueHandler.prepare (the message and traceback are rendered here,
+        # where the exception is still live), but the traceback stays in exc_text
+        # for the formatters instead of being merged into the message.
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class JsonlFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "context", {}))
+        if hasattr(record, "payload_chars"):
+            entry["payload_chars"] = record.payload_chars
+            if record.payload is not None:
+                entry["payload"] = record.payload
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class ConsoleFormatter(logging.Formatter):
+    """
+    `HH:MM:SS LEVEL [field=value ...] message`, plus a short payload preview at DEBUG.
+    """
+
+    def __init__(self, preview_chars=300):
+        super().__init__()
+        self.preview_chars = preview_chars
+
+    def format(self, record):
+        context = getattr(record, "context", {})
+        tags = " ".join(f"{key}={value}" for key, value in context.items())
+        line = (f"{time.strftime('%H:%M:%S', time.localtime(record.created))} {record.levelname:<7} "
+                + (f"[{tags}] " if tags else "") + record.getMessage())
+        if hasattr(record, "payload_chars"):
+            line += f" ({record.payload_chars} chars)"
+            if record.levelno <= logging.DEBUG and record.payload:
+                preview = record.payload[:self.preview_chars]
+                line += "\n    " + preview.replace("\n", "\n    ") + ("..." if len(record.payload) > len(preview) else "")
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+def setup_logging(level=None, log_file=None, console=True, max_payload_chars=2000, sample_rate=1.0,
+                  queue_size=10000, handlers=()):
+    """
+    Routes the root logger through a bounded queue to a console handler (stderr),
+    a JSONL file (log_file) and any extra handlers. Safe to call again: the
+    previous setup is flushed and replaced.
+    """
+    global _listener, _queue_handler
+    shutdown_logging()
+    level = level or os.getenv("LOG_LEVEL", "INFO")
+    log_file = log_file or os.getenv("LOG_FILE") or None
+
+    outputs = list(handlers)
+    if console:
+        console_handler = logging.StreamHandler(sys.stderr)
+        console_handler.setFormatter(ConsoleFormatter())
+        outputs.append(console_handler)
+    if log_file:
+        os.makedirs(os.path.dirname(os.path.abspath(log_file)), exist_ok=True)
+        file_handler = logging.FileHandler(log_file, encoding="utf-8")
+        file_handler.setFormatter(JsonlFormatter())
+        outputs.append(file_handler)
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    _queue_handler = BoundedQueueHandler(log_queue)
+    _queue_handler.addFilter(ContextFilter(max_payload_chars, sample_rate))
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, BoundedQueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
+    _listener = logging.handlers.QueueListener(log_queue, *outputs, respect_handler_level=True)
+    _listener.start()
+    return _queue_handler
+
+def shutdown_logging():
+    """
+    Flushes queued records and stops the listener thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.flush()
+        if _queue_handler is not None and _queue_handler.dropped:
+            sys.stderr.write(f"[logging] dropped {_queue_handler.dropped} records while the queue was full\n")
+        _listener = None
+
+atexit.register(shutdown_logging)
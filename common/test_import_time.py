@@ -0,0 +1,28 @@
+"""
+Import-time regression test: every module in bench_import_time.MODULES must
+import within its budget and without loading any of LAZY_MODULES.
+
+Set IMPORT_BUDGET_SCALE (e.g. 2.0) to loosen the budgets on slow machines.
+"""
+
+import os
+import statistics
+
+import pytest
+
+from common.bench_import_time import LAZY_MODULES, MODULES, import_time
+
+RUNS = 3
+SCALE = float(os.getenv("IMPORT_BUDGET_SCALE", "1.0"))
+
+@pytest.mark.parametrize("module, path, budget_ms", MODULES, ids=[module for module, _, _ in MODULES])
+def test_import_within_budget(module, path, budget_ms):
+    times, loaded = [], set()
+    for _ in range(RUNS):
+        cumulative, modules = import_time(module, path)
+        times.append(cumulative / 1000)
+        loaded |= modules
+    eager = sorted(name for name in LAZY_MODULES if name in loaded)
+    assert not eager, f"importing {module} eagerly imports {', '.join(eager)}"
+    median = statistics.median(times)
+    assert median <= budget_ms * SCALE, f"{module} imports in {median:.1f} ms (budget {budget_ms * SCALE:.0f} ms)"
@@ -0,0 +1,84 @@
+"""
+Job queue tests with several worker processes on one SQLite queue file.
+
+Each run is a chain of steps: completing step N enqueues step N+1 in the same
+transaction, as ai_storytelling_roundtable/roundtable_worker.py does.
+"""
+
+import multiprocessing as mp
+import os
+
+import pytest
+
+from common.job_queue import QueueBackend, SQLiteQueue, Worker, open_queue
+
+QUEUE = "steps"
+RUNS = 12
+STEPS = 5
+WORKERS = 3
+
+def step(payload, job):
+    if payload.get("crash") and job["attempts"] == 1:
+        # Die holding the lease; another worker takes the job over once it expires.
+        os._exit(1)
+    followups = ()
+    if payload["step"] + 1 < STEPS:
+        followups = [(QUEUE, {"run": payload["run"], "step": payload["step"] + 1}, job["group_id"])]
+    return {"step": payload["step"], "pid": os.getpid()}, followups
+
+def _work(path, lease_seconds):
+    Worker(open_queue(path), QUEUE, step, lease_seconds=lease_seconds, poll_interval=0.05).run(drain=True)
+
+def _run_workers(path, lease_seconds=60.0):
+    processes = [mp.Process(target=_work, args=(path, lease_seconds)) for _ in range(WORKERS)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+    assert not any(process.is_alive() for process in processes), "workers did not drain the queue"
+    return processes
+
+def _check_chains(queue, runs):
+    pids = set()
+    for run in range(runs):
+        jobs = queue.group(f"run-{run}")
+        assert [job["payload"]["step"] for job in jobs] == list(range(STEPS))
+        assert all(job["status"] == "done" for job in jobs)
+        pids |= {job["result"]["pid"] for job in jobs}
+    return pids
+
+def test_workers_drain_one_queue_file(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    queue = SQLiteQueue(path)
+    for run in range(RUNS):
+        queue.put(QUEUE, {"run": run, "step": 0}, group_id=f"run-{run}")
+
+    processes = _run_workers(path)
+
+    assert [process.exitcode for process in processes] == [0] * WORKERS
+    assert queue.counts(QUEUE) == {"done": RUNS * STEPS}
+    pids = _check_chains(queue, RUNS)
+    assert pids <= {process.pid for process in processes}
+
+def test_crashed_worker_lease_is_taken_over(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    queue = SQLiteQueue(path)
+    queue.put(QUEUE, {"run": 0, "step": 0, "crash": True}, group_id="run-0")
+    for run in range(1, 4):
+        queue.put(QUEUE, {"run": run, "step": 0}, group_id=f"run-{run}")
+
+    processes = _run_workers(path, lease_seconds=1.0)
+
+    assert sorted(process.exitcode for process in processes) == [0] * (WORKERS - 1) + [1]
+    assert queue.counts(QUEUE) == {"done": 4 * STEPS}
+    _check_chains(queue, 4)
+    crashed = queue.group("run-0")[0]
+    assert crashed["attempts"] == 2
+
+def test_incomplete_backend_cannot_be_created():
+    class LeaseOnly(QueueBackend):
+        def lease(self, queue, worker, lease_seconds):
+            return None
+
+    with pytest.raises(TypeError, match="abstract"):
+        LeaseOnly()
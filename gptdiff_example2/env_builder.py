@@ -0,0 +1,141 @@
+"""
+Delta environment building for iterative gptdiff runs.
+
+build_environment() in the examples pastes every file in full before every
+generate_diff call. EnvironmentBuilder hashes files and remembers which
+versions it has already sent in this session:
+
+  - new or changed files (and `pinned` ones) are sent in full
+  - unchanged files are reduced to an outline: for Python, imports plus
+    class/function signatures and the first docstring line (via ast); for other
+    files, their first lines
+  - outlines are added only while the estimated size stays under
+    `token_budget`; past that, unchanged files are listed by name
+
+generate_diff calls are stateless, so the model does not literally remember
+earlier steps: the outlines keep the rest of the codebase's API in view while
+the full text goes to the files that are actually evolving. Pin the files a
+goal is expected to edit so they are always sent in full.
+"""
+
+import ast
+import hashlib
+
+CHARS_PER_TOKEN = 4
+TEXT_OUTLINE_LINES = 20
+
+def file_hash(content):
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+def _signature(node):
+    args = ast.unparse(node.args)
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    return f"{prefix} {node.name}({args}){returns}"
+
+def _docstring_line(node):
+    doc = ast.get_docstring(node)
+    return doc.strip().splitlines()[0] if doc else ""
+
+def python_outline(source):
+    """
+    Imports, top-level assignments, and class/function signatures with their first docstring line.
+    Returns None if the source does not parse.
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return None
+    lines = []
+
+    def visit(nodes, indent):
+        for node in nodes:
+            if isinstance(node, (ast.Import, ast.ImportFrom)) and not indent:
+                lines.append(ast.unparse(node))
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)) and not indent:
+                text = ast.unparse(node)
+                lines.append(text if len(text) <= 80 else text[:77] + "...")
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                doc = _docstring_line(node)
+                lines.append(" " * indent + _signature(node) + ": ..." + (f"  # {doc}" if doc else ""))
+            elif isinstance(node, ast.ClassDef):
+                bases = ", ".join(ast.unparse(base) for base in node.bases)
+                doc = _docstring_line(node)
+                lines.append(" " * indent + f"class {node.name}" + (f"({bases})" if bases else "") + ":"
+                             + (f"  # {doc}" if doc else ""))
+                visit(node.body, indent + 4)
+
+    visit(tree.body, 0)
+    return "\n".join(lines)
+
+def outline(path, content):
+    if path.endswith(".py"):
+        result = python_outline(content)
+        if result is not None:
+            return result
+    lines = content.splitlines()
+    head = "\n".join(lines[:TEXT_OUTLINE_LINES])
+    if len(lines) > TEXT_OUTLINE_LINES:
+        head += f"\n... ({len(lines) - TEXT_OUTLINE_LINES} more lines)"
+    return head
+
+def full_entry(path, content):
+    return f"File: {path}\nContent:\n{content}\n"
+
+class EnvironmentBuilder:
+    """
+    Builds gptdiff environment strings that only resend files changed since the last build.
+    """
+
+    def __init__(self, token_budget=8000, pinned=()):
+        self.token_budget = token_budget
+        self.pinned = set(pinned)
+        self.sent = {}
+        self.last_stats = {}
+
+    def reset(self):
+        """
+        Forgets what was sent; the next build sends every file in full.
+        """
+        self.sent.clear()
+
+    def build(self, files):
+        hashes = {path: file_hash(content) for path, content in files.items()}
+        full, unchanged = [], []
+        for path, content in files.items():
+            if path in self.pinned or self.sent.get(path) != hashes[path]:
+                full.append(full_entry(path, content))
+            else:
+                unchanged.append(path)
+
+        budget_chars = self.token_budget * CHARS_PER_TOKEN
+        used = sum(len(entry) for entry in full)
+        outlined, listed = [], []
+        for path in unchanged:
+            entry = f"File: {path} (unchanged, outline only)\nOutline:\n{outline(path, files[path])}\n"
+            if used + len(entry) <= budget_chars:
+                outlined.append(entry)
+                used += len(entry)
+            else:
+                listed.append(path)
+
+        parts = full + outlined
+        if listed:
+            parts.append("Other unchanged files (not shown): " + ", ".join(listed) + "\n")
+        environment = "".join(parts)
+
+        self.sent.update(hashes)
+        self.last_stats = {
+            "full": len(full),
+            "outlined": len(outlined),
+            "listed": len(listed),
+            "chars": len(environment),
+            "full_chars": sum(len(full_entry(path, content)) for path, content in files.items()),
+        }
+        return environment
+
+    def describe(self):
+        s = self.last_stats
+        saved = 1 - s["chars"] / s["full_chars"] if s.get("full_chars") else 0.0
+        return (f"environment: {s['full']} full, {s['outlined']} outlined, {s['listed']} listed; "
+                f"~{s['chars'] // CHARS_PER_TOKEN} tokens ({saved:.0%} smaller than sending everything)")
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Parallel multi-candidate evolution of the synthetic world.
+
+evolve_diff.py and simulate.py ask for one diff, apply it and overwrite world.py.
+This engine explores K candidates per generation instead:
+
+  1. K diffs are generated concurrently (one LLM round-trip of latency, not K)
+  2. each diff is applied to its own copy of the files dict (patch_apply.py: exact
+     hunks locally, smartapply only as a fallback)
+  3. each candidate is written to a scratch directory and `world.py` is run in a
+     separate subprocess with a timeout, all candidates at once
+  4. the best-scoring candidate (if it beats the current world) becomes the next
+     generation's starting point
+
+Usage:
+  python evolve_parallel.py --goal "Add seasons to the World class" --generations 3 --candidates 4
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from gptdiff import generate_diff
+
+from env_builder import EnvironmentBuilder
+from patch_apply import PatchCache, apply_diff
+
+ENTRY = "world.py"
+
+def load_codebase(paths=(ENTRY,)):
+    files = {}
+    for path in paths:
+        with open(path, "r") as f:
+            files[path] = f.read()
+    return files
+
+def run_candidate(files, entry=ENTRY, timeout=10):
+    """
+    Writes files to a scratch directory and runs `python entry` there.
+    Returns {"returncode", "stdout", "stderr", "seconds", "timed_out"}.
+    """
+    with tempfile.TemporaryDirectory(prefix="world-candidate-") as workdir:
+        for path, content in files.items():
+            full_path = os.path.join(workdir, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "w") as f:
+                f.write(content)
+        start = time.perf_counter()
+        try:
+            proc = subprocess.run([sys.executable, entry], cwd=workdir, capture_output=True, text=True, timeout=timeout)
+            return {"returncode": proc.returncode, "stdout": proc.stdout, "stderr": proc.stderr,
+                    "seconds": time.perf_counter() - start, "timed_out": False}
+        except subprocess.TimeoutExpired as e:
+            return {"returncode": None, "stdout": e.stdout or "", "stderr": e.stderr or "",
+                    "seconds": timeout, "timed_out": True}
+
+def richness_score(result):
+    """
+    Default score: a world that crashes or hangs scores -1; otherwise one point per
+    distinct line of output, so candidates that simulate and report more win.
+    """
+    if result["timed_out"] or result["returncode"] != 0:
+        return -1.0
+    stdout = result["stdout"]
+    if isinstance(stdout, bytes):
+        stdout = stdout.decode("utf-8", "replace")
+    return float(len({line.strip() for line in stdout.splitlines() if line.strip()}))
+
+class Candidate:
+    def __init__(self, diff_text, files, result=None, score=float("-inf"), error=None):
+        self.diff_text = diff_text
+        self.files = files
+        self.result = result
+        self.score = score
+        self.error = error
+
+class ParallelEvolver:
+    """
+    Runs generations of K concurrent candidates and keeps the best one.
+    """
+
+    def __init__(self, files, goal, candidates=4, model=None, entry=ENTRY, timeout=10, scorer=richness_score,
+                 workers=None):
+        self.files = dict(files)
+        self.goal = goal
+        self.candidates = candidates
+        self.model = model
+        self.entry = entry
+        self.timeout = timeout
+        self.scorer = scorer
+        self.pool = ThreadPoolExecutor(max_workers=workers or 2 * candidates)
+        self.score = self.scorer(run_candidate(self.files, self.entry, self.timeout))
+        self.history = []
+        self.patch_cache = PatchCache()
+        # Only files changed by the last kept candidate are resent in full.
+        self.builder = EnvironmentBuilder(pinned=[entry])
+
+    def close(self):
+        self.pool.shutdown()
+
+    def _generate(self, environment):
+        if self.model:
+            return generate_diff(environment=environment, goal=self.goal, model=self.model)
+        return generate_diff(environment=environment, goal=self.goal)
+
+    def _build(self, diff_text):
+        """
+        Applies one diff to a private copy of the files and scores the result.
+        """
+        # Exact hunks apply locally; only files that do not match go through smartapply.
+        files, methods = apply_diff(diff_text, self.files, cache=self.patch_cache)
+        failed = [f"{path} {method}" for path, method in methods.items() if method.startswith("failed")]
+        if failed:
+            return Candidate(diff_text, None, error="; ".join(failed))
+        if self.entry not in files:
+            return Candidate(diff_text, files, error=f"{self.entry} missing after apply")
+        result = run_candidate(files, self.entry, self.timeout)
+        return Candidate(diff_text, files, result, self.scorer(result))
+
+    def step(self):
+        """
+        Runs one generation; returns the candidates best first. The current files are
+        replaced only if the best candidate scores higher.
+        """
+        environment = self.builder.build(self.files)
+        start = time.perf_counter()
+        diff_futures = [self.pool.submit(self._generate, environment) for _ in range(self.candidates)]
+        build_futures = {}
+        for future in as_completed(diff_futures):
+            try:
+                diff_text = future.result()
+            except Exception as e:
+                print(f"generate_diff failed: {e}")
+                continue
+            build_futures[self.pool.submit(self._build, diff_text)] = diff_text
+        candidates = []
+        for future, diff_text in build_futures.items():
+            try:
+                candidates.append(future.result())
+            except Exception as e:
+                # One candidate failing to apply, run or score must not end the generation.
+                candidates.append(Candidate(diff_text, None, error=f"build failed: {e!r}"))
+        candidates.sort(key=lambda c: -c.score)
+        elapsed = time.perf_counter() - start
+
+        generation = len(self.history) + 1
+        for i, candidate in enumerate(candidates):
+            status = candidate.error or (
+                "timed out" if candidate.result["timed_out"] else f"exit {candidate.result['returncode']}")
+            print(f"  candidate {i + 1}: score {candidate.score:.1f} ({status})")
+        improved = bool(candidates) and candidates[0].score > self.score
+        if improved:
+            self.files = candidates[0].files
+            self.score = candidates[0].score
+        print(f"Generation {generation}: {len(candidates)} candidates in {elapsed:.1f}s, "
+              f"best {candidates[0].score if candidates else float('-inf'):.1f}, "
+              f"{'kept' if improved else 'no improvement over'} current {self.score:.1f}")
+        self.history.append(candidates)
+        return candidates
+
+    def run(self, generations):
+        for _ in range(generations):
+            self.step()
+        return self.files
+
+def main():
+    parser = argparse.ArgumentParser(description="Evolve world.py with K concurrent candidate diffs per generation")
+    parser.add_argument("--goal", default="Enhance the World class with richer environmental and population dynamics, and report them")
+    parser.add_argument("--generations", type=int, default=3)
+    parser.add_argument("--candidates", type=int, default=4)
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--timeout", type=float, default=10, help="Seconds each candidate world may run")
+    parser.add_argument("--dry-run", action="store_true", help="Do not write the winning files back")
+    args = parser.parse_args()
+
+    files = load_codebase()
+    evolver = ParallelEvolver(files, args.goal, candidates=args.candidates, model=args.model, timeout=args.timeout)
+    print(f"Starting score: {evolver.score:.1f}")
+    try:
+        best = evolver.run(args.generations)
+    finally:
+        evolver.close()
+
+    if best == files:
+        print("World unchanged.")
+    elif args.dry_run:
+        print(f"Dry run: the best world scored {evolver.score:.1f}, not written.")
+    else:
+        for path, content in best.items():
+            with open(path, "w") as f:
+                f.write(content)
+        print(f"Wrote the best world (score {evolver.score:.1f}) to {', '.join(best)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Multi-core world simulation over shared memory.
+
+The state of all worlds (temperature, sea level, population) lives in
+multiprocessing.shared_memory blocks. Each worker process attaches to them by
+name and evolves its own contiguous shard in place through a WorldBatch view
+(see world_batch.py), so no world state is ever pickled.
+
+  - RNG: one numpy SeedSequence is spawned into a child stream per shard, so a
+    run is reproducible for a given seed and worker count.
+  - Epochs: after every epoch each worker writes its shard's partial sums and
+    event counts into a shared stats block and waits on a Barrier shared with
+    the parent, which sums the shards and reports that epoch. The barrier has a
+    timeout, so a worker that dies without aborting it fails the run instead
+    of hanging it.
+
+Usage:
+  python parallel_world.py --worlds 4000000 --epochs 100 --workers 4 --seed 1
+  python parallel_world.py --scaling --worlds 4000000 --epochs 50
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from world_batch import EVENTS, WorldBatch
+
+FIELDS = [("temperature", np.float64), ("sea_level", np.float64), ("population", np.int64)]
+# Per worker per epoch: worlds, sum and sum of squares of temperature, sum of sea level, sum of population, extinct,
+# then the worker's event counts so far, one column per event.
+STATS = ["worlds", "temperature_sum", "temperature_sq", "sea_level_sum", "population_sum", "extinct"]
+EVENT_STATS = [f"events_{name}" for name in EVENTS]
+# Seconds the parent and workers wait at the end-of-epoch barrier before giving up.
+BARRIER_TIMEOUT = 120.0
+
+def _attach(name, shape, dtype):
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+def _worker(index, bounds, names, worlds, epochs, seed_seq, events, barrier):
+    blocks, arrays = [], {}
+    for field, dtype in FIELDS:
+        block, array = _attach(names[field], (worlds,), dtype)
+        blocks.append(block)
+        arrays[field] = array
+    stats_block, stats = _attach(names["stats"], (epochs, len(bounds), len(STATS) + len(EVENT_STATS)), np.float64)
+    blocks.append(stats_block)
+    batch = None
+    try:
+        lo, hi = bounds[index]
+        batch = WorldBatch.from_arrays(
+            arrays["temperature"][lo:hi], arrays["sea_level"][lo:hi], arrays["population"][lo:hi],
+            rng=np.random.default_rng(seed_seq), events=events,
+        )
+        for epoch in range(epochs):
+            batch.evolve()
+            temperature = batch.temperature
+            stats[epoch, index] = (
+                hi - lo,
+                temperature.sum(),
+                np.dot(temperature, temperature),
+                batch.sea_level.sum(),
+                batch.population.sum(),
+                np.count_nonzero(batch.population == 0),
+                *batch.event_counts,
+            )
+            barrier.wait()
+    except Exception:
+        barrier.abort()
+        raise
+    finally:
+        del arrays, stats, batch
+        for block in blocks:
+            block.close()
+
+def _aggregate(rows, events=False):
+    totals = dict(zip(STATS + EVENT_STATS, rows.sum(axis=0)))
+    n = totals["worlds"]
+    mean_temperature = totals["temperature_sum"] / n
+    return {
+        "temperature_mean": mean_temperature,
+        "temperature_std": max(totals["temperature_sq"] / n - mean_temperature ** 2, 0.0) ** 0.5,
+        "sea_level_mean": totals["sea_level_sum"] / n,
+        "population_mean": totals["population_sum"] / n,
+        "extinct": int(totals["extinct"]),
+        **({"events": {name: int(totals[f"events_{name}"]) for name in EVENTS}} if events else {}),
+    }
+
+def run(worlds, epochs, workers=None, seed=None, events=False, report_every=0, temperature=20.0, sea_level=0.0,
+        population=1000, barrier_timeout=BARRIER_TIMEOUT):
+    """
+    Simulates `worlds` worlds for `epochs` epochs on `workers` processes.
+    Returns (per-epoch aggregate stats, final state arrays copied out of shared memory).
+    With events, each epoch's stats include the event totals over all worlds so far.
+    """
+    workers = workers or os.cpu_count()
+    workers = max(1, min(workers, worlds))
+    edges = np.linspace(0, worlds, workers + 1, dtype=np.int64)
+    bounds = [(int(edges[i]), int(edges[i + 1])) for i in range(workers)]
+    seed_seqs = np.random.SeedSequence(seed).spawn(workers)
+
+    blocks, names = [], {}
+    try:
+        for field, dtype in FIELDS:
+            block = shared_memory.SharedMemory(create=True, size=worlds * np.dtype(dtype).itemsize)
+            blocks.append(block)
+            names[field] = block.name
+            np.ndarray((worlds,), dtype=dtype, buffer=block.buf)[:] = {
+                "temperature": temperature, "sea_level": sea_level, "population": population}[field]
+        columns = len(STATS) + len(EVENT_STATS)
+        stats_block = shared_memory.SharedMemory(create=True, size=epochs * workers * columns * 8)
+        blocks.append(stats_block)
+        names["stats"] = stats_block.name
+        stats = np.ndarray((epochs, workers, columns), dtype=np.float64, buffer=stats_block.buf)
+
+        barrier = mp.Barrier(workers + 1, timeout=barrier_timeout)
+        processes = [
+            mp.Process(target=_worker, args=(i, bounds, names, worlds, epochs, seed_seqs[i], events, barrier))
+            for i in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        history = []
+        try:
+            for epoch in range(epochs):
+                barrier.wait()
+                history.append(_aggregate(stats[epoch], events))
+                if report_every and (epoch + 1) % report_every == 0:
+                    h = history[-1]
+                    print(f"Epoch {epoch + 1}: Temp {h['temperature_mean']:.2f}°C ± {h['temperature_std']:.2f}, "
+                          f"Sea Level {h['sea_level_mean']:.3f}m, Population {h['population_mean']:.1f}, "
+                          f"{h['extinct']:,} extinct"
+                          + ("; events " + ", ".join(f"{name} {count:,}" for name, count in h["events"].items())
+                             if events else ""))
+        except threading.BrokenBarrierError:
+            exits = {i: process.exitcode for i, process in enumerate(processes) if process.exitcode is not None}
+            raise RuntimeError(f"simulation workers did not all reach the end of an epoch within {barrier_timeout}s"
+                               + (f" (exit codes by worker: {exits})" if exits else ""))
+        finally:
+            for process in processes:
+                process.join()
+        final = {field: np.ndarray((worlds,), dtype=dtype, buffer=block.buf).copy()
+                 for (field, dtype), block in zip(FIELDS, blocks)}
+        del stats
+        return history, final
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+def scaling_benchmark(worlds, epochs, max_workers=None, seed=None):
+    """
+    Runs the same simulation on 1, 2, 4, ... max_workers processes and prints throughput and speedup.
+    """
+    max_workers = max_workers or os.cpu_count()
+    counts = sorted({min(2 ** i, max_workers) for i in range(max_workers.bit_length() + 1)})
+    baseline = None
+    for count in counts:
+        start = time.perf_counter()
+        run(worlds, epochs, workers=count, seed=seed)
+        elapsed = time.perf_counter() - start
+        rate = worlds * epochs / elapsed
+        baseline = baseline or rate
+        print(f"{count:>3} workers: {elapsed:6.2f}s, {rate:,.0f} world-steps/s, speedup {rate / baseline:.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate many worlds across processes with shared memory")
+    parser.add_argument("--worlds", type=int, default=1_000_000)
+    parser.add_argument("--epochs", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=None, help="Default: one per CPU")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--events", action="store_true")
+    parser.add_argument("--report-every", type=int, default=10)
+    parser.add_argument("--barrier-timeout", type=float, default=BARRIER_TIMEOUT,
+                        help="Seconds to wait for all workers at the end of an epoch")
+    parser.add_argument("--scaling", action="store_true", help="Benchmark 1..N workers")
+    args = parser.parse_args()
+
+    if args.scaling:
+        scaling_benchmark(args.worlds, args.epochs, args.workers, args.seed)
+        return
+    start = time.perf_counter()
+    history, final = run(args.worlds, args.epochs, args.workers, args.seed, args.events, args.report_every,
+                         barrier_timeout=args.barrier_timeout)
+    print(f"{args.worlds * args.epochs:,} world-steps in {time.perf_counter() - start:.2f}s; "
+          f"final population mean {final['population'].mean():.1f}")
+
+if __name__ == "__main__":
+    main()
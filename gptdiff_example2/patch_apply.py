@@ -0,0 +1,261 @@
+"""
+Per-file, parallel patch application for gptdiff workflows.
+
+smartapply(diff_text, files) sends the whole diff through the model-assisted
+apply in one pass. apply_diff() instead:
+
+  1. splits the unified diff into one patch per file
+  2. applies the per-file patches concurrently on a thread pool
+  3. for each file, tries a fast local apply first: every hunk's old lines must
+     match exactly, at the line the hunk names or at a single other place in
+     the file
+  4. only falls back to smartapply for files whose hunks do not match exactly
+  5. caches each result under (hash of the file, hash of its patch), so reruns
+     of the same diff on the same files are free
+
+Usage:
+  python patch_apply.py changes.diff [--dry-run]
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from gptdiff import smartapply
+
+HUNK_HEADER_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".patch_cache")
+
+class PatchError(Exception):
+    pass
+
+def _strip_prefix(path):
+    path = path.split("\t")[0].strip()
+    if path.startswith(("a/", "b/")):
+        return path[2:]
+    return path
+
+def split_diff(diff_text):
+    """
+    Returns {path: patch text} with one unified-diff patch per file. Deleted files
+    map their old path; new files their new path.
+    """
+    patches = {}
+    path, lines = None, []
+    old_path = None
+
+    def flush():
+        if path is not None and lines:
+            patches[path] = patches.get(path, "") + "".join(lines)
+
+    all_lines = diff_text.splitlines(keepends=True)
+    for index, line in enumerate(all_lines):
+        if line.startswith("diff --git "):
+            flush()
+            path, lines, old_path = None, [], None
+            continue
+        # A file header is a "--- " line, then "+++ ", then a hunk header (or the end of the diff).
+        if (line.startswith("--- ") and index + 1 < len(all_lines) and all_lines[index + 1].startswith("+++ ")
+                and (index + 2 >= len(all_lines) or all_lines[index + 2].startswith(("@@", "diff ")))):
+            flush()
+            old_path = _strip_prefix(line[4:])
+            path, lines = None, [line]
+            continue
+        if line.startswith("+++ ") and path is None and lines and lines[-1].startswith("--- "):
+            new_path = _strip_prefix(line[4:])
+            path = old_path if new_path == "/dev/null" else new_path
+            lines.append(line)
+            continue
+        if path is not None:
+            lines.append(line)
+    flush()
+    return patches
+
+def parse_hunks(patch):
+    """
+    Returns [(old_start, old_lines, new_lines)] for the hunks of one file's patch.
+    Line counts in hunk headers are ignored, since generated diffs often get them
+    wrong; old_start is None for bare "@@ ... @@" headers.
+    """
+    hunks = []
+    current = None
+    for line in patch.splitlines(keepends=True):
+        if line.startswith("@@"):
+            match = HUNK_HEADER_RE.match(line)
+            current = (int(match.group(1)) if match else None, [], [])
+            hunks.append(current)
+            continue
+        if current is None:
+            # File header lines before the first hunk.
+            continue
+        if line.startswith("\\"):
+            # "\ No newline at end of file" applies to the previous line.
+            for block in (current[1], current[2]):
+                if block and block[-1].endswith("\n"):
+                    block[-1] = block[-1][:-1]
+            continue
+        tag, text = line[:1], line[1:]
+        if not line.endswith("\n"):
+            text += "\n"
+        if tag in (" ", "\n"):
+            text = text if tag == " " else "\n"
+            current[1].append(text)
+            current[2].append(text)
+        elif tag == "-":
+            current[1].append(text)
+        elif tag == "+":
+            current[2].append(text)
+    return hunks
+
+def _find_block(lines, block, hint):
+    if hint >= 0 and lines[hint:hint + len(block)] == block:
+        return hint
+    matches = [i for i in range(len(lines) - len(block) + 1) if lines[i:i + len(block)] == block]
+    if len(matches) != 1:
+        raise PatchError(f"hunk context {'not found' if not matches else 'is ambiguous'}")
+    return matches[0]
+
+def apply_exact(content, patch):
+    """
+    Applies a file's patch locally. Raises PatchError unless every hunk matches exactly.
+    Returns the new content, or None if the patch deletes the file.
+    """
+    if re.search(r"^\+\+\+ /dev/null", patch, re.MULTILINE):
+        return None
+    hunks = parse_hunks(patch)
+    if not hunks:
+        raise PatchError("no hunks")
+    lines = (content or "").splitlines(keepends=True)
+    # Net lines added by earlier hunks, so later hunks know where to look first.
+    delta = 0
+    for old_start, old_lines, new_lines in hunks:
+        if old_lines:
+            position = _find_block(lines, old_lines, old_start - 1 + delta if old_start else -1)
+        elif old_start is None:
+            raise PatchError("insertion without a line number")
+        else:
+            # Pure insertion: "@@ -N,0" inserts after line N.
+            position = old_start + delta
+        lines[position:position + len(old_lines)] = new_lines
+        delta += len(new_lines) - len(old_lines)
+    return "".join(lines)
+
+class PatchCache:
+    """
+    Results keyed by (file hash, patch hash), one small file per entry.
+    """
+
+    def __init__(self, directory=CACHE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(content, patch):
+        file_hash = hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+        patch_hash = hashlib.sha256(patch.encode("utf-8")).hexdigest()
+        return hashlib.sha256((file_hash + patch_hash).encode("ascii")).hexdigest()
+
+    def get(self, key):
+        path = os.path.join(self.directory, key)
+        if not os.path.exists(path):
+            return None, False
+        with open(path, "rb") as f:
+            data = f.read()
+        if data == b"\x00deleted":
+            return None, True
+        return data.decode("utf-8"), True
+
+    def put(self, key, result):
+        fd, tmp = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, "wb") as f:
+            f.write(b"\x00deleted" if result is None else result.encode("utf-8"))
+        os.replace(tmp, os.path.join(self.directory, key))
+
+def apply_file(path, content, patch, cache=None):
+    """
+    Applies one file's patch; returns (new content or None if deleted, method).
+    method is "cache", "exact" or "smartapply". Raises PatchError if smartapply
+    does not return the file; failures are not cached.
+    """
+    key = PatchCache.key(content, patch) if cache else None
+    if cache:
+        result, hit = cache.get(key)
+        if hit:
+            return result, "cache"
+    try:
+        result, method = apply_exact(content, patch), "exact"
+    except PatchError:
+        original = {path: content} if content is not None else {}
+        updated = smartapply(patch, original)
+        if path not in updated:
+            # Deletions are handled by apply_exact; a missing file here means smartapply failed.
+            raise PatchError(f"smartapply returned no content for {path}")
+        result, method = updated[path], "smartapply"
+    if cache:
+        cache.put(key, result)
+    return result, method
+
+def apply_diff(diff_text, files, workers=8, cache=None, executor=None):
+    """
+    Applies a multi-file unified diff to a files dict, one file per task.
+    Returns (new files dict, {path: method}); files the diff deletes are dropped.
+    Pass cache=PatchCache() to reuse results across runs.
+    """
+    patches = split_diff(diff_text)
+    updated = dict(files)
+    methods = {}
+    if not patches:
+        return updated, methods
+
+    def job(item):
+        path, patch = item
+        try:
+            return path, apply_file(path, files.get(path), patch, cache)
+        except Exception as e:
+            return path, (files.get(path), f"failed: {e}")
+
+    if executor is not None:
+        results = list(executor.map(job, patches.items()))
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(patches))) as pool:
+            results = list(pool.map(job, patches.items()))
+    for path, (content, method) in results:
+        methods[path] = method
+        if content is None:
+            updated.pop(path, None)
+        else:
+            updated[path] = content
+    return updated, methods
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply a unified diff to the working directory, file by file")
+    parser.add_argument("diff")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.diff) as f:
+        diff_text = f.read()
+    files = {}
+    for path in split_diff(diff_text):
+        if os.path.exists(path):
+            with open(path) as f:
+                files[path] = f.read()
+    updated, methods = apply_diff(diff_text, files, args.workers, None if args.no_cache else PatchCache())
+    for path, method in methods.items():
+        print(f"{path}: {method}")
+        if args.dry_run or method.startswith("failed"):
+            continue
+        if path in updated:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "w") as f:
+                f.write(updated[path])
+        elif os.path.exists(path):
+            os.remove(path)
+
+if __name__ == "__main__":
+    main()
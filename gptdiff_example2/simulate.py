@@ -1,47 +1,60 @@
-from gptdiff import generate_diff, smartapply
+from gptdiff import generate_diff
+import argparse
 import os
 
-def load_codebase():
+from env_builder import EnvironmentBuilder
+from patch_apply import PatchCache, apply_diff
+
+def load_codebase(context_files=()):
     # Load the current codebase: here, the world.py file is the target for transformation.
+    # Extra files can be loaded as read-only context for the model.
     files = {}
-    with open("world.py", "r") as f:
-        files["world.py"] = f.read()
+    for path in ["world.py", *context_files]:
+        with open(path, "r") as f:
+            files[path] = f.read()
     return files
 
-def build_environment(files):
-    # Build an environment string that lists files and their content.
-    env = ""
-    for path, content in files.items():
-        env += f"File: {path}\nContent:\n{content}\n"
-    return env
-
 def main():
+    parser = argparse.ArgumentParser(description="Evolve world.py with gptdiff")
+    parser.add_argument("--steps", type=int, default=1, help="Number of evolution steps")
+    parser.add_argument("--context", nargs="*", default=[], help="Extra files to show the model")
+    parser.add_argument("--token-budget", type=int, default=8000, help="Budget for outlines of unchanged files")
+    args = parser.parse_args()
+
     print("Starting synthetic world evolution simulation...")
 
-    # Load initial codebase
-    files = load_codebase()
-    environment = build_environment(files)
-
-    print("Generating diff to enhance world simulation...")
-    # Generate a diff that modifies the evolve_world function to add resource boost and environmental events.
-    diff_text = generate_diff(
-        environment=environment,
-        goal='Enhance evolve_world by increasing resources and adding a random environmental event after initial processing',
-        model="o3-mini"
-    )
-    print("Generated diff:")
-    print(diff_text)
-
-    print("Applying diff using smartapply...")
-    # Apply the diff transformation to our codebase safely.
-    updated_files = smartapply(diff_text, files)
-
-    # Write the updated code back to world.py
-    with open("world.py", "w") as f:
-        f.write(updated_files["world.py"])
-
-    print("Transformed world.py content:")
-    print(updated_files["world.py"])
+    # Files the model has already seen unchanged are sent as outlines on later steps;
+    # world.py is the file the diff must edit, so it is always sent in full.
+    builder = EnvironmentBuilder(token_budget=args.token_budget, pinned=["world.py"])
+    patch_cache = PatchCache()
+
+    for step in range(1, args.steps + 1):
+        # Load initial codebase
+        files = load_codebase(args.context)
+        environment = builder.build(files)
+        print(f"Step {step}: {builder.describe()}")
+
+        print("Generating diff to enhance world simulation...")
+        # Generate a diff that modifies the evolve_world function to add resource boost and environmental events.
+        diff_text = generate_diff(
+            environment=environment,
+            goal='Enhance evolve_world by increasing resources and adding a random environmental event after initial processing',
+            model="o3-mini"
+        )
+        print("Generated diff:")
+        print(diff_text)
+
+        print("Applying diff...")
+        # Apply the diff file by file: exact hunks locally, smartapply for the rest.
+        updated_files, methods = apply_diff(diff_text, files, cache=patch_cache)
+        print("Applied:", ", ".join(f"{path} ({method})" for path, method in methods.items()))
+
+        # Write the updated code back to world.py
+        with open("world.py", "w") as f:
+            f.write(updated_files["world.py"])
+
+        print("Transformed world.py content:")
+        print(updated_files["world.py"])
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped trajectory recording for world simulations.
+
+A trajectory file is a fixed-size header followed by one record per epoch per
+world, in a NumPy structured dtype:
+
+    [HEADER_SIZE bytes: MAGIC + JSON {"version", "fields", "worlds", "epochs", "capacity"}, space-padded]
+    [capacity x worlds records of dtype [(field, type), ...]]
+
+TrajectoryWriter preallocates `chunk_epochs` epochs on disk and grows the file
+by another chunk whenever it fills up, so recording never holds more than the
+current epoch in RAM. The header's "epochs" is updated on flush/close.
+
+TrajectoryReader maps the file read-only: `reader["temperature"]` is a
+(epochs, worlds) view straight onto the file, so analysis touches only the
+pages it reads.
+
+Usage:
+  python trajectory.py record run.traj --worlds 10000 --epochs 1000 --seed 1
+  python trajectory.py summary run.traj
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+MAGIC = b"WTRJ"
+VERSION = 1
+HEADER_SIZE = 4096
+
+# Fields of World / WorldBatch.
+WORLD_FIELDS = {"temperature": "<f8", "sea_level": "<f8", "population": "<i8"}
+# Fields of the world_state dict returned by world.evolve_world().
+STATE_FIELDS = {"population": "<i8", "resources": "<i8", "event_count": "<i4"}
+
+def _write_header(f, header):
+    payload = MAGIC + json.dumps(header).encode("utf-8")
+    if len(payload) > HEADER_SIZE:
+        raise ValueError("trajectory header too large")
+    f.seek(0)
+    f.write(payload.ljust(HEADER_SIZE, b" "))
+
+def read_header(path):
+    with open(path, "rb") as f:
+        raw = f.read(HEADER_SIZE)
+    if not raw.startswith(MAGIC):
+        raise ValueError(f"{path} is not a trajectory file")
+    header = json.loads(raw[len(MAGIC):].decode("utf-8"))
+    if header["version"] != VERSION:
+        raise ValueError(f"Unsupported trajectory version {header['version']}")
+    return header
+
+class TrajectoryWriter:
+    """
+    Appends one epoch at a time to a memory-mapped trajectory file.
+    """
+
+    def __init__(self, path, fields=WORLD_FIELDS, worlds=1, chunk_epochs=1024):
+        self.path = path
+        self.fields = dict(fields)
+        self.dtype = np.dtype(list(self.fields.items()))
+        self.worlds = worlds
+        self.chunk_epochs = chunk_epochs
+        self.epochs = 0
+        self.capacity = 0
+        self._map = None
+        with open(path, "wb") as f:
+            _write_header(f, self._header())
+        self._grow()
+
+    def _header(self):
+        return {"version": VERSION, "fields": self.fields, "worlds": self.worlds,
+                "epochs": self.epochs, "capacity": self.capacity}
+
+    def _grow(self):
+        if self._map is not None:
+            self._map.flush()
+            del self._map
+        self.capacity += self.chunk_epochs
+        with open(self.path, "r+b") as f:
+            f.truncate(HEADER_SIZE + self.capacity * self.worlds * self.dtype.itemsize)
+        self._map = np.memmap(self.path, dtype=self.dtype, mode="r+", offset=HEADER_SIZE,
+                              shape=(self.capacity, self.worlds))
+
+    def append(self, **values):
+        """
+        Records one epoch: each field is a scalar or an array of length `worlds`.
+        """
+        if self.epochs == self.capacity:
+            self._grow()
+        row = self._map[self.epochs]
+        for name in self.fields:
+            row[name] = values[name]
+        self.epochs += 1
+
+    def record(self, world):
+        """
+        Records one epoch from a World, a WorldBatch or any object with the fields as attributes.
+        """
+        self.append(**{name: getattr(world, name) for name in self.fields})
+
+    def record_state(self, state):
+        """
+        Records one epoch from a world_state dict returned by world.evolve_world().
+        """
+        self.append(population=state["population"], resources=state["resources"], event_count=len(state["events"]))
+
+    def flush(self):
+        self._map.flush()
+        with open(self.path, "r+b") as f:
+            _write_header(f, self._header())
+
+    def close(self):
+        """
+        Flushes, trims unused preallocated epochs and writes the final header.
+        """
+        self._map.flush()
+        del self._map
+        self._map = None
+        self.capacity = self.epochs
+        with open(self.path, "r+b") as f:
+            f.truncate(HEADER_SIZE + self.capacity * self.worlds * self.dtype.itemsize)
+            _write_header(f, self._header())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class TrajectoryReader:
+    """
+    Read-only, zero-copy view of a trajectory file: reader[field] is an (epochs, worlds) array.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.header = read_header(path)
+        self.fields = self.header["fields"]
+        self.dtype = np.dtype(list(self.fields.items()))
+        self.worlds = self.header["worlds"]
+        self.epochs = self.header["epochs"]
+        if self.epochs:
+            self.records = np.memmap(path, dtype=self.dtype, mode="r", offset=HEADER_SIZE,
+                                     shape=(self.epochs, self.worlds))
+        else:
+            self.records = np.zeros((0, self.worlds), dtype=self.dtype)
+
+    def __getitem__(self, field):
+        return self.records[field]
+
+    def __len__(self):
+        return self.epochs
+
+    def epoch_means(self, field, chunk_epochs=4096):
+        """
+        Mean of a field across worlds for every epoch, reading chunk_epochs at a time.
+        """
+        column = self[field]
+        means = np.empty(self.epochs, dtype=np.float64)
+        for start in range(0, self.epochs, chunk_epochs):
+            means[start:start + chunk_epochs] = column[start:start + chunk_epochs].mean(axis=1)
+        return means
+
+def record_world(path, epochs, seed=None):
+    """
+    Runs the scalar World from world.py for `epochs` epochs, recording each one.
+    """
+    import random
+    from world import World
+
+    random.seed(seed)
+    world = World()
+    with TrajectoryWriter(path, WORLD_FIELDS, worlds=1) as writer:
+        for _ in range(epochs):
+            world.evolve()
+            writer.record(world)
+    return path
+
+def record_batch(path, worlds, epochs, seed=None, events=False):
+    """
+    Runs a WorldBatch (see world_batch.py) for `epochs` epochs, recording each one.
+    """
+    from world_batch import WorldBatch
+
+    batch = WorldBatch(worlds, seed=seed, events=events)
+    with TrajectoryWriter(path, WORLD_FIELDS, worlds=worlds) as writer:
+        for _ in range(epochs):
+            batch.evolve()
+            writer.record(batch)
+    return path
+
+def summarize(path):
+    reader = TrajectoryReader(path)
+    print(f"{path}: {reader.epochs:,} epochs x {reader.worlds:,} worlds, fields {', '.join(reader.fields)}")
+    for field in reader.fields:
+        means = reader.epoch_means(field)
+        if len(means):
+            print(f"  {field}: first epoch mean {means[0]:.2f}, last epoch mean {means[-1]:.2f}, "
+                  f"min {reader[field].min():.2f}, max {reader[field].max():.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and inspect world trajectories")
+    parser.add_argument("command", choices=["record", "summary"])
+    parser.add_argument("path")
+    parser.add_argument("--worlds", type=int, default=1, help="More than 1 records a WorldBatch")
+    parser.add_argument("--epochs", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--events", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        start = time.perf_counter()
+        if args.worlds > 1:
+            record_batch(args.path, args.worlds, args.epochs, args.seed, args.events)
+        else:
+            record_world(args.path, args.epochs, args.seed)
+        size = os.path.getsize(args.path)
+        print(f"Recorded {args.epochs:,} epochs x {args.worlds:,} worlds to {args.path} "
+              f"({size / 1e6:.1f} MB) in {time.perf_counter() - start:.2f}s")
+    summarize(args.path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Vectorized World simulation: many worlds at once, as a struct of NumPy arrays.
+
+WorldBatch holds temperature, sea level and population for `size` worlds in
+three arrays and evolves all of them per step with a seeded numpy Generator,
+using the update rules of World.evolve in world.py:
+
+    temperature += U(-0.5, 0.5)    sea_level += U(-0.1, 0.1)    population += trunc(U(-50, 50))
+
+With events=True, each world can also be hit by one random event per step
+(earthquake, drought, ...), drawn and applied for the whole batch at once from
+EVENTS.
+
+Unlike World.evolve, which lets population go negative, WorldBatch clamps
+population at zero after every step, so an extinct world stays extinct and
+summary() can count it.
+
+Usage:
+  python world_batch.py --worlds 1000000 --epochs 100 --seed 42 --events
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+# name: (probability per world per step, temperature change, sea level change, population factor)
+EVENTS = {
+    "earthquake": (0.002, 0.0, 0.0, 0.90),
+    "drought": (0.004, 0.8, -0.05, 0.97),
+    "storm": (0.010, -0.3, 0.02, 0.99),
+    "flood": (0.005, 0.0, 0.15, 0.95),
+    "heatwave": (0.006, 1.2, 0.01, 0.98),
+}
+
+class WorldBatch:
+    """
+    `size` independent worlds evolved together.
+    """
+
+    def __init__(self, size, seed=None, temperature=20.0, sea_level=0.0, population=1000, events=False):
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.temperature = np.full(size, temperature, dtype=np.float64)
+        self.sea_level = np.full(size, sea_level, dtype=np.float64)
+        self.population = np.full(size, population, dtype=np.int64)
+        self.epoch = 0
+        self.events = events
+        self.event_names = list(EVENTS)
+        # Row i of each table is event i; the last row is "no event".
+        table = np.array([EVENTS[name] for name in self.event_names] + [(0.0, 0.0, 0.0, 1.0)])
+        self._event_edges = np.cumsum(table[:-1, 0])
+        self._event_temperature = table[:, 1]
+        self._event_sea_level = table[:, 2]
+        self._event_population = table[:, 3]
+        self.event_counts = np.zeros(len(self.event_names), dtype=np.int64)
+
+    @classmethod
+    def from_arrays(cls, temperature, sea_level, population, rng, events=False):
+        """
+        Wraps existing arrays (e.g. views of shared memory) instead of allocating new ones.
+        They are updated in place.
+        """
+        batch = cls(0, events=events)
+        batch.size = len(temperature)
+        batch.rng = rng
+        batch.temperature, batch.sea_level, batch.population = temperature, sea_level, population
+        return batch
+
+    def _apply_events(self):
+        # One uniform draw per world picks its event (or none) by cumulative probability.
+        event = np.searchsorted(self._event_edges, self.rng.random(self.size), side="right")
+        self.event_counts += np.bincount(event, minlength=len(self.event_names) + 1)[:-1]
+        self.temperature += self._event_temperature[event]
+        self.sea_level += self._event_sea_level[event]
+        # In place, so batches over shared arrays (see from_arrays) stay shared.
+        self.population[:] = self.population * self._event_population[event]
+
+    def evolve(self, steps=1):
+        for _ in range(steps):
+            self.temperature += self.rng.uniform(-0.5, 0.5, self.size)
+            self.sea_level += self.rng.uniform(-0.1, 0.1, self.size)
+            self.population += np.trunc(self.rng.uniform(-50, 50, self.size)).astype(np.int64)
+            if self.events:
+                self._apply_events()
+            # Not in World.evolve: extinct worlds stay at zero (see the module docstring).
+            np.maximum(self.population, 0, out=self.population)
+            self.epoch += 1
+        return self
+
+    def summary(self):
+        """
+        Aggregate statistics across all worlds as a dict.
+        """
+        stats = {"epoch": self.epoch, "worlds": self.size, "extinct": int(np.count_nonzero(self.population == 0))}
+        for name in ("temperature", "sea_level", "population"):
+            values = getattr(self, name)
+            stats[name] = {
+                "mean": float(values.mean()),
+                "std": float(values.std()),
+                "min": float(values.min()),
+                "max": float(values.max()),
+            }
+        if self.events:
+            stats["events"] = dict(zip(self.event_names, self.event_counts.tolist()))
+        return stats
+
+    def report(self):
+        stats = self.summary()
+        t, s, p = stats["temperature"], stats["sea_level"], stats["population"]
+        lines = [
+            f"Epoch {stats['epoch']} across {stats['worlds']:,} worlds:",
+            f"  Temp: {t['mean']:.1f}°C ± {t['std']:.2f} (range {t['min']:.1f} to {t['max']:.1f})",
+            f"  Sea Level: {s['mean']:.2f}m ± {s['std']:.3f} (range {s['min']:.2f} to {s['max']:.2f})",
+            f"  Population: {p['mean']:.0f} ± {p['std']:.1f} (range {p['min']:.0f} to {p['max']:.0f}), "
+            f"{stats['extinct']:,} extinct",
+        ]
+        if self.events:
+            lines.append("  Events: " + ", ".join(f"{name} {count:,}" for name, count in stats["events"].items()))
+        return "\n".join(lines)
+
+def benchmark(worlds, epochs, seed=None):
+    """
+    Times the scalar World class against WorldBatch; returns world-steps per second for each.
+    """
+    from world import World
+
+    scalar_worlds = min(worlds, 1000)
+    population = [World() for _ in range(scalar_worlds)]
+    start = time.perf_counter()
+    for _ in range(epochs):
+        for w in population:
+            w.evolve()
+    scalar_rate = scalar_worlds * epochs / (time.perf_counter() - start)
+
+    batch = WorldBatch(worlds, seed=seed)
+    start = time.perf_counter()
+    batch.evolve(epochs)
+    batch_rate = worlds * epochs / (time.perf_counter() - start)
+
+    print(f"World (scalar, {scalar_worlds:,} worlds): {scalar_rate:,.0f} world-steps/s")
+    print(f"WorldBatch ({worlds:,} worlds): {batch_rate:,.0f} world-steps/s ({batch_rate / scalar_rate:,.0f}x)")
+    return scalar_rate, batch_rate
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate many worlds at once with NumPy")
+    parser.add_argument("--worlds", type=int, default=100_000)
+    parser.add_argument("--epochs", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--events", action="store_true", help="Enable random environmental events")
+    parser.add_argument("--report-every", type=int, default=0, help="Print a report every N epochs")
+    parser.add_argument("--benchmark", action="store_true", help="Compare against the scalar World class")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.worlds, args.epochs, args.seed)
+        return
+
+    batch = WorldBatch(args.worlds, seed=args.seed, events=args.events)
+    step = args.report_every or args.epochs
+    start = time.perf_counter()
+    while batch.epoch < args.epochs:
+        batch.evolve(min(step, args.epochs - batch.epoch))
+        print(batch.report())
+    print(f"{args.worlds * args.epochs:,} world-steps in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
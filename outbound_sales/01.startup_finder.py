@@ -1,169 +1,74 @@
-import json
-import requests
-import csv
-import re
-from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
+import asyncio
 from ai_agent_toolbox import Toolbox, XMLParser, XMLPromptFormatter
 from examples.util import anthropic_llm_call
+from funding_extract import LeadFilter
+from lead_store import DEFAULT_DB
+from pipeline import PipelineRun
+from qualify import qualify_stored_leads
+from sources import DEFAULT_SOURCES
 
-def scrape_techcrunch_funding():
-    """
-    Scrapes TechCrunch for funding announcements from the last ~30 days.
-    Returns a list of lead dictionaries:
-        {
-            "company_name": str,
-            "funding_round": str,
-            "funding_amount": float,
-            "announcement_date": datetime,
-            "company_url": str,
-            "article_url": str
-        }
-    """
-    leads = []
-    base_url = "https://techcrunch.com/tag/funding/"
-    response = requests.get(base_url)
-    if response.status_code != 200:
-        return []
-
-    soup = BeautifulSoup(response.text, "html.parser")
-    # Example parsing - TechCrunch layout changes frequently, so this is purely illustrative
-    article_blocks = soup.find_all("div", class_="post-block")
-    
-    for block in article_blocks:
-        # Extract article URL
-        link_tag = block.find("a", class_="post-block__title__link")
-        if not link_tag:
-            continue
-        article_url = link_tag["href"]
-        
-        # Extract article date
-        time_tag = block.find("time")
-        if time_tag and time_tag.has_attr("datetime"):
-            announcement_date_str = time_tag["datetime"]
-        else:
-            announcement_date_str = datetime.now().isoformat()
-        
-        # Convert article date to datetime object
-        announcement_date = datetime.fromisoformat(announcement_date_str.replace("Z", ""))
-        
-        # We’ll do a minimal check to see if it’s within 30 days
-        days_ago_30 = datetime.now() - timedelta(days=30)
-        if announcement_date < days_ago_30:
-            continue
-
-        # As a placeholder, we’ll guess the round and amount from text (not robust!)
-        # In a real scenario, you'd parse the article content or snippet carefully.
-        snippet = block.find("div", class_="post-block__content")
-        snippet_text = snippet.get_text(strip=True) if snippet else ""
-        
-        # Simple naive checks to mimic extracting round/amount
-        # Real-world usage: more sophisticated text extraction & NER
-        round_type = "Seed" if "Seed" in snippet_text else \
-                     "Series A" if "Series A" in snippet_text else \
-                     "Series B" if "Series B" in snippet_text else "Unknown"
-        
-        # Minimal attempt to find an amount: look for '$xx million' or '$xxM'
-        funding_amount = 0.0
-        match = re.search(r"\$(\d+(\.\d+)?)\s*(million|M)", snippet_text, re.IGNORECASE)
-        if match:
-            # E.g. $5 million => 5, $2.5M => 2.5
-            raw_amount = float(match.group(1))
-            # Convert "X million" or "X M" to numeric
-            funding_amount = raw_amount * 1_000_000
-        
-        # For company name, we might guess from the title
-        company_name = link_tag.get_text(strip=True)
-        # We can parse out extra text if the title is "Startup Foo raises..."
-        # For demonstration, we’ll keep the entire title as the company_name field.
-
-        # For a company URL, we’d typically have to parse the article itself.
-        # We'll just leave it blank or guess.
-        company_url = ""
+# Funding in the last 30 days, amount > $1M, round Seed / Series A / Series B
+LEAD_FILTER = LeadFilter(rounds=("Seed", "Series A", "Series B"), min_amount=1_000_000, days=30)
 
-        # Build the lead
-        lead = {
-            "company_name": company_name,
-            "funding_round": round_type,
-            "funding_amount": funding_amount,
-            "announcement_date": announcement_date,
-            "company_url": company_url,
-            "article_url": article_url
-        }
-        leads.append(lead)
-    return leads
-
-def filter_leads(leads):
-    """
-    Filters leads based on:
-      - Funding in last 30 days
-      - Funding amount > $1M
-      - Round type: Seed, Series A, or Series B
-    """
-    valid_rounds = {"Seed", "Series A", "Series B"}
-    cutoff_date = datetime.now() - timedelta(days=30)
-    filtered = []
-    for lead in leads:
-        if (lead["announcement_date"] >= cutoff_date and
-            lead["funding_amount"] > 1_000_000 and
-            lead["funding_round"] in valid_rounds):
-            filtered.append(lead)
-    return filtered
-
-def save_leads(leads):
-    """
-    Saves leads to a CSV with a timestamp, and also to a JSON backup of raw data.
-    """
-    now_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-    csv_filename = f"funded_leads_{now_str}.csv"
-    json_filename = f"funded_leads_{now_str}.json"
-    
-    # CSV
-    with open(csv_filename, mode="w", newline="", encoding="utf-8") as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(["company_name", "funding_round", "funding_amount", 
-                         "announcement_date", "company_url", "article_url"])
-        for lead in leads:
-            writer.writerow([
-                lead["company_name"],
-                lead["funding_round"],
-                lead["funding_amount"],
-                lead["announcement_date"].isoformat(),
-                lead["company_url"],
-                lead["article_url"]
-            ])
-    
-    # JSON
-    with open(json_filename, "w", encoding="utf-8") as jfile:
-        json.dump(leads, jfile, default=str, indent=2)
-
-    print(f"Saved {len(leads)} leads to {csv_filename} and {json_filename}")
+# Sources scraped by the agent tool, see sources.py. For example:
+#   [("techcrunch", {}), ("feed", {"url": "https://example.com/funding/feed/"}), ("html_dump", {"directory": "dumps"})]
+SOURCE_SPECS = DEFAULT_SOURCES
+# How long the agent tool waits for the first leads before answering.
+FIRST_RESULTS_TIMEOUT = 60
 
 # Now we integrate with the agent-style framework you provided.
 toolbox = Toolbox()
 
 # Let's add a tool to scrape TechCrunch funding
+_pipeline_run = None
+# Number of _pipeline_run's leads already returned by the tool.
+_reported = 0
+
 def scrape_funding_tool():
     """
-    Scrape TechCrunch for the latest funding news and filter them.
-    Returns a short text summary plus instructions for the next step.
+    Scrape the configured sources for the latest funding news and filter them.
+    Returns as soon as the first leads are stored; the other sources keep running
+    in the background, and each later call returns only the leads stored since the
+    previous one. A new scrape starts once a run has finished and all its leads
+    have been returned.
     """
-    raw_leads = scrape_techcrunch_funding()
-    filtered = filter_leads(raw_leads)
-    save_leads(filtered)  # This writes CSV & JSON
-    if not filtered:
-        return "No funding leads found matching criteria in the last 30 days."
+    global _pipeline_run, _reported
+    if _pipeline_run is None or (_pipeline_run.done and _reported == len(_pipeline_run.leads)):
+        _pipeline_run = PipelineRun(SOURCE_SPECS, lead_filter=LEAD_FILTER, days=LEAD_FILTER.days).start()
+        _reported = 0
+    leads, _reported = _pipeline_run.wait_new(_reported, FIRST_RESULTS_TIMEOUT)
+    status = "All sources finished." if _pipeline_run.done else "Still scraping other sources; call again for more."
+    print(_pipeline_run.report())
+    if not leads:
+        return f"No new funding leads matching criteria in the last 30 days yet. {status}"
     summary = [f"{idx+1}. {lead['company_name']} - {lead['funding_round']} - ${lead['funding_amount']}"
-               for idx, lead in enumerate(filtered)]
-    return "Found leads:\n" + "\n".join(summary)
+               for idx, lead in enumerate(leads)]
+    return f"Found new leads (saved to {DEFAULT_DB}):\n" + "\n".join(summary) + f"\n{status}"
+
+def qualify_leads_tool():
+    """
+    Score the stored leads that match the filter with the LLM, in batches, skipping
+    companies that already have a verdict. Returns the qualified leads, best first.
+    """
+    results = asyncio.run(qualify_stored_leads(lead_filter=LEAD_FILTER))
+    qualified = [(lead, verdict) for lead, verdict in results if verdict["qualified"]]
+    if not qualified:
+        return f"None of the {len(results)} scored leads qualified."
+    summary = [f"{idx+1}. {lead['company_name']} ({verdict['score']}/100) - {verdict['reason']}"
+               for idx, (lead, verdict) in enumerate(qualified)]
+    return f"Qualified leads ({len(qualified)} of {len(results)} scored):\n" + "\n".join(summary)
 
-print("Scraping funding", scrape_funding_tool())
-otneuh()
 toolbox.add_tool(
     name="scrape_funding",
     fn=scrape_funding_tool,
     args={},
-    description="Scrape TechCrunch for new funding announcements and filter them."
+    description="Scrape TechCrunch and other configured sources for new funding announcements and filter them."
+)
+toolbox.add_tool(
+    name="qualify_leads",
+    fn=qualify_leads_tool,
+    args={},
+    description="Score the scraped leads against our ideal customer profile and list the qualified ones."
 )
 
 parser = XMLParser(tag="tool")
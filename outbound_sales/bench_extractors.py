@@ -0,0 +1,94 @@
+"""
+Benchmark the HTML extraction backends in extractors.py on saved pages.
+
+Usage:
+    python bench_extractors.py [--listing page.html ...] [--article article.html ...] [--repeat 20] [--processes 4]
+
+Without saved pages, synthetic listing/article fixtures shaped like the
+TechCrunch markup are generated. Every installed backend is timed on the same
+pages, its output is checked against the bs4 reference, and article parsing
+is also timed through the process pool.
+"""
+
+import argparse
+import time
+
+from extractors import EXTRACTORS, get_extractor, parse_articles_parallel
+
+PAGE_URL = "https://techcrunch.com/tag/funding/"
+
+def synthetic_listing(blocks=20):
+    items = "".join(
+        f'<div class="post-block"><header><h2><a class="post-block__title__link" href="/2024/01/{i:02d}/startup-{i}-raises/">'
+        f"Startup {i} raises $1{i} million Series A</a></h2><time datetime=\"2024-01-{i % 28 + 1:02d}T10:00:00Z\"></time></header>"
+        f'<div class="post-block__content">Startup {i} announced a $1{i} million Series A led by Example Ventures.</div></div>'
+        for i in range(blocks)
+    )
+    nav = '<a href="/x">x</a>' * 50
+    return f"<html><head><title>Funding</title></head><body><nav>{nav}</nav>{items}</body></html>"
+
+def synthetic_article(i=0, paragraphs=30):
+    body = "".join(
+        f"<p>Paragraph {p} about the company, its market and the investors. "
+        f'<a href="https://twitter.com/startup{i}">@startup{i}</a></p>'
+        for p in range(paragraphs)
+    )
+    return (
+        "<html><body><header>" + '<a href="/nav">nav</a>' * 100 + "</header>"
+        f'<div class="article-content"><p><a href="https://startup{i}.com">Startup {i}</a> raised a $2{i}M Seed round.</p>{body}</div>'
+        "<footer>" + '<a href="/f">f</a>' * 50 + "</footer></body></html>"
+    )
+
+def load(paths):
+    pages = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            pages.append(f.read())
+    return pages
+
+def time_backend(extractor, listings, articles, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for html in listings:
+            extractor.parse_listing(html, PAGE_URL)
+        for i, html in enumerate(articles):
+            extractor.parse_article(html, f"{PAGE_URL}article-{i}")
+    elapsed = time.perf_counter() - start
+    return elapsed / (repeat * (len(listings) + len(articles)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML extraction backends")
+    parser.add_argument("--listing", nargs="*", default=[], help="Saved listing pages")
+    parser.add_argument("--article", nargs="*", default=[], help="Saved article pages")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--processes", type=int, default=4, help="Process pool size for the parallel run")
+    args = parser.parse_args()
+
+    listings = load(args.listing) or [synthetic_listing()]
+    articles = load(args.article) or [synthetic_article(i) for i in range(20)]
+    print(f"{len(listings)} listing page(s), {len(articles)} article page(s), {args.repeat} repeats")
+
+    reference = get_extractor("bs4")
+    expected = ([reference.parse_listing(html, PAGE_URL) for html in listings],
+                [reference.parse_article(html, f"{PAGE_URL}article-{i}") for i, html in enumerate(articles)])
+    for name in EXTRACTORS:
+        try:
+            extractor = get_extractor(name)
+        except ImportError:
+            print(f"{name:>10}: not installed")
+            continue
+        got = ([extractor.parse_listing(html, PAGE_URL) for html in listings],
+               [extractor.parse_article(html, f"{PAGE_URL}article-{i}") for i, html in enumerate(articles)])
+        per_page = time_backend(extractor, listings, articles, args.repeat)
+        status = "matches bs4" if got == expected else "DIFFERS from bs4"
+        print(f"{name:>10}: {per_page * 1000:.3f} ms/page ({1 / per_page:.0f} pages/s), {status}")
+
+    pages = [(html, f"{PAGE_URL}article-{i}") for i, html in enumerate(articles)] * args.repeat
+    start = time.perf_counter()
+    parse_articles_parallel(pages, processes=args.processes)
+    elapsed = time.perf_counter() - start
+    print(f"{'pool':>10}: {len(pages) / elapsed:.0f} articles/s with {args.processes} processes "
+          f"({get_extractor().name}, including pool startup)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Accuracy and throughput benchmark for funding_extract.py.
+
+Usage:
+    python bench_funding_extract.py [--repeat 2000]
+
+Runs a small labelled corpus of funding headlines/snippets through the legacy
+checks (the original `in` chain and "$X million" regex) and extract_funding,
+and reports accuracy and snippets/s.
+"""
+
+import argparse
+import re
+import time
+
+from funding_extract import extract_funding
+
+# (text, expected round, expected amount in USD)
+CORPUS = [
+    ("Acme raises $5 million Seed round to build robot chefs", "Seed", 5e6),
+    ("Foo lands $12M Series A led by Example Ventures", "Series A", 12e6),
+    ("Bar closes a $2.5 billion Series E at a $20B valuation", "Series E", 2.5e9),
+    ("Berlin's Baz secures €8 million in seed funding", "Seed", 8e6 * 1.08),
+    ("London fintech Qux raises £30m Series B", "Series B", 30e6 * 1.27),
+    ("Corge picks up $750k pre-seed to fix invoicing", "Pre-Seed", 750e3),
+    ("Grault raised twenty million dollars in a Series A", "Series A", 20e6),
+    ("Garply bags US$ 40 mn Series-C", "Series C", 40e6),
+    ("Waldo announces USD 15 million growth round", "Growth", 15e6),
+    ("Fred gets $1,200,000 bridge round from existing investors", "Bridge", 1.2e6),
+    ("Plugh raises $3.5bn in venture debt", "Debt", 3.5e9),
+    ("Xyzzy, which charges $5 per seat, raises $9M seed", "Seed", 9e6),
+    ("Thud secures a hundred million euros Series D", "Series D", 100e6 * 1.08),
+    ("Seed-stage Quux raises $4M from angels", "Seed", 4e6),
+    ("Corge extends its Series A-1 with $6 million", "Series A", 6e6),
+    ("Startup lays off 20% of staff after failed Series B talks", "Series B", 0.0),
+    ("Why founders should read their term sheets", "Unknown", 0.0),
+]
+
+def legacy(text):
+    round_type = "Seed" if "Seed" in text else \
+                 "Series A" if "Series A" in text else \
+                 "Series B" if "Series B" in text else "Unknown"
+    match = re.search(r"\$(\d+(\.\d+)?)\s*(million|M)", text, re.IGNORECASE)
+    return round_type, float(match.group(1)) * 1_000_000 if match else 0.0
+
+def accuracy(results):
+    rounds = sum(r == expected_round for (r, _), (_, expected_round, _) in zip(results, CORPUS))
+    amounts = sum(abs(a - expected_amount) < 1 for (_, a), (_, _, expected_amount) in zip(results, CORPUS))
+    return rounds / len(CORPUS), amounts / len(CORPUS)
+
+def throughput(fn, repeat):
+    texts = [text for text, _, _ in CORPUS] * repeat
+    start = time.perf_counter()
+    fn(texts)
+    return len(texts) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark funding extraction")
+    parser.add_argument("--repeat", type=int, default=2000, help="Copies of the corpus for throughput")
+    args = parser.parse_args()
+
+    texts = [text for text, _, _ in CORPUS]
+    candidates = {
+        "legacy": lambda batch: [legacy(text) for text in batch],
+        "extract_funding": lambda batch: [extract_funding(text) for text in batch],
+    }
+    for name, fn in candidates.items():
+        round_accuracy, amount_accuracy = accuracy(fn(texts))
+        rate = throughput(fn, args.repeat)
+        print(f"{name:>15}: rounds {round_accuracy:.0%}, amounts {amount_accuracy:.0%}, {rate:,.0f} snippets/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Persistent crawl state for the startup finder, kept in one SQLite file.
+
+  - http_cache: ETag / Last-Modified and body per URL, for conditional GETs.
+  - articles:   every article already parsed, with the lead extracted from it,
+                so later runs only open new articles.
+
+Leads themselves live in the same file, in the table managed by lead_store.py.
+"""
+
+import json
+import sqlite3
+from datetime import datetime
+
+from lead_store import DEFAULT_DB
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS http_cache (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    body TEXT,
+    fetched_at TEXT
+);
+CREATE TABLE IF NOT EXISTS articles (
+    article_url TEXT PRIMARY KEY,
+    lead_json TEXT NOT NULL,
+    parsed_at TEXT NOT NULL
+);
+"""
+
+def _lead_to_json(lead):
+    return json.dumps(lead, default=lambda v: v.isoformat() if isinstance(v, datetime) else str(v))
+
+def _lead_from_json(text):
+    lead = json.loads(text)
+    lead["announcement_date"] = datetime.fromisoformat(lead["announcement_date"])
+    return lead
+
+class CrawlStore:
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    # HTTP cache
+
+    def conditional_headers(self, url):
+        """
+        Returns If-None-Match / If-Modified-Since headers for a cached URL.
+        """
+        row = self.conn.execute("SELECT etag, last_modified FROM http_cache WHERE url = ?", (url,)).fetchone()
+        headers = {}
+        if row is not None:
+            if row["etag"]:
+                headers["If-None-Match"] = row["etag"]
+            if row["last_modified"]:
+                headers["If-Modified-Since"] = row["last_modified"]
+        return headers
+
+    def cached_body(self, url):
+        row = self.conn.execute("SELECT body FROM http_cache WHERE url = ?", (url,)).fetchone()
+        return row["body"] if row is not None else None
+
+    def save_response(self, url, etag, last_modified, body):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO http_cache (url, etag, last_modified, body, fetched_at) VALUES (?, ?, ?, ?, ?)",
+            (url, etag, last_modified, body, datetime.now().isoformat()),
+        )
+        self.conn.commit()
+
+    # Seen articles
+
+    def seen_article(self, article_url):
+        """
+        Returns the lead previously extracted from article_url, or None if it is new.
+        """
+        row = self.conn.execute("SELECT lead_json FROM articles WHERE article_url = ?", (article_url,)).fetchone()
+        return _lead_from_json(row["lead_json"]) if row is not None else None
+
+    def record_article(self, article_url, lead):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO articles (article_url, lead_json, parsed_at) VALUES (?, ?, ?)",
+            (article_url, _lead_to_json(lead), datetime.now().isoformat()),
+        )
+        self.conn.commit()
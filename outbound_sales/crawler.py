@@ -0,0 +1,229 @@
+"""
+Async crawler for the startup finder.
+
+Walks the TechCrunch funding tag listing page by page until the 30-day cutoff
+is reached and opens every article in parallel to fill in the company URL,
+funding round and amount from the article body.
+
+Connections are pooled in one httpx.AsyncClient. Requests to the same host
+are capped at `per_host_concurrency` in flight and spaced at least
+`delay` seconds apart, so the crawl stays polite however many articles it
+opens.
+
+HTML is parsed by the fastest installed backend from extractors.py; with
+`parse_processes` set, article pages are parsed in a process pool so parsing
+does not stall the event loop on large crawls.
+
+With a CrawlStore (see crawl_store.py) listing pages are fetched with
+conditional GETs and articles parsed on an earlier run are not fetched again.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from urllib.parse import urljoin, urlparse
+
+import httpx
+
+from extractors import get_extractor, parse_article_job
+from funding_extract import extract_funding
+
+LISTING_URL = "https://techcrunch.com/tag/funding/"
+USER_AGENT = "Mozilla/5.0 (compatible; startup-finder/0.1)"
+
+def listing_page_url(base_url, page):
+    """
+    URL of the page-th listing page (1-based), using WordPress-style /page/N/ paths.
+    """
+    if page == 1:
+        return base_url
+    return urljoin(base_url if base_url.endswith("/") else base_url + "/", f"page/{page}/")
+
+class HostLimiter:
+    """
+    Per-host concurrency cap plus a minimum delay between request starts.
+    """
+
+    def __init__(self, concurrency, delay):
+        self.concurrency = concurrency
+        self.delay = delay
+        self._semaphores = {}
+        self._locks = {}
+        self._last_start = {}
+
+    async def __call__(self, host, send):
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.concurrency))
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with semaphore:
+            async with lock:
+                wait = self._last_start.get(host, 0.0) + self.delay - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._last_start[host] = time.monotonic()
+            return await send()
+
+class Crawler:
+    """
+    Crawls the funding listing and its articles with a shared, pooled httpx client.
+    """
+
+    def __init__(self, per_host_concurrency=4, delay=0.5, timeout=20.0, max_pages=20, retries=2, client=None, store=None,
+                 extractor=None, parse_processes=0):
+        self.store = store
+        self.extractor = get_extractor(extractor)
+        self.parse_pool = ProcessPoolExecutor(max_workers=parse_processes) if parse_processes else None
+        self.max_pages = max_pages
+        self.retries = retries
+        self.limiter = HostLimiter(per_host_concurrency, delay)
+        self.client = client or httpx.AsyncClient(
+            timeout=timeout,
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT},
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+        )
+
+    async def close(self):
+        await self.client.aclose()
+        if self.parse_pool:
+            self.parse_pool.shutdown()
+
+    async def parse_article(self, html, article_url):
+        if self.parse_pool is None:
+            return self.extractor.parse_article(html, article_url)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.parse_pool, parse_article_job, (self.extractor.name, html, article_url))
+
+    async def fetch(self, url, conditional=False):
+        """
+        Returns the response body, or None after non-200 responses/errors.
+        Retries 429 and 5xx responses with exponential backoff. With conditional=True
+        and a store, sends If-None-Match/If-Modified-Since and reuses the cached body on 304.
+        """
+        host = urlparse(url).hostname or ""
+        headers = self.store.conditional_headers(url) if conditional and self.store else {}
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self.limiter(host, lambda: self.client.get(url, headers=headers))
+            except httpx.HTTPError as e:
+                print(f"[crawler] {url}: {e}")
+                response = None
+            if response is not None and response.status_code == 304 and headers:
+                return self.store.cached_body(url)
+            if response is not None and response.status_code == 200:
+                if conditional and self.store:
+                    self.store.save_response(url, response.headers.get("ETag"), response.headers.get("Last-Modified"), response.text)
+                return response.text
+            if response is not None and response.status_code != 429 and response.status_code < 500:
+                print(f"[crawler] {url}: HTTP {response.status_code}")
+                return None
+            await asyncio.sleep(2 ** attempt)
+        return None
+
+    async def enrich(self, entry, snippet_round="Unknown", snippet_amount=0.0, lead_filter=None):
+        """
+        Turns a listing entry into a lead, using the article body for company URL,
+        round and amount and falling back to the values found in the listing snippet.
+        Articles already recorded in the store are returned from it without a request.
+        Returns None if lead_filter (see funding_extract.LeadFilter) rejects the lead.
+        """
+        lead = self.store.seen_article(entry["article_url"]) if self.store else None
+        if lead is None:
+            lead = {
+                "company_name": entry["title"],
+                "funding_round": snippet_round,
+                "funding_amount": snippet_amount,
+                "announcement_date": entry["announcement_date"],
+                "company_url": "",
+                "article_url": entry["article_url"],
+            }
+            html = await self.fetch(entry["article_url"])
+            if html is None:
+                return lead if lead_filter is None or lead_filter.accepts(lead) else None
+            details = await self.parse_article(html, entry["article_url"])
+            lead["company_url"] = details["company_url"]
+            if details["funding_round"] != "Unknown":
+                lead["funding_round"] = details["funding_round"]
+            if details["funding_amount"]:
+                lead["funding_amount"] = details["funding_amount"]
+            if self.store:
+                self.store.record_article(entry["article_url"], lead)
+        if lead_filter is not None and not lead_filter.accepts(lead):
+            return None
+        return lead
+
+    async def _enrich_or_skip(self, entry, snippet_round, snippet_amount, lead_filter):
+        """
+        enrich() that logs and skips the article instead of raising, so one bad
+        article does not end the crawl.
+        """
+        try:
+            return await self.enrich(entry, snippet_round, snippet_amount, lead_filter)
+        except Exception as e:
+            print(f"[crawler] {entry['article_url']}: enrich failed: {e!r}")
+            return None
+
+    async def iter_leads(self, base_url=LISTING_URL, days=30, lead_filter=None):
+        """
+        Async generator over leads in completion order. Pages through the listing until
+        an entry is older than the cutoff (or a page is empty), enriching each article
+        concurrently as soon as its listing page is parsed. With lead_filter, only qualifying
+        leads are yielded. Articles whose enrichment raises are logged and skipped;
+        closing the generator early cancels the articles still in flight.
+        """
+        cutoff = datetime.now() - timedelta(days=days)
+        pending = set()
+        seen = set()
+        try:
+            for page in range(1, self.max_pages + 1):
+                page_url = listing_page_url(base_url, page)
+                html = await self.fetch(page_url, conditional=True)
+                if html is None:
+                    break
+                entries = self.extractor.parse_listing(html, page_url)
+                if not entries:
+                    break
+                fresh = [entry for entry in entries
+                         if entry["announcement_date"] >= cutoff and entry["article_url"] not in seen]
+                seen.update(entry["article_url"] for entry in fresh)
+                for entry in fresh:
+                    funding_round, amount = extract_funding(entry["snippet"])
+                    pending.add(asyncio.create_task(self._enrich_or_skip(entry, funding_round, amount, lead_filter)))
+                # Hand back whatever finished while this page was being fetched.
+                done = {task for task in pending if task.done()}
+                pending -= done
+                for task in done:
+                    if task.result() is not None:
+                        yield task.result()
+                if any(entry["announcement_date"] < cutoff for entry in entries):
+                    break
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.result() is not None:
+                        yield task.result()
+        finally:
+            # The consumer stopped early or something raised: leave no articles in flight.
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def crawl(self, base_url=LISTING_URL, days=30, lead_filter=None):
+        """
+        Collects iter_leads() into a list.
+        """
+        return [lead async for lead in self.iter_leads(base_url, days, lead_filter)]
+
+async def crawl_funding_async(base_url=LISTING_URL, days=30, lead_filter=None, **crawler_options):
+    crawler = Crawler(**crawler_options)
+    try:
+        return await crawler.crawl(base_url, days, lead_filter)
+    finally:
+        await crawler.close()
+
+def crawl_funding(base_url=LISTING_URL, days=30, lead_filter=None, **crawler_options):
+    """
+    Synchronous entry point: returns the lead dicts for the last `days` days.
+    """
+    return asyncio.run(crawl_funding_async(base_url, days, lead_filter, **crawler_options))
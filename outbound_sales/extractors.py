@@ -0,0 +1,222 @@
+"""
+Pluggable HTML extraction for the startup finder.
+
+Each backend implements the same two DOM queries (listing blocks and article
+body/links) with CSS selectors prepared once per backend instance; the shared
+helpers below turn their raw results into listing entries and lead details,
+so every backend returns identical structures:
+
+  - "selectolax": lexbor-based, fastest (optional dependency)
+  - "lxml":       lxml.html with cssselect selectors compiled to XPath (optional)
+  - "bs4":        BeautifulSoup with html.parser, always available
+
+`get_extractor()` picks the fastest installed backend. For large crawls,
+`parse_articles_parallel` parses saved article pages in a process pool.
+"""
+
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from urllib.parse import urljoin, urlparse
+
+from funding_extract import extract_amount, extract_round
+
+LISTING_BLOCK = "div.post-block"
+LISTING_LINK = "a.post-block__title__link"
+LISTING_TIME = "time"
+LISTING_SNIPPET = "div.post-block__content"
+# Tried in order; the first match is treated as the article body.
+ARTICLE_BODY = ["div.article-content", "div.entry-content", "article", "body"]
+
+# Links in an article body that never point at the funded company.
+NON_COMPANY_HOSTS = (
+    "techcrunch.com", "twitter.com", "x.com", "facebook.com", "linkedin.com",
+    "crunchbase.com", "youtube.com", "instagram.com", "bit.ly", "t.co",
+)
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+def listing_entry(title, href, datetime_attr, snippet, page_url):
+    """
+    Builds a listing entry:
+        {"title": str, "article_url": str, "announcement_date": datetime, "snippet": str}
+    """
+    announcement_date_str = datetime_attr or datetime.now().isoformat()
+    return {
+        "title": title,
+        "article_url": urljoin(page_url, href),
+        "announcement_date": datetime.fromisoformat(announcement_date_str.replace("Z", "")).replace(tzinfo=None),
+        "snippet": snippet,
+    }
+
+def article_details(text, hrefs, article_url):
+    """
+    Builds {"company_url", "funding_round", "funding_amount"} from an article's body
+    text and the hrefs of its links. The company URL is the first external link that
+    is not a social/media site.
+    """
+    company_url = ""
+    article_host = urlparse(article_url).hostname or ""
+    for href in hrefs:
+        href = urljoin(article_url, href)
+        host = (urlparse(href).hostname or "").lower()
+        if not href.startswith(("http://", "https://")) or host == article_host:
+            continue
+        if any(host == h or host.endswith("." + h) for h in NON_COMPANY_HOSTS):
+            continue
+        company_url = href
+        break
+    return {
+        "company_url": company_url,
+        "funding_round": extract_round(text),
+        "funding_amount": extract_amount(text),
+    }
+
+class Bs4Extractor:
+    name = "bs4"
+
+    def __init__(self):
+        from bs4 import BeautifulSoup
+        self._soup = lambda html: BeautifulSoup(html, "html.parser")
+
+    def parse_listing(self, html, page_url):
+        entries = []
+        for block in self._soup(html).select(LISTING_BLOCK):
+            link = block.select_one(LISTING_LINK)
+            if link is None or not link.get("href"):
+                continue
+            time_tag = block.select_one(LISTING_TIME)
+            snippet = block.select_one(LISTING_SNIPPET)
+            entries.append(listing_entry(
+                link.get_text(strip=True),
+                link["href"],
+                time_tag.get("datetime") if time_tag else None,
+                snippet.get_text(strip=True) if snippet else "",
+                page_url,
+            ))
+        return entries
+
+    def parse_article(self, html, article_url):
+        soup = self._soup(html)
+        body = next((el for el in (soup.select_one(sel) for sel in ARTICLE_BODY) if el is not None), soup)
+        hrefs = [a["href"] for a in body.select("a[href]")]
+        return article_details(body.get_text(" ", strip=True), hrefs, article_url)
+
+class LxmlExtractor:
+    name = "lxml"
+
+    def __init__(self):
+        import lxml.html
+        from lxml.cssselect import CSSSelector
+        self._parse = lxml.html.fromstring
+        self._block = CSSSelector(LISTING_BLOCK)
+        self._link = CSSSelector(LISTING_LINK)
+        self._time = CSSSelector(LISTING_TIME)
+        self._snippet = CSSSelector(LISTING_SNIPPET)
+        self._bodies = [CSSSelector(sel) for sel in ARTICLE_BODY]
+        self._anchors = CSSSelector("a[href]")
+
+    @staticmethod
+    def _text(element):
+        return WHITESPACE_RE.sub(" ", element.text_content()).strip()
+
+    def parse_listing(self, html, page_url):
+        entries = []
+        for block in self._block(self._parse(html)):
+            links = self._link(block)
+            if not links or not links[0].get("href"):
+                continue
+            times = self._time(block)
+            snippets = self._snippet(block)
+            entries.append(listing_entry(
+                self._text(links[0]),
+                links[0].get("href"),
+                times[0].get("datetime") if times else None,
+                self._text(snippets[0]) if snippets else "",
+                page_url,
+            ))
+        return entries
+
+    def parse_article(self, html, article_url):
+        root = self._parse(html)
+        body = next((found[0] for found in (sel(root) for sel in self._bodies) if found), root)
+        hrefs = [a.get("href") for a in self._anchors(body)]
+        return article_details(self._text(body), hrefs, article_url)
+
+class SelectolaxExtractor:
+    name = "selectolax"
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self._parse = LexborHTMLParser
+
+    @staticmethod
+    def _text(node):
+        return WHITESPACE_RE.sub(" ", node.text(separator=" ")).strip()
+
+    def parse_listing(self, html, page_url):
+        entries = []
+        for block in self._parse(html).css(LISTING_BLOCK):
+            link = block.css_first(LISTING_LINK)
+            if link is None or not link.attributes.get("href"):
+                continue
+            time_tag = block.css_first(LISTING_TIME)
+            snippet = block.css_first(LISTING_SNIPPET)
+            entries.append(listing_entry(
+                self._text(link),
+                link.attributes["href"],
+                time_tag.attributes.get("datetime") if time_tag else None,
+                self._text(snippet) if snippet else "",
+                page_url,
+            ))
+        return entries
+
+    def parse_article(self, html, article_url):
+        tree = self._parse(html)
+        body = next((el for el in (tree.css_first(sel) for sel in ARTICLE_BODY) if el is not None), tree.root)
+        hrefs = [a.attributes.get("href") for a in body.css("a[href]")]
+        return article_details(self._text(body), hrefs, article_url)
+
+# Fastest first; get_extractor() uses the first one that imports.
+EXTRACTORS = {
+    "selectolax": SelectolaxExtractor,
+    "lxml": LxmlExtractor,
+    "bs4": Bs4Extractor,
+}
+
+_instances = {}
+
+def get_extractor(name=None):
+    """
+    Returns a (cached) extractor instance. With name=None, the fastest installed backend.
+    """
+    names = [name] if name else list(EXTRACTORS)
+    for candidate in names:
+        if candidate in _instances:
+            return _instances[candidate]
+        if candidate not in EXTRACTORS:
+            raise ValueError(f"Unknown extractor '{candidate}', expected one of {', '.join(EXTRACTORS)}")
+        try:
+            _instances[candidate] = EXTRACTORS[candidate]()
+        except ImportError:
+            if name:
+                raise
+            continue
+        return _instances[candidate]
+    raise ImportError("No HTML extractor backend is installed (need selectolax, lxml or beautifulsoup4)")
+
+def parse_article_job(job):
+    backend, html, article_url = job
+    return get_extractor(backend).parse_article(html, article_url)
+
+def parse_articles_parallel(pages, backend=None, processes=None, chunksize=8, executor=None):
+    """
+    Parses [(html, article_url)] in a process pool; returns details in input order.
+    Pass an existing executor to reuse worker processes across calls.
+    """
+    backend = get_extractor(backend).name
+    jobs = [(backend, html, url) for html, url in pages]
+    if executor is not None:
+        return list(executor.map(parse_article_job, jobs, chunksize=chunksize))
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return list(pool.map(parse_article_job, jobs, chunksize=chunksize))
@@ -0,0 +1,156 @@
+"""
+Funding round and amount extraction for the startup finder.
+
+  - Rounds are found with one precompiled alternation over every round name
+    and spelling ("pre-seed", "Series A", "series-b", "growth round", ...),
+    mapped to canonical names.
+  - Amounts follow a small grammar: currency ($, US$, €, £, USD/EUR/GBP, or
+    "dollars"/"euros"/"pounds" after the number), a number written with digits
+    ("2.5", "1,200") or words ("five", "twenty-two"), and an optional magnitude
+    (k/thousand, m/mn/million, b/bn/billion). Amounts are converted to USD.
+  - `extract_funding` extracts both from one snippet.
+  - `LeadFilter` holds the startup finder's lead criteria.
+
+There is no batched scan and no filtering fused into extraction. One regex
+pass over many joined snippets measured slower than matching each snippet, and
+a lead's round and amount can still change once its article is read, so
+filters apply to finished leads (LeadFilter.accepts, or in SQL through
+lead_store.LeadStore.query_filter).
+"""
+
+import re
+from datetime import datetime, timedelta
+
+# Canonical round name -> spellings (case-insensitive; "-" also matches a space or nothing).
+ROUNDS = {
+    "Pre-Seed": ["pre-seed"],
+    "Seed": ["seed round", "seed funding", "seed"],
+    **{f"Series {letter}": [f"series {letter}"] for letter in "ABCDEFGH"},
+    "Bridge": ["bridge round", "bridge funding"],
+    "Growth": ["growth round", "growth equity"],
+    "Debt": ["debt financing", "venture debt"],
+}
+
+# Approximate conversion rates to USD; pass `rates=` to override.
+RATES_TO_USD = {"USD": 1.0, "EUR": 1.08, "GBP": 1.27}
+
+CURRENCY_SYMBOLS = {"us$": "USD", "$": "USD", "usd": "USD", "dollars": "USD",
+                    "€": "EUR", "eur": "EUR", "euros": "EUR",
+                    "£": "GBP", "gbp": "GBP", "pounds": "GBP"}
+
+MAGNITUDES = {"k": 1e3, "thousand": 1e3,
+              "m": 1e6, "mn": 1e6, "mm": 1e6, "million": 1e6,
+              "b": 1e9, "bn": 1e9, "billion": 1e9}
+
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14,
+    "fifteen": 15, "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19, "twenty": 20,
+    "thirty": 30, "forty": 40, "fifty": 50, "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90,
+}
+
+def _spelling_pattern(spelling):
+    return r"[\s-]?".join(re.escape(part) for part in re.split(r"[\s-]+", spelling))
+
+# Longest spellings first so "seed round" wins over "seed" and "pre-seed" over "seed".
+_SPELLINGS = sorted(((spelling, name) for name, spellings in ROUNDS.items() for spelling in spellings),
+                    key=lambda item: -len(item[0]))
+# The lookahead on first letters lets the engine skip most positions without trying every spelling.
+_ROUND_FIRST_LETTERS = "".join(sorted({spelling[0] for spelling, _ in _SPELLINGS}))
+# "Seed-stage", "Series A-1": a trailing "-stage" or tranche number still names the round.
+_ROUND_SUFFIX = r"(?:-(?:stage|\d+))?"
+ROUND_RE = re.compile(
+    r"(?<![\w-])(?=[" + _ROUND_FIRST_LETTERS + r"])(?:" + "|".join(f"(?P<r{i}>{_spelling_pattern(s)})" for i, (s, _) in enumerate(_SPELLINGS)) + r")" + _ROUND_SUFFIX + r"(?![\w-])",
+    re.IGNORECASE,
+)
+_ROUND_BY_GROUP = {f"r{i}": name for i, (_, name) in enumerate(_SPELLINGS)}
+
+_WORD_NUMBER = (r"(?:(?:" + "|".join(sorted(NUMBER_WORDS, key=len, reverse=True)) + r")(?:[\s-](?:"
+                + "|".join(sorted(NUMBER_WORDS, key=len, reverse=True)) + r"|hundred))*)")
+_WORD_FIRST_LETTERS = "".join(sorted({word[0] for word in NUMBER_WORDS}))
+_NUMBER = r"(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?"
+_MAGNITUDE = r"(?:thousand|million|billion|mn|mm|bn|k|m|b)"
+_PREFIX = r"(?:US\$|\$|€|£|USD|EUR|GBP)"
+_SUFFIX = r"(?:dollars|euros|pounds|USD|EUR|GBP)"
+AMOUNT_RE = re.compile(
+    rf"(?P<pcur>{_PREFIX})\s?(?P<pnum>{_NUMBER}|{_WORD_NUMBER})(?:\s?(?P<pmag>{_MAGNITUDE}))?(?!\w)(?!\.\d)"
+    rf"|(?<![\w.$€£])(?=[\d{_WORD_FIRST_LETTERS}])(?P<snum>{_NUMBER}|{_WORD_NUMBER})\s?(?P<smag>{_MAGNITUDE})\s(?P<scur>{_SUFFIX})\b",
+    re.IGNORECASE,
+)
+
+def words_to_number(words):
+    """
+    'twenty-two' -> 22, 'a hundred' -> 100, 'one hundred fifty' -> 150.
+    """
+    total = 0
+    for word in re.split(r"[\s-]+", words.lower()):
+        if word == "hundred":
+            total = (total or 1) * 100
+        elif word in NUMBER_WORDS:
+            total += NUMBER_WORDS[word]
+    return float(total)
+
+def _amount_from_match(match, rates):
+    if match.group("pcur"):
+        currency, number, magnitude = match.group("pcur"), match.group("pnum"), match.group("pmag")
+    else:
+        currency, number, magnitude = match.group("scur"), match.group("snum"), match.group("smag")
+    if number[0].isdigit():
+        value = float(number.replace(",", ""))
+    else:
+        value = words_to_number(number)
+    if magnitude:
+        value *= MAGNITUDES[magnitude.lower()]
+    code = CURRENCY_SYMBOLS[currency.lower()]
+    return value * rates.get(code, 1.0), bool(magnitude)
+
+def _pick_amount(amounts):
+    # Prefer the first amount with a magnitude ("$5M") over bare numbers ("$5").
+    for value, has_magnitude in amounts:
+        if has_magnitude:
+            return value
+    return amounts[0][0] if amounts else 0.0
+
+def extract_round(text):
+    """
+    Canonical name of the first funding round mentioned in text, or "Unknown".
+    """
+    match = ROUND_RE.search(text)
+    return _ROUND_BY_GROUP[match.lastgroup] if match else "Unknown"
+
+def extract_amount(text, rates=RATES_TO_USD):
+    """
+    The funding amount mentioned in text, in USD (0.0 if none).
+    """
+    return _pick_amount([_amount_from_match(m, rates) for m in AMOUNT_RE.finditer(text)])
+
+def extract_funding(text, rates=RATES_TO_USD):
+    """
+    Returns (round, amount_usd) for one snippet.
+    """
+    return extract_round(text), extract_amount(text, rates)
+
+class LeadFilter:
+    """
+    The startup finder's lead criteria:
+      - announced in the last `days` days
+      - round in `rounds`
+      - amount (USD) above `min_amount`
+    """
+
+    def __init__(self, rounds=("Seed", "Series A", "Series B"), min_amount=1_000_000, days=30):
+        self.rounds = set(rounds)
+        self.min_amount = min_amount
+        self.days = days
+
+    @property
+    def cutoff(self):
+        return datetime.now() - timedelta(days=self.days)
+
+    def accepts(self, lead):
+        """
+        Checks an already-extracted lead dict.
+        """
+        return (lead["announcement_date"] >= self.cutoff and
+                lead["funding_amount"] > self.min_amount and
+                lead["funding_round"] in self.rounds)
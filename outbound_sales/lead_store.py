@@ -0,0 +1,242 @@
+"""
+Lead storage for the startup finder.
+
+Leads are written to SQLite as they stream out of the scraper, in small
+transactions, instead of being collected in memory and dumped per run. Rows
+are deduplicated by normalized company URL (when known) or normalized company
+name and refreshed in place.
+
+announcement_date, funding_round and funding_amount are indexed so that
+filters like filter_leads run as SQL (`query` / `query_filter`) instead of a
+Python loop, and CSV/JSONL exports stream rows from a cursor on demand.
+
+Usage:
+    python lead_store.py export [--format csv|jsonl] [-o FILE] [--round ROUND ...] [--min-amount N] [--days N]
+"""
+
+import argparse
+import csv
+import json
+import re
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+
+DEFAULT_DB = "startup_finder.db"
+
+LEAD_FIELDS = ["company_name", "funding_round", "funding_amount", "announcement_date", "company_url", "article_url"]
+
+# Legal suffixes dropped when normalizing company names.
+COMPANY_SUFFIXES = {"inc", "incorporated", "llc", "ltd", "limited", "corp", "corporation", "co", "gmbh", "sa", "ag", "plc"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leads (
+    id INTEGER PRIMARY KEY,
+    name_key TEXT NOT NULL,
+    url_key TEXT NOT NULL DEFAULT '',
+    company_name TEXT NOT NULL,
+    funding_round TEXT,
+    funding_amount REAL,
+    announcement_date TEXT,
+    company_url TEXT,
+    article_url TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS leads_name_key ON leads (name_key);
+CREATE INDEX IF NOT EXISTS leads_url_key ON leads (url_key);
+CREATE INDEX IF NOT EXISTS leads_announcement_date ON leads (announcement_date);
+CREATE INDEX IF NOT EXISTS leads_funding_round ON leads (funding_round, announcement_date);
+CREATE INDEX IF NOT EXISTS leads_funding_amount ON leads (funding_amount);
+"""
+
+def normalize_company_name(name):
+    """
+    'Acme, Inc.' and 'ACME Inc' both become 'acme'.
+    """
+    words = re.sub(r"[^a-z0-9]+", " ", name.lower()).split()
+    while len(words) > 1 and words[-1] in COMPANY_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+def normalize_company_url(url):
+    """
+    'https://www.acme.com/about' and 'http://acme.com' both become 'acme.com'.
+    """
+    if not url:
+        return ""
+    host = (urlparse(url if "//" in url else "//" + url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+def _row_to_lead(row):
+    lead = dict(zip(LEAD_FIELDS, row))
+    lead["announcement_date"] = datetime.fromisoformat(lead["announcement_date"])
+    return lead
+
+class LeadStore:
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def _find_lead(self, name_key, url_key):
+        if url_key:
+            row = self.conn.execute("SELECT id FROM leads WHERE url_key = ?", (url_key,)).fetchone()
+            if row is not None:
+                return row[0]
+        row = self.conn.execute("SELECT id, url_key FROM leads WHERE name_key = ?", (name_key,)).fetchone()
+        # Same name but a different known URL is a different company.
+        if row is not None and (not url_key or not row[1] or row[1] == url_key):
+            return row[0]
+        return None
+
+    def _write(self, lead, now):
+        """
+        Inserts or refreshes one lead; returns True if it was new.
+        """
+        name_key = normalize_company_name(lead["company_name"])
+        url_key = normalize_company_url(lead["company_url"])
+        values = [
+            lead["company_name"],
+            lead["funding_round"],
+            lead["funding_amount"],
+            lead["announcement_date"].isoformat(),
+            lead["company_url"],
+            lead["article_url"],
+        ]
+        lead_id = self._find_lead(name_key, url_key)
+        if lead_id is None:
+            self.conn.execute(
+                "INSERT INTO leads (name_key, url_key, company_name, funding_round, funding_amount, "
+                "announcement_date, company_url, article_url, first_seen, last_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [name_key, url_key] + values + [now, now],
+            )
+            return True
+        # Keep a known URL if this sighting did not have one.
+        self.conn.execute(
+            "UPDATE leads SET url_key = CASE WHEN ? != '' THEN ? ELSE url_key END, "
+            "company_name = ?, funding_round = ?, funding_amount = ?, announcement_date = ?, "
+            "company_url = CASE WHEN ? != '' THEN ? ELSE company_url END, article_url = ?, last_seen = ? "
+            "WHERE id = ?",
+            [url_key, url_key] + values[:4] + [values[4], values[4], values[5], now, lead_id],
+        )
+        return False
+
+    def append(self, leads, batch_size=100):
+        """
+        Writes leads from any iterable (e.g. a generator fed by the scraper), committing
+        every batch_size leads so nothing accumulates in memory.
+        Returns (inserted, updated) counts.
+        """
+        inserted = updated = pending = 0
+        now = datetime.now().isoformat()
+        try:
+            for lead in leads:
+                if self._write(lead, now):
+                    inserted += 1
+                else:
+                    updated += 1
+                pending += 1
+                if pending >= batch_size:
+                    self.conn.commit()
+                    pending = 0
+        finally:
+            self.conn.commit()
+        return inserted, updated
+
+    def query(self, rounds=None, min_amount=None, since=None, order_by="announcement_date DESC", limit=None, chunk_size=500):
+        """
+        Yields lead dicts matching the filters, evaluated by SQLite against the indexes.
+        Rows are fetched chunk_size at a time.
+        """
+        clauses, params = [], []
+        if rounds:
+            rounds = list(rounds)
+            clauses.append(f"funding_round IN ({', '.join('?' * len(rounds))})")
+            params.extend(rounds)
+        if min_amount is not None:
+            clauses.append("funding_amount > ?")
+            params.append(min_amount)
+        if since is not None:
+            clauses.append("announcement_date >= ?")
+            params.append(since.isoformat())
+        if order_by not in ("announcement_date DESC", "announcement_date", "funding_amount DESC", "funding_amount"):
+            raise ValueError(f"Unsupported order_by: {order_by}")
+        sql = f"SELECT {', '.join(LEAD_FIELDS)} FROM leads"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {order_by}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        cursor = self.conn.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            for row in rows:
+                yield _row_to_lead(row)
+
+    def query_filter(self, lead_filter, **options):
+        """
+        Pushes a funding_extract.LeadFilter down into query().
+        """
+        return self.query(rounds=lead_filter.rounds, min_amount=lead_filter.min_amount, since=lead_filter.cutoff, **options)
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM leads").fetchone()[0]
+
+    def export_csv(self, out, **query_options):
+        """
+        Streams matching leads to a file object as CSV; returns the number of rows written.
+        """
+        writer = csv.writer(out)
+        writer.writerow(LEAD_FIELDS)
+        written = 0
+        for lead in self.query(**query_options):
+            writer.writerow([lead[field].isoformat() if field == "announcement_date" else lead[field] for field in LEAD_FIELDS])
+            written += 1
+        return written
+
+    def export_jsonl(self, out, **query_options):
+        """
+        Streams matching leads to a file object as JSON Lines; returns the number of rows written.
+        """
+        written = 0
+        for lead in self.query(**query_options):
+            out.write(json.dumps(lead, default=str) + "\n")
+            written += 1
+        return written
+
+def main():
+    parser = argparse.ArgumentParser(description="Export leads from the startup finder database")
+    parser.add_argument("command", choices=["export"])
+    parser.add_argument("--db", default=DEFAULT_DB)
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    parser.add_argument("--round", action="append", dest="rounds", help="Funding round to include (repeatable)")
+    parser.add_argument("--min-amount", type=float, default=None)
+    parser.add_argument("--days", type=int, default=None, help="Only leads announced in the last N days")
+    args = parser.parse_args()
+
+    store = LeadStore(args.db)
+    since = datetime.now() - timedelta(days=args.days) if args.days is not None else None
+    out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    try:
+        export = store.export_csv if args.format == "csv" else store.export_jsonl
+        written = export(out, rounds=args.rounds, min_amount=args.min_amount, since=since)
+    finally:
+        if args.output:
+            out.close()
+        store.close()
+    print(f"Exported {written} leads", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
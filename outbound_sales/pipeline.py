@@ -0,0 +1,271 @@
+"""
+Multi-source lead pipeline for the startup finder.
+
+All sources (see sources.py) run concurrently and feed one queue. Every lead
+then goes through four stages:
+
+    normalize -> dedupe -> filter -> store
+
+  - normalize: tidies field types/whitespace and cuts the company name out of
+               headlines like "Acme raises $5M Series A"
+  - dedupe:    drops leads already seen in this run (same company URL or name)
+  - filter:    funding_extract.LeadFilter
+  - store:     batched lead_store.LeadStore.append; a batch is written as soon as
+               the queue runs dry, so the first leads are on disk quickly
+
+Each source and stage keeps its own StageStats (items in/out, errors, busy
+time), so a slow or failing source shows up in `Pipeline.report()`.
+
+`PipelineRun` runs a pipeline on a background thread; the agent tool uses it to
+answer as soon as the first leads are stored while the other sources finish,
+and to hand back only the leads stored since its previous answer.
+"""
+
+import asyncio
+import re
+import threading
+import time
+
+from crawl_store import CrawlStore
+from crawler import Crawler
+from lead_store import LeadStore, normalize_company_name, normalize_company_url
+from sources import build_sources
+
+# Headline verbs that end the company name: "Acme raises $5M" -> "Acme".
+HEADLINE_VERB_RE = re.compile(
+    r"\s+(?:raises|raised|lands|secures|closes|nabs|bags|snags|gets|grabs|pulls in|announces)\b.*$",
+    re.IGNORECASE,
+)
+WHITESPACE_RE = re.compile(r"\s+")
+
+_DONE = object()
+
+class StageStats:
+    """
+    Counters for one source or stage.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.received = 0
+        self.emitted = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.started = time.monotonic()
+
+    @property
+    def error_rate(self):
+        return self.errors / self.received if self.received else 0.0
+
+    @property
+    def throughput(self):
+        """
+        Items emitted per second of wall time since the stage started.
+        """
+        elapsed = time.monotonic() - self.started
+        return self.emitted / elapsed if elapsed > 0 else 0.0
+
+    def __str__(self):
+        return (f"{self.name:<40} in={self.received:<6} out={self.emitted:<6} errors={self.errors:<4} "
+                f"({self.error_rate:.1%}) {self.throughput:8.1f}/s busy={self.busy:.3f}s")
+
+def normalize_lead(lead):
+    lead = dict(lead)
+    name = WHITESPACE_RE.sub(" ", lead["company_name"]).strip()
+    lead["company_name"] = HEADLINE_VERB_RE.sub("", name) or name
+    lead["funding_round"] = lead.get("funding_round") or "Unknown"
+    lead["funding_amount"] = float(lead.get("funding_amount") or 0.0)
+    lead["announcement_date"] = lead["announcement_date"].replace(tzinfo=None)
+    lead["company_url"] = (lead.get("company_url") or "").strip()
+    lead["article_url"] = lead["article_url"].strip()
+    if not lead["company_name"]:
+        raise ValueError(f"lead without a company name: {lead['article_url']}")
+    return lead
+
+class Pipeline:
+    """
+    Runs sources concurrently into the normalize -> dedupe -> filter -> store stages.
+    Create it inside the event loop/thread that will run it (SQLite connections are per thread).
+    """
+
+    def __init__(self, sources, lead_filter=None, days=30, lead_store=None, crawler=None, batch_size=50,
+                 on_stored=None):
+        self.sources = sources
+        self.lead_filter = lead_filter
+        self.days = days
+        self.lead_store = lead_store
+        self.crawler = crawler
+        self.batch_size = batch_size
+        self.on_stored = on_stored
+        self.source_stats = [StageStats(source.label) for source in sources]
+        self.stage_stats = {name: StageStats(name) for name in ("normalize", "dedupe", "filter", "store")}
+        self._seen_urls = set()
+        self._seen_names = set()
+
+    async def _pump(self, source, stats, queue):
+        try:
+            async for lead in source.leads(self.crawler, self.days):
+                stats.received += 1
+                stats.emitted += 1
+                await queue.put(lead)
+        except Exception as e:
+            stats.errors += 1
+            print(f"[pipeline] source {source.label} failed: {e}")
+        finally:
+            await queue.put(_DONE)
+
+    def _stage(self, name, fn, lead):
+        """
+        Runs one stage on one lead; returns the lead to pass on, or None to drop it.
+        """
+        stats = self.stage_stats[name]
+        stats.received += 1
+        start = time.perf_counter()
+        try:
+            result = fn(lead)
+        except Exception as e:
+            stats.errors += 1
+            print(f"[pipeline] {name} failed for {lead.get('article_url')}: {e}")
+            result = None
+        stats.busy += time.perf_counter() - start
+        if result is not None:
+            stats.emitted += 1
+        return result
+
+    def _dedupe(self, lead):
+        url_key = normalize_company_url(lead["company_url"])
+        name_key = normalize_company_name(lead["company_name"])
+        if (url_key and url_key in self._seen_urls) or name_key in self._seen_names:
+            return None
+        if url_key:
+            self._seen_urls.add(url_key)
+        self._seen_names.add(name_key)
+        return lead
+
+    def _filter(self, lead):
+        return lead if self.lead_filter is None or self.lead_filter.accepts(lead) else None
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        stats = self.stage_stats["store"]
+        stats.received += len(batch)
+        start = time.perf_counter()
+        try:
+            self.lead_store.append(batch)
+            stats.emitted += len(batch)
+            if self.on_stored:
+                self.on_stored(batch)
+        except Exception as e:
+            stats.errors += len(batch)
+            print(f"[pipeline] store failed for {len(batch)} leads: {e}")
+        stats.busy += time.perf_counter() - start
+        batch.clear()
+
+    async def run(self):
+        """
+        Runs every source to completion; returns the number of leads stored.
+        """
+        owns_store = self.lead_store is None
+        owns_crawler = self.crawler is None
+        crawl_store = None
+        if owns_store:
+            self.lead_store = LeadStore()
+        if owns_crawler:
+            crawl_store = CrawlStore()
+            self.crawler = Crawler(store=crawl_store)
+        queue = asyncio.Queue(maxsize=self.batch_size * 4)
+        pumps = [asyncio.create_task(self._pump(source, stats, queue))
+                 for source, stats in zip(self.sources, self.source_stats)]
+        batch = []
+        remaining = len(pumps)
+        try:
+            while remaining:
+                lead = await queue.get()
+                if lead is _DONE:
+                    remaining -= 1
+                else:
+                    for name, fn in (("normalize", normalize_lead), ("dedupe", self._dedupe), ("filter", self._filter)):
+                        lead = self._stage(name, fn, lead)
+                        if lead is None:
+                            break
+                    if lead is not None:
+                        batch.append(lead)
+                if len(batch) >= self.batch_size or queue.empty():
+                    self._flush(batch)
+            self._flush(batch)
+        finally:
+            for pump in pumps:
+                pump.cancel()
+            if owns_crawler:
+                await self.crawler.close()
+                crawl_store.close()
+            if owns_store:
+                self.lead_store.close()
+        return self.stage_stats["store"].emitted
+
+    def report(self):
+        lines = ["Sources:"] + [f"  {stats}" for stats in self.source_stats]
+        lines += ["Stages:"] + [f"  {stats}" for stats in self.stage_stats.values()]
+        return "\n".join(lines)
+
+class PipelineRun:
+    """
+    Runs a Pipeline on a background thread with its own event loop. The caller can
+    wait for newly stored leads and read progress while it keeps running.
+    """
+
+    def __init__(self, source_specs=None, lead_filter=None, days=30, **pipeline_options):
+        self.source_specs = source_specs
+        self.lead_filter = lead_filter
+        self.days = days
+        self.pipeline_options = pipeline_options
+        self.pipeline = None
+        self.leads = []
+        self.error = None
+        self.finished = threading.Event()
+        self._changed = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="lead-pipeline", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _stored(self, batch):
+        with self._changed:
+            self.leads.extend(batch)
+            self._changed.notify_all()
+
+    def _run(self):
+        try:
+            sources = build_sources(self.source_specs) if self.source_specs else build_sources()
+            self.pipeline = Pipeline(sources, self.lead_filter, self.days, on_stored=self._stored, **self.pipeline_options)
+            asyncio.run(self.pipeline.run())
+        except Exception as e:
+            self.error = e
+            print(f"[pipeline] run failed: {e}")
+        finally:
+            with self._changed:
+                self.finished.set()
+                self._changed.notify_all()
+
+    def wait_new(self, cursor=0, timeout=None):
+        """
+        Blocks until leads beyond the first `cursor` are stored or the run ends.
+        Returns (leads stored after cursor, new cursor).
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: len(self.leads) > cursor or self.done, timeout)
+            return self.leads[cursor:], len(self.leads)
+
+    def wait(self, timeout=None):
+        self._thread.join(timeout)
+        with self._changed:
+            return list(self.leads)
+
+    @property
+    def done(self):
+        return self.finished.is_set()
+
+    def report(self):
+        return self.pipeline.report() if self.pipeline else "Pipeline not started"
@@ -0,0 +1,253 @@
+"""
+LLM lead qualification for the startup finder.
+
+Leads are scored in batches: one prompt carries `batch_size` leads as compact
+numbered lines and the model answers with a JSON array of verdicts, so 1,000
+leads take ~40 calls instead of 1,000. Batches run concurrently, capped at
+`concurrency` calls in flight and `requests_per_minute` call starts (the same
+HostLimiter the crawler uses per host).
+
+Verdicts are cached per company (normalized URL, else normalized name) and
+qualification criteria in the `lead_verdicts` table of startup_finder.db.
+Leads that already have a verdict are never sent again; changing CRITERIA
+re-scores everything.
+
+Usage:
+    python qualify.py [--batch-size 25] [--concurrency 4] [--rpm 30] [--model MODEL] [--limit N]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+repo_root = Path(__file__).parent.parent
+sys.path.append(str(repo_root))
+from common.inference_engine import llm_call
+
+from crawler import HostLimiter
+from lead_store import DEFAULT_DB, LeadStore, normalize_company_name, normalize_company_url
+
+CRITERIA = """A good lead is a startup that:
+- raised a Seed, Series A or Series B round recently, so it has budget and is hiring
+- sells software or a technology product (not a fund, bank, government body or non-profit)
+- is small enough that a founder or early executive still takes outbound meetings"""
+
+SYSTEM_PROMPT = f"""You qualify B2B sales leads from funding announcements.
+
+{CRITERIA}
+
+You get one lead per line: id | company | round | amount (USD) | announced | website.
+Reply with ONLY a JSON array, one object per lead, in any order:
+[{{"id": 0, "score": 0-100, "qualified": true|false, "reason": "at most 15 words"}}]"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lead_verdicts (
+    company_key TEXT NOT NULL,
+    criteria_hash TEXT NOT NULL,
+    company_name TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    qualified INTEGER NOT NULL,
+    reason TEXT,
+    model TEXT,
+    scored_at TEXT NOT NULL,
+    PRIMARY KEY (company_key, criteria_hash)
+);
+"""
+
+CRITERIA_HASH = hashlib.sha256(SYSTEM_PROMPT.encode("utf-8")).hexdigest()[:16]
+
+# Rough size of a token, for the usage estimate printed after a run.
+CHARS_PER_TOKEN = 4
+
+JSON_ARRAY_RE = re.compile(r"\[.*\]", re.DOTALL)
+
+def company_key(lead):
+    return normalize_company_url(lead["company_url"]) or "name:" + normalize_company_name(lead["company_name"])
+
+def format_lead(index, lead):
+    return " | ".join([
+        str(index),
+        lead["company_name"],
+        lead["funding_round"],
+        f"{lead['funding_amount']:,.0f}",
+        lead["announcement_date"].strftime("%Y-%m-%d"),
+        lead["company_url"] or "-",
+    ])
+
+def parse_verdicts(response, count):
+    """
+    Returns {index: {"score", "qualified", "reason"}} from a model response; entries
+    with unknown ids or missing fields are skipped.
+    """
+    match = JSON_ARRAY_RE.search(response)
+    if not match:
+        raise ValueError("no JSON array in response")
+    verdicts = {}
+    for item in json.loads(match.group(0)):
+        try:
+            index = int(item["id"])
+            score = max(0, min(100, int(item["score"])))
+        except (KeyError, TypeError, ValueError):
+            continue
+        if 0 <= index < count:
+            verdicts[index] = {
+                "score": score,
+                "qualified": bool(item.get("qualified", score >= 50)),
+                "reason": str(item.get("reason", ""))[:200],
+            }
+    return verdicts
+
+class VerdictCache:
+    def __init__(self, path=DEFAULT_DB):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def get_many(self, keys):
+        verdicts = {}
+        keys = list(keys)
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT company_key, score, qualified, reason FROM lead_verdicts "
+                f"WHERE criteria_hash = ? AND company_key IN ({', '.join('?' * len(chunk))})",
+                [CRITERIA_HASH] + chunk,
+            )
+            for key, score, qualified, reason in rows:
+                verdicts[key] = {"score": score, "qualified": bool(qualified), "reason": reason}
+        return verdicts
+
+    def put_many(self, items, model):
+        """
+        Stores [(key, lead, verdict)].
+        """
+        now = datetime.now().isoformat()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO lead_verdicts (company_key, criteria_hash, company_name, score, qualified, reason, model, scored_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(key, CRITERIA_HASH, lead["company_name"], v["score"], int(v["qualified"]), v["reason"], model, now)
+             for key, lead, v in items],
+        )
+        self.conn.commit()
+
+class Qualifier:
+    """
+    Scores leads with batched, rate-limited LLM calls and a persistent verdict cache.
+    """
+
+    def __init__(self, batch_size=25, concurrency=4, requests_per_minute=30, model_name=None, retries=1,
+                 cache=None, call=llm_call):
+        self.batch_size = batch_size
+        self.limiter = HostLimiter(concurrency, 60.0 / requests_per_minute)
+        self.model_name = model_name
+        self.retries = retries
+        self.cache = cache or VerdictCache()
+        self.call = call
+        self.calls = 0
+        self.failed_batches = 0
+        self.prompt_chars = 0
+        self.response_chars = 0
+
+    def close(self):
+        self.cache.close()
+
+    async def _score_batch(self, batch):
+        """
+        batch is [(key, lead)]; returns {key: verdict} for the leads the model answered.
+        """
+        lines = "\n".join(format_lead(i, lead) for i, (_, lead) in enumerate(batch))
+        messages = [{"role": "user", "content": f"Qualify these {len(batch)} leads:\n{lines}"}]
+        for attempt in range(self.retries + 1):
+            self.calls += 1
+            self.prompt_chars += len(SYSTEM_PROMPT) + len(messages[0]["content"])
+            response = await self.limiter("llm", lambda: self.call(
+                system=SYSTEM_PROMPT, messages=messages, model_name=self.model_name, temperature=0.0))
+            self.response_chars += len(response)
+            try:
+                verdicts = parse_verdicts(response, len(batch))
+            except ValueError as e:
+                print(f"[qualify] unparseable response for {len(batch)} leads (attempt {attempt + 1}): {e}")
+                continue
+            scored = [(batch[i][0], batch[i][1], verdict) for i, verdict in verdicts.items()]
+            self.cache.put_many(scored, self.model_name)
+            return {key: verdict for key, _, verdict in scored}
+        self.failed_batches += 1
+        return {}
+
+    async def qualify(self, leads):
+        """
+        Returns [(lead, verdict)] for every lead with a verdict, cached or new, best score first.
+        Leads of the same company share one verdict.
+        """
+        leads = list(leads)
+        keys = [company_key(lead) for lead in leads]
+        verdicts = self.cache.get_many(set(keys))
+        pending = {}
+        for key, lead in zip(keys, leads):
+            if key not in verdicts and key not in pending:
+                pending[key] = lead
+        pending = list(pending.items())
+        print(f"[qualify] {len(leads)} leads, {len(verdicts)} companies cached, "
+              f"{len(pending)} to score in {-(-len(pending) // self.batch_size)} calls")
+        batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+        for scored in await asyncio.gather(*(self._score_batch(batch) for batch in batches)):
+            verdicts.update(scored)
+        results = [(lead, verdicts[key]) for key, lead in zip(keys, leads) if key in verdicts]
+        results.sort(key=lambda item: -item[1]["score"])
+        return results
+
+    def usage(self):
+        return (f"{self.calls} calls, ~{self.prompt_chars // CHARS_PER_TOKEN} prompt tokens, "
+                f"~{self.response_chars // CHARS_PER_TOKEN} response tokens, {self.failed_batches} failed batches")
+
+async def qualify_stored_leads(lead_filter=None, limit=None, **qualifier_options):
+    """
+    Qualifies leads from the lead store (optionally through a LeadFilter, in SQL).
+    """
+    store = LeadStore()
+    try:
+        if lead_filter is not None:
+            leads = list(store.query_filter(lead_filter, limit=limit))
+        else:
+            leads = list(store.query(limit=limit))
+    finally:
+        store.close()
+    qualifier = Qualifier(**qualifier_options)
+    try:
+        start = time.perf_counter()
+        results = await qualifier.qualify(leads)
+        print(f"[qualify] {len(results)} verdicts in {time.perf_counter() - start:.1f}s: {qualifier.usage()}")
+        return results
+    finally:
+        qualifier.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Score stored leads with an LLM")
+    parser.add_argument("--batch-size", type=int, default=25)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rpm", type=int, default=30, help="Maximum LLM calls started per minute")
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
+
+    results = asyncio.run(qualify_stored_leads(
+        limit=args.limit, batch_size=args.batch_size, concurrency=args.concurrency,
+        requests_per_minute=args.rpm, model_name=args.model,
+    ))
+    for lead, verdict in results:
+        mark = "+" if verdict["qualified"] else "-"
+        print(f"{mark} {verdict['score']:>3}  {lead['company_name']} ({lead['funding_round']}): {verdict['reason']}")
+
+if __name__ == "__main__":
+    main()
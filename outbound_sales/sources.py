@@ -0,0 +1,156 @@
+"""
+Lead sources for the startup finder pipeline (see pipeline.py).
+
+Every source is an async generator of raw lead dicts, in the same shape the
+crawler produces:
+    {"company_name", "funding_round", "funding_amount", "announcement_date", "company_url", "article_url"}
+
+  - "techcrunch": a WordPress-style funding tag listing, walked by crawler.Crawler
+  - "feed":       an RSS 2.0 or Atom feed; each item's article is opened for the company URL
+  - "html_dump":  saved listing pages in a local directory, read without any network access
+
+Sources share one Crawler, so they share its connection pool, per-host limits
+and crawl store. Add a source by writing a class with `name`, `label` and
+`leads(crawler, days)` and registering it in SOURCES.
+"""
+
+import asyncio
+import os
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+
+from crawler import LISTING_URL
+from funding_extract import extract_funding
+
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+
+def _parse_feed_date(text):
+    if not text:
+        return datetime.now()
+    text = text.strip()
+    try:
+        parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(text)
+        except (TypeError, ValueError):
+            return datetime.now()
+    return parsed.replace(tzinfo=None)
+
+def parse_feed(xml_text):
+    """
+    Returns listing entries ({"title", "article_url", "announcement_date", "snippet"})
+    for the items of an RSS 2.0 or Atom feed.
+    """
+    root = ET.fromstring(xml_text)
+    entries = []
+    for item in root.iter("item"):
+        entries.append({
+            "title": (item.findtext("title") or "").strip(),
+            "article_url": (item.findtext("link") or "").strip(),
+            "announcement_date": _parse_feed_date(item.findtext("pubDate")),
+            "snippet": (item.findtext("description") or "").strip(),
+        })
+    for item in root.iter(ATOM_NS + "entry"):
+        link = item.find(ATOM_NS + "link[@rel='alternate']")
+        if link is None:
+            link = item.find(ATOM_NS + "link")
+        entries.append({
+            "title": (item.findtext(ATOM_NS + "title") or "").strip(),
+            "article_url": link.get("href", "") if link is not None else "",
+            "announcement_date": _parse_feed_date(item.findtext(ATOM_NS + "updated") or item.findtext(ATOM_NS + "published")),
+            "snippet": (item.findtext(ATOM_NS + "summary") or item.findtext(ATOM_NS + "content") or "").strip(),
+        })
+    return [entry for entry in entries if entry["article_url"]]
+
+class TechCrunchSource:
+    name = "techcrunch"
+
+    def __init__(self, url=LISTING_URL):
+        self.url = url
+        self.label = f"techcrunch {url}"
+
+    async def leads(self, crawler, days):
+        async for lead in crawler.iter_leads(self.url, days=days):
+            yield lead
+
+class FeedSource:
+    name = "feed"
+
+    def __init__(self, url):
+        self.url = url
+        self.label = f"feed {url}"
+
+    async def leads(self, crawler, days):
+        xml_text = await crawler.fetch(self.url, conditional=True)
+        if xml_text is None:
+            raise RuntimeError(f"could not fetch {self.url}")
+        cutoff = datetime.now() - timedelta(days=days)
+        entries = [entry for entry in parse_feed(xml_text) if entry["announcement_date"] >= cutoff]
+        pending = set()
+        for entry in entries:
+            funding_round, amount = extract_funding(entry["title"] + " " + entry["snippet"])
+            pending.add(asyncio.create_task(crawler._enrich_or_skip(entry, funding_round, amount, None)))
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.result() is not None:
+                        yield task.result()
+        finally:
+            # As in Crawler.iter_leads: closing early leaves no articles in flight.
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+class HtmlDumpSource:
+    name = "html_dump"
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.label = f"html_dump {directory}"
+
+    async def leads(self, crawler, days):
+        cutoff = datetime.now() - timedelta(days=days)
+        for filename in sorted(os.listdir(self.directory)):
+            if not filename.endswith((".html", ".htm")):
+                continue
+            path = os.path.join(self.directory, filename)
+            with open(path, encoding="utf-8", errors="replace") as f:
+                html = f.read()
+            entries = [entry for entry in crawler.extractor.parse_listing(html, "file://" + os.path.abspath(path))
+                       if entry["announcement_date"] >= cutoff]
+            for entry in entries:
+                funding_round, amount = extract_funding(entry["snippet"])
+                yield {
+                    "company_name": entry["title"],
+                    "funding_round": funding_round,
+                    "funding_amount": amount,
+                    "announcement_date": entry["announcement_date"],
+                    "company_url": "",
+                    "article_url": entry["article_url"],
+                }
+            # Parsing is synchronous; let the other sources run between files.
+            await asyncio.sleep(0)
+
+SOURCES = {
+    "techcrunch": TechCrunchSource,
+    "feed": FeedSource,
+    "html_dump": HtmlDumpSource,
+}
+
+DEFAULT_SOURCES = [("techcrunch", {})]
+
+def build_sources(specs=DEFAULT_SOURCES):
+    """
+    Instantiates [(name, kwargs)] from SOURCES, e.g.
+        [("techcrunch", {}), ("feed", {"url": "https://example.com/funding.rss"}), ("html_dump", {"directory": "dumps"})]
+    """
+    sources = []
+    for name, kwargs in specs:
+        if name not in SOURCES:
+            raise ValueError(f"Unknown source '{name}', expected one of {', '.join(SOURCES)}")
+        sources.append(SOURCES[name](**kwargs))
+    return sources
@@ -0,0 +1,204 @@
+"""
+Crawler tests against a local fixture HTTP server.
+
+The server serves a two-page funding listing (the second page crosses the date
+cutoff) and one article per listing entry, and records every request so the
+tests can check which pages the crawler actually opened.
+"""
+
+import asyncio
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from crawl_store import CrawlStore
+from crawler import Crawler, crawl_funding
+from sources import FeedSource
+
+LISTING_PATH = "/tag/funding/"
+
+def listing_block(slug, title, date, snippet):
+    return f"""
+    <div class="post-block">
+      <a class="post-block__title__link" href="/articles/{slug}">{title}</a>
+      <time datetime="{date.isoformat()}">{date:%b %d}</time>
+      <div class="post-block__content">{snippet}</div>
+    </div>"""
+
+def article_page(body):
+    return f"<html><body><div class=\"article-content\">{body}</div></body></html>"
+
+def fixture_site():
+    """
+    path -> (status, headers, body) for the fixture site.
+    """
+    recent = datetime.now() - timedelta(days=1)
+    old = datetime.now() - timedelta(days=60)
+    page_1 = "".join([
+        listing_block("acme", "Acme raises $5M", recent, "Acme raises $5M Seed round"),
+        listing_block("bolt", "Bolt lands Series A", recent, "Bolt lands a Series A"),
+    ])
+    page_2 = "".join([
+        listing_block("cog", "Cog closes round", recent, "Cog closes a round"),
+        listing_block("dusty", "Dusty raised long ago", old, "Dusty raises $9M Series B"),
+    ])
+    return {
+        LISTING_PATH: (200, {"ETag": '"listing-1"'}, page_1),
+        LISTING_PATH + "page/2/": (200, {}, page_2),
+        LISTING_PATH + "page/3/": (200, {}, listing_block("never", "Never fetched", recent, "")),
+        "/articles/acme": (200, {}, article_page(
+            'Acme raised $5 million in a seed round. <a href="https://acme.example/">Acme</a> '
+            '<a href="https://twitter.com/acme">@acme</a>')),
+        "/articles/bolt": (200, {}, article_page(
+            'Bolt raised $12M in its Series A. <a href="https://bolt.example/home">Bolt</a>')),
+        "/articles/cog": (200, {}, article_page(
+            'Cog closed a €8 million Series B. <a href="https://cog.example/">Cog</a>')),
+        "/articles/dusty": (200, {}, article_page("Dusty raised $9M Series B.")),
+    }
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, routes):
+        super().__init__(("127.0.0.1", 0), FixtureHandler)
+        self.routes = routes
+        self.requests = []  # (path, request headers)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append((self.path, dict(self.headers)))
+        status, headers, body = self.server.routes.get(self.path, (404, {}, "not found"))
+        etag = headers.get("ETag")
+        if status == 200 and etag and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        data = body.encode("utf-8")
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def site():
+    server = FixtureServer(fixture_site())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def requested_paths(server):
+    return [path for path, _ in server.requests]
+
+def crawl(site, **options):
+    options = {"delay": 0.0, "extractor": "bs4", **options}
+    leads = crawl_funding(site.base_url + LISTING_PATH, days=30, **options)
+    return {lead["article_url"].rsplit("/", 1)[-1]: lead for lead in leads}
+
+def test_pages_until_date_cutoff(site):
+    leads = crawl(site)
+    assert sorted(leads) == ["acme", "bolt", "cog"]
+    paths = requested_paths(site)
+    assert LISTING_PATH in paths and LISTING_PATH + "page/2/" in paths
+    # Page 2 already crosses the cutoff, so page 3 and the old article are never opened.
+    assert LISTING_PATH + "page/3/" not in paths
+    assert "/articles/dusty" not in paths
+
+def test_articles_enrich_listing_entries(site):
+    leads = crawl(site)
+    assert leads["acme"]["company_url"] == "https://acme.example/"
+    assert leads["acme"]["funding_round"] == "Seed"
+    assert leads["acme"]["funding_amount"] == 5e6
+    # Round and amount missing from the snippets come from the article body.
+    assert (leads["bolt"]["funding_round"], leads["bolt"]["funding_amount"]) == ("Series A", 12e6)
+    assert leads["cog"]["funding_round"] == "Series B"
+    assert leads["cog"]["funding_amount"] == pytest.approx(8e6 * 1.08)
+    assert leads["cog"]["company_url"] == "https://cog.example/"
+
+def test_missing_article_keeps_snippet_values(site):
+    del site.routes["/articles/acme"]
+    leads = crawl(site, retries=0)
+    assert leads["acme"]["company_url"] == ""
+    assert (leads["acme"]["funding_round"], leads["acme"]["funding_amount"]) == ("Seed", 5e6)
+
+def test_failing_article_is_skipped(site):
+    class BrokenExtractor:
+        name = "broken"
+
+        def __init__(self, extractor):
+            self.extractor = extractor
+
+        def parse_listing(self, html, page_url):
+            return self.extractor.parse_listing(html, page_url)
+
+        def parse_article(self, html, article_url):
+            if article_url.endswith("/bolt"):
+                raise ValueError("unparseable article")
+            return self.extractor.parse_article(html, article_url)
+
+    async def run():
+        crawler = Crawler(delay=0.0, extractor="bs4")
+        crawler.extractor = BrokenExtractor(crawler.extractor)
+        try:
+            return await crawler.crawl(site.base_url + LISTING_PATH, days=30)
+        finally:
+            await crawler.close()
+
+    leads = asyncio.run(run())
+    assert sorted(lead["article_url"].rsplit("/", 1)[-1] for lead in leads) == ["acme", "cog"]
+
+def feed_item(base_url, slug, title, date):
+    return (f"<item><title>{title}</title><link>{base_url}/articles/{slug}</link>"
+            f"<pubDate>{date:%a, %d %b %Y %H:%M:%S} +0000</pubDate></item>")
+
+def test_feed_source_skips_failing_article(site):
+    recent = datetime.now() - timedelta(days=1)
+    items = "".join(feed_item(site.base_url, slug, f"{slug} raises $5M Seed", recent) for slug in ("acme", "bolt", "cog"))
+    site.routes["/funding.rss"] = (200, {}, f"<rss><channel>{items}</channel></rss>")
+
+    class BrokenCrawler(Crawler):
+        async def enrich(self, entry, *args, **kwargs):
+            if entry["article_url"].endswith("/bolt"):
+                raise ValueError("unparseable article")
+            return await super().enrich(entry, *args, **kwargs)
+
+    async def run():
+        crawler = BrokenCrawler(delay=0.0, extractor="bs4")
+        try:
+            return [lead async for lead in FeedSource(site.base_url + "/funding.rss").leads(crawler, 30)]
+        finally:
+            await crawler.close()
+
+    leads = {lead["article_url"].rsplit("/", 1)[-1]: lead for lead in asyncio.run(run())}
+    assert sorted(leads) == ["acme", "cog"]
+    assert leads["cog"]["company_url"] == "https://cog.example/"
+
+def test_second_run_uses_conditional_gets_and_seen_articles(site, tmp_path):
+    store = CrawlStore(str(tmp_path / "crawl.db"))
+    try:
+        first = crawl(site, store=store)
+        site.requests.clear()
+        second = crawl(site, store=store)
+    finally:
+        store.close()
+
+    assert second == first
+    headers = dict(site.requests)
+    # The listing page is revalidated with its ETag and answered with a 304.
+    assert headers[LISTING_PATH].get("If-None-Match") == '"listing-1"'
+    # Articles parsed on the first run come from the store without a request.
+    assert not [path for path in requested_paths(site) if path.startswith("/articles/")]